@@ -3,14 +3,34 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import math
-import gspread
-from google.oauth2 import service_account
+import numpy as np
 # Add import for autorefresh
 from streamlit_autorefresh import st_autorefresh
 import hashlib
+import functools
+import re
 import time
 import sys
 import os
+from sheet_sync import MultiSheetSync, SheetDeltaSync, create_client
+from sheet_poller import SheetPoller
+from snapshot_store import load_snapshot, save_snapshot, prune_snapshots
+from perf_metrics import SectionProfiler
+from reachability import ReachabilityProber
+from change_log import ChangeLog
+from trend_store import TrendStore
+from sheet_writer import SheetWriter
+from search_index import SearchIndex
+from exports import EXPORT_FORMATS, export_bytes
+from excel_reader import read_inventory_excel
+from inventory_core import (
+    build_inventory_frame, build_slice_index, display_columns, summarize_alerts, coverage_counts,
+    bytes_per_row, load_alert_rules, daily_rollup, AlertEvaluator, AlertRules,
+    ALERT_RULES_PATH, DEFAULT_ALERT_RULES,
+    STATUS_CODE, STATUS_COLUMN, FIRMWARE_COLUMN,
+    LIVE, REPAIR, PLANT, HO, FIRMWARE_PENDING, REPAIR_ALERT, DISCARD_ALERT,
+    HIGH_ALERT, MILD_ALERT, PO_DATETIME, DEVICE_AGE_COLUMN,
+)
 
 # Helper for rerun (Streamlit >=1.18: st.rerun, else st.experimental_rerun)
 def rerun_app():
@@ -30,22 +50,36 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-def create_device_box(device):
-    status_class = "live" if device['Initial Status'] == 'Live' else "offline"
-    html = f"""
-        <div class="device-box">
-            <div class="status-dot {status_class}"></div>
-            {device['Model']}
-            <div class="popup">
-                <strong>Type:</strong> {device['Types']}<br>
-                <strong>Status:</strong> {device['Initial Status']}<br>
-                <strong>Location:</strong> {device['Camera & NVR(1F or HO)']}<br>
-                <strong>PO Date:</strong> {device.get('PO Date', 'N/A')}<br>
-                <strong>IP Address:</strong> {device['Camera or NVR IP']}<br>
-            </div>
-        </div>
-    """
-    return html
+def _html_text(devices, column):
+    # Column as escaped HTML text, built with vectorized string ops
+    if column not in devices.columns:
+        return pd.Series('N/A', index=devices.index)
+    return (devices[column].astype(str)
+            .str.replace('&', '&amp;', regex=False)
+            .str.replace('<', '&lt;', regex=False)
+            .str.replace('>', '&gt;', regex=False))
+
+def create_device_grid(devices, reachable=None):
+    """ Render every device box as one CSS-grid HTML payload """
+    live = devices[STATUS_CODE] == LIVE
+    probe_text = ''
+    if reachable is not None:
+        # Probed devices show live reachability; devices not probed yet keep the sheet status
+        live = reachable.where(reachable.notna(), live).astype(bool)
+        probe_text = '<br><strong>Reachable:</strong> ' + reachable.map({True: 'Yes', False: 'No'}).fillna('Checking...')
+    status_class = pd.Series(np.where(live, 'live', 'offline'), index=devices.index)
+    boxes = (
+        '<div class="device-box"><div class="status-dot ' + status_class + '"></div>'
+        + _html_text(devices, 'Model')
+        + '<div class="popup"><strong>Type:</strong> ' + _html_text(devices, 'Types')
+        + '<br><strong>Status:</strong> ' + _html_text(devices, 'Initial Status')
+        + '<br><strong>Location:</strong> ' + _html_text(devices, 'Camera & NVR(1F or HO)')
+        + '<br><strong>PO Date:</strong> ' + _html_text(devices, 'PO Date')
+        + '<br><strong>IP Address:</strong> ' + _html_text(devices, 'Camera or NVR IP')
+        + probe_text
+        + '<br></div></div>'
+    )
+    return '<div class="device-grid">' + ''.join(boxes) + '</div>'
 
 # Set page config
 st.set_page_config(
@@ -54,22 +88,13 @@ st.set_page_config(
     layout="wide"
 )
 
-# Add auto-refresh at the very top of the app (5 seconds = 5000 ms)
-st_autorefresh(interval=5000, limit=None, key="autorefresh2s")
-
 # Simple header row: Title and emoji-based refresh button, right-aligned
 st.title("🏍️ Inventory Management System")
 
 # Load and apply CSS
 with open(resource_path('styles.css')) as f:
     css = f.read()
-    
-# Create API client
-credentials = service_account.Credentials.from_service_account_file(
-    resource_path('inventory-managment-465211-7ba8ecdf5815.json'),
-    scopes=['https://www.googleapis.com/auth/spreadsheets']
-)
-client = gspread.authorize(credentials)
+
 
 # Custom CSS for styled boxes and overlay popups
 st.markdown("""
@@ -167,45 +192,405 @@ st.markdown("""
     .device-box:hover .popup {
         display: block;
     }
+
 </style>
 """, unsafe_allow_html=True)
 
+# --- Section profiling: ?profile=1 (this session) or INVENTORY_PROFILING=1 (every session) ---
+@st.cache_resource
+def get_profiler():
+    # One rolling window per process, fed by every profiled session
+    return SectionProfiler(enabled=os.environ.get('INVENTORY_PROFILING') == '1')
+
+def profiling_requested():
+    if hasattr(st, 'query_params'):
+        return st.query_params.get('profile') == '1'
+    return st.experimental_get_query_params().get('profile', [None])[0] == '1'
+
+profiling_enabled = get_profiler().enabled or profiling_requested()
+# No-op stopwatch unless profiling is on; each lap() times the section that just ended
+profile = get_profiler().start_rerun(enabled=profiling_enabled)
+
 data_source = st.radio("Select Data Source", ["Google Sheet", "Upload Excel File"], horizontal=True)
 
-# --- Smart Google Sheet Refresh with Caching ---
+# --- Smart Google Sheet Refresh with Delta Sync ---
 SHEET_URL = 'https://docs.google.com/spreadsheets/d/1r55Y83e4LV-dN00b2u5dFPnZ9unehUyK4K9d7iANEYo'
 SHEET_IDX = 0
-@st.cache_resource(ttl=60)
-def fetch_gsheet_data():
-    sheet = client.open_by_url(SHEET_URL)
-    worksheet = sheet.get_worksheet(SHEET_IDX)
-    data = worksheet.get_all_records()
-    df_gsheet = pd.DataFrame(data)
-    return df_gsheet
-
-# Use session state for main DataFrame
+# One entry per site tab: (site name, spreadsheet URL, worksheet index). Each is fetched
+# concurrently and synced on its own; with several sites the data gets a 'Site' column.
+SHEET_SOURCES = [
+    ('Main', SHEET_URL, SHEET_IDX),
+]
+SHEET_SNAPSHOT_PREFIX = 'gsheet-'
+# Snapshot name used before sheets were split per site; still read for a single-site setup
+LEGACY_SHEET_SNAPSHOT = 'gsheet-latest'
+EXCEL_SNAPSHOT_PREFIX = 'excel-'
+EXCEL_SNAPSHOTS_KEPT = 5
+EXCEL_CACHE_ENTRIES = 8
+
+def save_sheet_snapshot(sync):
+    save_snapshot(SHEET_SNAPSHOT_PREFIX + sync.name, sync.frame, meta=sync.snapshot_meta(),
+                  row_hashes=sync.row_hashes)
+
+@st.cache_resource
+def get_gsheet_client():
+    # Created on first Google Sheet use and shared by every session; upload-only sessions never pay for it
+    return create_client(resource_path('inventory-managment-465211-7ba8ecdf5815.json'))
+
+@st.cache_resource
+def get_sheet_sync():
+    # One sync per site per process; each re-pulls at most every 60 s and only patches changed rows
+    syncs = []
+    for site, url, idx in SHEET_SOURCES:
+        # The poller is the only reader and goes live right after publishing a seeded frame
+        sync = SheetDeltaSync(url, idx, min_interval=60, on_publish=save_sheet_snapshot, name=site,
+                              background_refresh=False)
+        # Cold start: serve the last good frame from disk while the poller's first pull runs
+        snapshot, meta, row_hashes = load_snapshot(SHEET_SNAPSHOT_PREFIX + site)
+        if snapshot is None and len(SHEET_SOURCES) == 1:
+            # Written as gsheet-<site> from the first publish on
+            snapshot, meta, row_hashes = load_snapshot(LEGACY_SHEET_SNAPSHOT)
+        if snapshot is not None and row_hashes is not None:
+            sync.seed(snapshot, meta.get('headers'), row_hashes, meta.get('version'),
+                      revision=meta.get('revision'), saved_at=meta.get('saved_at'),
+                      text_columns=meta.get('text_columns'))
+        syncs.append(sync)
+    return MultiSheetSync(syncs)
+
+@st.cache_data(max_entries=64)
+def render_device_grid_page(data_version, location, area, page, page_size, probe_generation,
+                            _page_df, _reachable=None):
+    # Grid HTML only depends on the slice, page and probe cycle, so reruns resend the cached payload
+    return create_device_grid(_page_df, _reachable)
+
+# --- Live reachability: TCP connects to each device IP, probed in the background ---
+PROBE_PORTS = (554, 80)  # RTSP, HTTP; each row's own 'Port' is tried as well
+PROBE_TTL_SECONDS = 120
+
+@st.cache_resource
+def get_prober():
+    # One prober per process, shared by every session that turns the check on
+    return ReachabilityProber(ports=PROBE_PORTS, ttl=PROBE_TTL_SECONDS).start()
+
+def device_reachability(devices):
+    """ True/False per device once probed, None until then (never blocks on the network) """
+    if 'Camera or NVR IP' not in devices.columns:
+        return pd.Series(None, index=devices.index, dtype=object)
+    ports = devices['Port'] if 'Port' in devices.columns else None
+    return get_prober().lookup(devices['Camera or NVR IP'], ports)
+
+@st.cache_resource(max_entries=EXCEL_CACHE_ENTRIES)
+def load_uploaded_excel(snapshot_name, _uploaded_file):
+    # Parsed once per distinct file content (LRU in memory, then the on-disk snapshot)
+    excel_df, _, _ = load_snapshot(snapshot_name)
+    if excel_df is None:
+        # Streams the first sheet in read-only mode; every named column is kept for the table view
+        excel_df = read_inventory_excel(_uploaded_file)
+        save_snapshot(snapshot_name, excel_df)
+        prune_snapshots(EXCEL_SNAPSHOT_PREFIX, EXCEL_SNAPSHOTS_KEPT)
+    return excel_df
+
+FIGURE_CACHE_ENTRIES = 32
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES)
+def build_analytics_figures(data_version, day, location, area, _view_df):
+    # Charts for one (data version, location, area) slice, reused across reruns and sessions.
+    # Figures are cached rather than their JSON: st.plotly_chart re-validates a dict into a
+    # Figure before serializing it again, which is slower than serializing the cached Figure.
+    def nonzero_counts(column):
+        # Categorical columns also count categories that are absent from this slice
+        counts = _view_df[column].value_counts()
+        return counts[counts > 0]
+    analytics = {}
+    status_counts = nonzero_counts('Initial Status')
+    if not status_counts.empty:
+        analytics['status'] = px.pie(
+            values=status_counts.values,
+            names=status_counts.index,
+            title=f"Device Status Distribution in {location}",
+            color_discrete_sequence=px.colors.qualitative.Pastel2  # Second color scheme
+        )
+    types_counts = nonzero_counts('Types')
+    if not types_counts.empty:
+        analytics['types'] = px.pie(
+            values=types_counts.values,
+            names=types_counts.index,
+            title=f"Device Types Distribution in {location}",
+            color_discrete_sequence=px.colors.qualitative.Dark24  # Third color scheme
+        )
+
+    # Warranty coverage chart and summary metrics
+    warranty_counts = nonzero_counts('AMC, Warranty,Not in AMC and warranty')
+    analytics['warranty'] = px.pie(
+        values=warranty_counts.values,
+        names=warranty_counts.index,
+        title="Warranty & AMC Coverage"
+    )
+    analytics.update(coverage_counts(_view_df))
+
+    # Average device age by type
+    avg_age_by_type = _view_df.groupby('Types', observed=True)[DEVICE_AGE_COLUMN].mean().round(1)
+    fig_age = go.Figure(data=[
+        go.Bar(
+            x=list(avg_age_by_type.index),
+            y=list(avg_age_by_type.values),
+            text=[f"{age:.1f} years" for age in avg_age_by_type.values],
+            textposition='auto',
+        )
+    ])
+    fig_age.update_layout(
+        title="Average Device Age by Type",
+        xaxis_title="Device Type",
+        yaxis_title="Average Age (Years)",
+        showlegend=False
+    )
+    analytics['age'] = fig_age
+    return analytics
+
+POLL_SECONDS = 60
+REFRESH_WAIT_SECONDS = 30
+SHEET_CHANGE_SOURCE = 'gsheet'
+
+@st.cache_resource
+def get_change_log():
+    # Device change events, diffed from successive data versions (SQLite in the cache directory)
+    return ChangeLog()
+
+@st.cache_resource
+def get_poller():
+    # The only code that talks to Google Sheets; every session reads its published snapshot.
+    # Each new version is diffed into the change log on the poller thread.
+    change_log = get_change_log()
+    return SheetPoller(
+        get_sheet_sync(), get_gsheet_client(), interval=POLL_SECONDS,
+        on_publish=lambda snapshot: change_log.record(SHEET_CHANGE_SOURCE, snapshot.frame),
+    ).start()
+
+@st.cache_resource(max_entries=EXCEL_CACHE_ENTRIES)
+def record_upload_changes(data_version, file_name, _raw_df):
+    # Once per uploaded version: re-uploads of the same file name are diffed against each other
+    return get_change_log().record(f'upload:{file_name}', _raw_df)
+
+def fetch_gsheet_data(force=False):
+    poller = get_poller()
+    if force:
+        # Coalesced with any other pending request; wait so this rerun shows the result
+        poller.wait_for(poller.request_refresh(), timeout=REFRESH_WAIT_SECONDS)
+    return poller.wait_for_snapshot()
+
+# --- Auto-refresh: check the data fingerprint every 5 s, rerun the page only when it changed ---
+AUTOREFRESH_SECONDS = 5
+def watch_for_data_changes(rendered_version, rendered_probe=None):
+    # Cheap tick: only compares versions, the poller and prober do all the network work
+    if data_source == "Google Sheet":
+        snapshot = get_poller().snapshot
+        if snapshot is not None and snapshot.version != rendered_version:
+            rerun_app()
+    if rendered_probe is not None and get_prober().generation != rendered_probe:
+        rerun_app()
+
+if hasattr(st, 'fragment'):
+    watch_for_data_changes = st.fragment(run_every=AUTOREFRESH_SECONDS)(watch_for_data_changes)
+
+@st.cache_resource(max_entries=4)
+def prepare_inventory(data_version, day, _raw_df):
+    # Runs once per data version (and day, as device ages move); the result is shared
+    # read-only by every section and session
+    return build_inventory_frame(_raw_df)
+
+# --- Alert rules: alert_rules.json (or INVENTORY_ALERT_RULES), reloaded when the file changes ---
+@st.cache_resource(max_entries=4)
+def get_alert_rules(path, mtime):
+    return load_alert_rules(path)
+
+def current_alert_rules():
+    mtime = os.path.getmtime(ALERT_RULES_PATH) if os.path.exists(ALERT_RULES_PATH) else None
+    try:
+        return get_alert_rules(ALERT_RULES_PATH, mtime)
+    except (OSError, ValueError, KeyError) as e:
+        st.warning(f"⚠️ Could not load alert rules from {ALERT_RULES_PATH} ({e}); using the built-in rules.")
+        return AlertRules(DEFAULT_ALERT_RULES)
+
+@st.cache_resource
+def get_alert_evaluator():
+    # Remembers the last flags per data source, so large rule sets only re-evaluate rows whose inputs changed
+    return AlertEvaluator()
+
+@st.cache_resource(max_entries=4)
+def get_alert_summary(data_version, day, source, rules_fingerprint, _df, _rules):
+    # All banner counts, percentages and detail row sets from one evaluation of the rules
+    flags = get_alert_evaluator().evaluate(_rules, _df, day, source)
+    return summarize_alerts(_df, flags)
+
+# Main locations shown in the filter -> location codes they cover
+LOCATION_MAPPING = {
+    'Plant': [PLANT],
+    'HO': [HO],
+}
+
+@st.cache_resource(max_entries=4)
+def get_slice_index(data_version, day, _df):
+    # Row positions, sorted area lists and KPIs for every (location, area) slice, built once per version
+    return build_slice_index(_df, LOCATION_MAPPING)
+
+# --- Trends: one small rollup per source and day in a local time-series store ---
+@st.cache_resource
+def get_trend_store():
+    return TrendStore()
+
+@st.cache_resource(max_entries=4)
+def record_daily_rollup(data_version, day, source, rules_fingerprint, _df, _summary, _age_buckets):
+    # Once per data version and day; a later version of the same day replaces that day's rollup
+    return get_trend_store().record(source, day.isoformat(), daily_rollup(_df, _summary, _age_buckets))
+
+TREND_RANGES = {'Last 90 days': 90, 'Last year': 365, 'All history': None}
+
+SEARCH_RESULT_LIMIT = 500
+
+@st.cache_resource(max_entries=4)
+def get_search_index(data_version, _df):
+    # Trigram/prefix index over the searchable text columns; rows keep their order across days
+    return SearchIndex(_df)
+
+# --- Exports: files are built in chunks, only when a download button is clicked ---
+try:
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    DEFERRED_DOWNLOADS = hasattr(MediaFileManager, 'add_deferred')
+except ImportError:
+    DEFERRED_DOWNLOADS = False
+
+def export_buttons(frame, name, key):
+    # One download button per format; newer Streamlit calls export_bytes on a worker thread at click time
+    frame = frame[display_columns(frame)]
+    name = re.sub(r'[^A-Za-z0-9_-]+', '_', name).strip('_')
+    if not DEFERRED_DOWNLOADS and not st.checkbox("Prepare downloads", key=f"export_{key}_prepare"):
+        # Older Streamlit needs the bytes up front, so only build them on request
+        return
+    for column, (fmt, mime) in zip(st.columns(len(EXPORT_FORMATS)), EXPORT_FORMATS.items()):
+        with column:
+            data = functools.partial(export_bytes, frame, fmt)
+            st.download_button(
+                f"⬇️ {fmt.upper()}",
+                data=data if DEFERRED_DOWNLOADS else data(),
+                file_name=f"{name}.{fmt}",
+                mime=mime,
+                key=f"export_{key}_{fmt}",
+                **({'on_click': 'ignore'} if DEFERRED_DOWNLOADS else {})
+            )
+
+# --- In-app editing: applied to the published frame at once, written back to the sheet in batches ---
+EDITABLE_COLUMNS = [STATUS_COLUMN, FIRMWARE_COLUMN]
+
+@st.cache_resource
+def get_sheet_writer():
+    # One write queue per process; each flush asks the poller to re-read the written rows
+    poller = get_poller()
+    return SheetWriter(get_gsheet_client(), on_flushed=poller.request_refresh)
+
+def edit_devices(frame, version, statuses):
+    # Status and firmware are editable, the other columns are read-only context; one save = one batch
+    columns = display_columns(frame)
+    editable = [c for c in EDITABLE_COLUMNS if c in frame.columns]
+    view = frame[columns].astype({c: object for c in editable})
+    view[editable] = view[editable].where(view[editable].notna(), None)
+    column_config = {
+        "Camera name": "Location",
+        "Types": "Device Type",
+        "Camera or NVR IP": "IP Address",
+        "Manufacturing Date": "Manufactured On",
+        "AMC, Warranty,Not in AMC and warranty": "Coverage Status",
+    }
+    if STATUS_COLUMN in editable:
+        column_config[STATUS_COLUMN] = st.column_config.SelectboxColumn("Status", options=statuses)
+    if FIRMWARE_COLUMN in editable:
+        column_config[FIRMWARE_COLUMN] = st.column_config.TextColumn("Firmware")
+    with st.form("device_edits"):
+        edited = st.data_editor(
+            view,
+            column_config=column_config,
+            disabled=[c for c in columns if c not in editable],
+            hide_index=True,
+        )
+        submitted = st.form_submit_button("💾 Save changes")
+
+    writer = get_sheet_writer()
+    stats = writer.last_stats
+    if writer.pending:
+        st.caption(f"Writing {writer.pending} changed cells to the Google Sheet...")
+    elif stats:
+        st.caption(
+            f"Last write-back: {stats['cells']} cells in {stats['requests']} request(s), "
+            f"{stats['retries']} retries at {time.strftime('%H:%M:%S', time.localtime(stats['flushed_at']))}"
+        )
+    if stats.get('skipped'):
+        st.warning(f"⚠️ {stats['skipped']} edits were skipped because those rows changed in the sheet meanwhile.")
+    if stats.get('error'):
+        st.warning(f"⚠️ Could not write to the Google Sheet, edits were rolled back: {stats['error']}")
+    if not submitted:
+        return
+
+    # Index labels are row positions in the published frame
+    cells = {}
+    for column in editable:
+        before, after = view[column], edited[column]
+        changed = before.ne(after) & ~(before.isna() & after.isna())
+        for position, value in after[changed].items():
+            cells[(position, column)] = value
+    if not cells:
+        st.info("No changes to save.")
+        return
+    groups = get_poller().apply_edits(version, cells)
+    if groups is None:
+        st.warning("The sheet was updated while you were editing, so nothing was saved. "
+                   "Please review the new data and save again.")
+        return
+    for sync, sync_cells in groups:
+        writer.submit(sync, sync_cells)
+    rerun_app()
+
 df = None
+data_version = None
+change_source = SHEET_CHANGE_SOURCE
 if data_source == "Google Sheet":
-    if 'df' not in st.session_state:
-        st.session_state.df = fetch_gsheet_data()
-    if st.button('🔄 Refresh', key="refresh_btn"):
-        st.cache_resource.clear()
-        st.session_state.df = fetch_gsheet_data()
-    df = st.session_state.df
+    force_refresh = st.button('🔄 Refresh', key="refresh_btn")
+    snapshot = fetch_gsheet_data(force=force_refresh)
+    if snapshot is None:
+        st.error(f"Could not load the Google Sheet: {get_poller().last_error}")
+        st.stop()
+    sync_stats = snapshot.stats
+    if sync_stats.get('mode') == 'snapshot':
+        saved_at = time.strftime('%Y-%m-%d %H:%M', time.localtime(sync_stats['synced_at'] or 0))
+        st.caption(f"Showing saved snapshot from {saved_at} while fresh data loads...")
+    elif sync_stats:
+        st.caption(
+            f"Sheet sync ({sync_stats['mode']}): fetched {sync_stats['rows_fetched']} rows, "
+            f"updated {sync_stats['rows_patched']} of {sync_stats['total_rows']} "
+            f"in {sync_stats['seconds']:.2f}s"
+        )
+    if len(sync_stats.get('sites', {})) > 1:
+        st.caption(" · ".join(
+            f"{site}: {stats.get('mode', 'loading')}, {stats.get('total_rows', 0)} rows"
+            for site, stats in sync_stats['sites'].items()
+        ))
+    if sync_stats.get('error'):
+        st.warning(f"⚠️ Google Sheet unreachable, showing last saved data: {sync_stats['error']}")
+    # Every session references the same published frame instead of keeping its own copy
+    df = snapshot.frame
+    data_version = snapshot.version
 else:
     # Excel upload logic as before
     uploaded_file = st.file_uploader("\U0001F4C2 Upload Inventory Excel File", type=["xlsx"])
     # Removed st_autorefresh for Excel uploads
     if uploaded_file:
         try:
-            df = pd.read_excel(uploaded_file, engine="openpyxl")
-            if 'PO Date' in df.columns:
-                df['Age (Years)'] = pd.to_datetime(df['PO Date'], errors='coerce', dayfirst=True).apply(
-                    lambda x: (pd.Timestamp.now() - x).days / 365.25 if pd.notna(x) else None
-                )
-            else:
+            # Uploads are keyed by content hash, so widget reruns and re-uploads skip openpyxl
+            file_bytes = uploaded_file.getvalue()
+            snapshot_name = EXCEL_SNAPSHOT_PREFIX + hashlib.sha256(file_bytes).hexdigest()[:16]
+            data_version = snapshot_name
+            df = load_uploaded_excel(snapshot_name, uploaded_file)
+            change_source = f'upload:{uploaded_file.name}'
+            record_upload_changes(data_version, uploaded_file.name, df)
+            if 'PO Date' not in df.columns:
                 st.warning("'PO Date' column not found in your Excel file. Age calculation will be skipped.")
-                df['Age (Years)'] = None
         except Exception as e:
             st.error(f"Error reading the Excel file: {str(e)}")
             st.stop()
@@ -216,13 +601,23 @@ else:
 if df is None or df.empty:
     st.error("No data available.")
     st.stop()
+profile.lap('fetch', rows=len(df))
+
+today = pd.Timestamp.now().date()
+raw_df = df
+df = prepare_inventory(data_version, today, df)
+profile.lap('prepare', rows=len(df))
+alert_rules = current_alert_rules()
+alert_summary = get_alert_summary(data_version, today, change_source, alert_rules.fingerprint, df, alert_rules)
+profile.lap('alert_summary', rows=len(df))
+record_daily_rollup(data_version, today, change_source, alert_rules.fingerprint, df, alert_summary,
+                    alert_rules.age_buckets)
 
 # --- Firmware Update Alert Section ---
-if "Firmware available or not" in df.columns:
-    # Exclude rows where value is 'No more updates' or 'OK' (case-insensitive, strip spaces)
-    firmware_mask = ~df["Firmware available or not"].astype(str).str.strip().str.lower().isin(["no more updates", "ok"])
-    firmware_update_df = df[firmware_mask]
-    firmware_update_count = len(firmware_update_df)
+if alert_summary.has_firmware:
+    # Firmware rule from alert_rules.json, by default everything except 'No more updates' / 'OK'
+    firmware_update_df = alert_summary.subset(df, FIRMWARE_PENDING)
+    firmware_update_count = alert_summary.count(FIRMWARE_PENDING)
     if firmware_update_count > 0:
         st.markdown(
             f"<div style='font-size:2.0rem; font-weight:bold; margin-bottom: 0.5em; color:#f39c12;'>"
@@ -230,8 +625,8 @@ if "Firmware available or not" in df.columns:
             unsafe_allow_html=True
         )
         # Group by location
-        plant_office_count = firmware_update_df[firmware_update_df['Camera & NVR(1F or HO)'].astype(str).str.strip().str.upper() == '1F'].shape[0]
-        ho_count = firmware_update_df[firmware_update_df['Camera & NVR(1F or HO)'].astype(str).str.strip().str.upper() == 'HO'].shape[0]
+        plant_office_count = alert_summary.count(FIRMWARE_PENDING, PLANT)
+        ho_count = alert_summary.count(FIRMWARE_PENDING, HO)
         st.markdown(f"""
         • 🏭 **Plant(1F)**: `{plant_office_count}` devices  
         • 🏢 **HO**: `{ho_count}` devices
@@ -252,22 +647,23 @@ if "Firmware available or not" in df.columns:
                     },
                     hide_index=True
                 )
+                export_buttons(firmware_update_df, "firmware_update", "firmware")
         else:
             st.success("✅ All devices have updated firmware.")
 else:
     st.warning("⚠️ 'Firmware available or not' column not found in your data.")
 
 # --- Devices Requiring Repair Section (all devices, not filtered) ---
-repair_devices_df = df[df['Initial Status'].astype(str).str.strip().str.lower() == 'repair']
-repair_count = len(repair_devices_df)
+repair_devices_df = alert_summary.subset(df, REPAIR_ALERT)
+repair_count = alert_summary.count(REPAIR_ALERT)
 st.markdown(
     f"<div style='font-size:2.0rem; font-weight:bold; margin-bottom: 0.5em; color:#e67e22;'>"
     f"⚠️🛠 Repair: {repair_count}</div>",
     unsafe_allow_html=True
 )
 # Plant/HO breakdown for Repair
-plant_repair_count = repair_devices_df[repair_devices_df['Camera & NVR(1F or HO)'].astype(str).str.strip().str.upper() == '1F'].shape[0]
-ho_repair_count = repair_devices_df[repair_devices_df['Camera & NVR(1F or HO)'].astype(str).str.strip().str.upper() == 'HO'].shape[0]
+plant_repair_count = alert_summary.count(REPAIR_ALERT, PLANT)
+ho_repair_count = alert_summary.count(REPAIR_ALERT, HO)
 st.markdown(f"""
 • 🏭 **Plant (1F)**: `{plant_repair_count}` devices  
 • 🏢 **HO**: `{ho_repair_count}` devices
@@ -288,18 +684,19 @@ if repair_count > 0:
             },
             hide_index=True
         )
+        export_buttons(repair_devices_df, "repair", "repair")
 
 # --- Not in Use (Discard) Section (all devices, not filtered) ---
-stock_devices_df = df[df['Initial Status'].astype(str).str.strip() == 'Discard']
-stock_count = len(stock_devices_df)
+stock_devices_df = alert_summary.subset(df, DISCARD_ALERT)
+stock_count = alert_summary.count(DISCARD_ALERT)
 st.markdown(
     f"<div style='font-size:2.0rem; font-weight:bold; margin-bottom: 0.5em; color:#888;'>"
     f"❌ Not in Use: {stock_count}</div>",
     unsafe_allow_html=True
 )
 # Plant/HO breakdown for Not in Use
-plant_down_count = stock_devices_df[stock_devices_df['Camera & NVR(1F or HO)'].astype(str).str.strip().str.upper() == '1F'].shape[0]
-ho_down_count = stock_devices_df[stock_devices_df['Camera & NVR(1F or HO)'].astype(str).str.strip().str.upper() == 'HO'].shape[0]
+plant_down_count = alert_summary.count(DISCARD_ALERT, PLANT)
+ho_down_count = alert_summary.count(DISCARD_ALERT, HO)
 st.markdown(f"""
 • 🏭 **Plant (1F)**: `{plant_down_count}` devices  
 • 🏢 **HO**: `{ho_down_count}` devices
@@ -320,33 +717,18 @@ if stock_count > 0:
             },
             hide_index=True
         )
+        export_buttons(stock_devices_df, "not_in_use", "discard")
+profile.lap('banners', rows=alert_summary.count(FIRMWARE_PENDING) + repair_count + stock_count)
 
 # --- PO Date Age Alerts Section ---
-# Safe date conversion
-po_dates = pd.to_datetime(df['PO Date'], errors='coerce', dayfirst=True)
-now = pd.Timestamp.now()
-device_ages = (now - po_dates).dt.total_seconds() / (365.25 * 24 * 60 * 60)
-
-# Add device age to df for filtering
-age_df = df.copy()
-age_df['Device Age (Years)'] = device_ages
-
-# High Alert: Devices older than 6 years OR within 1 month (1/12 year) of crossing 6 years
-high_alert_mask = age_df['Device Age (Years)'] > (6 - 1/12)
-high_alert_df = age_df[high_alert_mask].copy()
-
-# Mild Alert: Devices within 6 months (0.5 year) of crossing 6 years (but not in High Alert)
-mild_alert_mask = (age_df['Device Age (Years)'] > (6 - 0.5)) & (age_df['Device Age (Years)'] <= (6 - 1/12))
-mild_alert_df = age_df[mild_alert_mask].copy()
+# High Alert (default rules): Devices older than 6 years OR within 1 month (1/12 year) of crossing 6 years
+high_alert_df = alert_summary.subset(df, HIGH_ALERT)
 
-# Format columns
-for alert_df in [high_alert_df, mild_alert_df]:
-    alert_df = alert_df.copy()
-    alert_df.loc[:, 'Device Age (Years)'] = alert_df['Device Age (Years)'].round(1)
-    alert_df.loc[:, 'PO Date'] = pd.to_datetime(alert_df['PO Date'], errors='coerce', dayfirst=True).dt.strftime('%Y-%m-%d')
+# Mild Alert (default rules): Devices within 6 months (0.5 year) of crossing 6 years (but not in High Alert)
+mild_alert_df = alert_summary.subset(df, MILD_ALERT)
 
 # High Alert Banner (red if count > 0, green if 0)
-high_alert_count = len(high_alert_df)
+high_alert_count = alert_summary.count(HIGH_ALERT)
 if high_alert_count > 0:
     high_alert_color = '#d32f2f'
     high_alert_icon = '🔴'
@@ -359,15 +741,15 @@ st.markdown(
     unsafe_allow_html=True
 )
 # Plant/HO breakdown for High Alert
-plant_high_count = high_alert_df[high_alert_df['Camera & NVR(1F or HO)'].astype(str).str.strip().str.upper() == '1F'].shape[0]
-ho_high_count = high_alert_df[high_alert_df['Camera & NVR(1F or HO)'].astype(str).str.strip().str.upper() == 'HO'].shape[0]
+plant_high_count = alert_summary.count(HIGH_ALERT, PLANT)
+ho_high_count = alert_summary.count(HIGH_ALERT, HO)
 st.markdown(f"""
 • 🏭 **Plant (1F)**: `{plant_high_count}` devices  
 • 🏢 **HO**: `{ho_high_count}` devices
 """)
 with st.expander("Show High Alert Device Details"):
     st.markdown("""
-    <div style='font-size:1.1rem; margin-bottom: 1em;'>Devices with PO Date more than 6 years ago or within 1 month of crossing 6 years. These are considered high risk for replacement or maintenance.</div>
+    <div style='font-size:1.1rem; margin-bottom: 1em;'>Devices matching the High Alert rules (by default: PO Date more than 6 years ago or within 1 month of crossing 6 years). These are considered high risk for replacement or maintenance.</div>
     """, unsafe_allow_html=True)
     if not high_alert_df.empty:
         high_cols = [c for c in ['Area', 'Types', 'Model', 'PO Date', 'Device Age (Years)', 'Initial Status'] if c in high_alert_df.columns]
@@ -384,26 +766,27 @@ with st.expander("Show High Alert Device Details"):
             },
             hide_index=True
         )
+        export_buttons(high_alert_df, "high_alert", "high_alert")
     else:
         st.success("No devices in High Alert category.")
 
 # Mild Alert Banner
-mild_alert_count = len(mild_alert_df)
+mild_alert_count = alert_summary.count(MILD_ALERT)
 st.markdown(
     f"<div style='font-size:2.0rem; font-weight:bold; margin-bottom: 0.5em; color:#fbc02d;'>"
     f"🟡 Mild Alert: {mild_alert_count}</div>",
     unsafe_allow_html=True
 )
 # Plant/HO breakdown for Mild Alert
-plant_mild_count = mild_alert_df[mild_alert_df['Camera & NVR(1F or HO)'].astype(str).str.strip().str.upper() == '1F'].shape[0]
-ho_mild_count = mild_alert_df[mild_alert_df['Camera & NVR(1F or HO)'].astype(str).str.strip().str.upper() == 'HO'].shape[0]
+plant_mild_count = alert_summary.count(MILD_ALERT, PLANT)
+ho_mild_count = alert_summary.count(MILD_ALERT, HO)
 st.markdown(f"""
 • 🏭 **Plant (1F)**: `{plant_mild_count}` devices  
 • 🏢 **HO**: `{ho_mild_count}` devices
 """)
 with st.expander("Show Mild Alert Device Details"):
     st.markdown("""
-    <div style='font-size:1.1rem; margin-bottom: 1em;'>Devices with PO Date with 6 months left for threshold of 6 years. These are within 6 months of the 6-year threshold.</div>
+    <div style='font-size:1.1rem; margin-bottom: 1em;'>Devices matching the Mild Alert rules (by default: within 6 months of the 6-year threshold).</div>
     """, unsafe_allow_html=True)
     if not mild_alert_df.empty:
         mild_cols = [c for c in ['Area', 'Types', 'Model', 'PO Date', 'Device Age (Years)', 'Initial Status'] if c in mild_alert_df.columns]
@@ -420,15 +803,13 @@ with st.expander("Show Mild Alert Device Details"):
             },
             hide_index=True
         )
+        export_buttons(mild_alert_df, "mild_alert", "mild_alert")
     else:
         st.success("No devices in Mild Alert category.")
 
-# --- Non-active device breakdown for entire inventory (accurate, case-sensitive) ---
-total_devices_all = len(df)
-stock_count_all = (df['Initial Status'].str.strip() == 'Discard').sum()
-repair_count_all = (df['Initial Status'].str.strip() == 'Repair').sum()
-stock_pct_all = (stock_count_all / total_devices_all) * 100 if total_devices_all > 0 else 0
-repair_pct_all = (repair_count_all / total_devices_all) * 100 if total_devices_all > 0 else 0
+# --- Non-active device breakdown for entire inventory ---
+stock_pct_all = alert_summary.percentages[DISCARD_ALERT]
+repair_pct_all = alert_summary.percentages[REPAIR_ALERT]
 st.markdown(
     f"<div style='font-size:1.6rem; margin-top: 8px; margin-bottom: 8px;'>"
     f"<b>Non-active devices in entire inventory:</b> "
@@ -439,16 +820,45 @@ st.markdown(
 
 # Add extra space after the firmware/repair/down/non-active group
 st.markdown("<br><br><br>", unsafe_allow_html=True)
+profile.lap('age_alerts', rows=high_alert_count + mild_alert_count)
+
+GRID_PAGE_SIZES = [100, 250, 500, 1000]
+
+# --- Device Search ---
+search_query = st.text_input(
+    "🔍 Search devices",
+    placeholder="Model, IP address, area, location or device type",
+    help="Every word must match; prefix matches are listed first."
+)
+if search_query.strip():
+    matches = get_search_index(data_version, df).search(search_query)
+    if len(matches):
+        shown = matches[:SEARCH_RESULT_LIMIT]
+        st.caption(
+            f"{len(matches)} matching devices"
+            + (f" (showing the first {SEARCH_RESULT_LIMIT})" if len(matches) > SEARCH_RESULT_LIMIT else "")
+        )
+        st.dataframe(
+            df.iloc[shown][display_columns(df)],
+            column_config={
+                "Camera name": "Location",
+                "Types": "Device Type",
+                "Camera or NVR IP": "IP Address",
+                "Initial Status": "Status",
+                "Manufacturing Date": "Manufactured On",
+                "AMC, Warranty,Not in AMC and warranty": "Coverage Status"
+            },
+            hide_index=True
+        )
+    else:
+        st.info(f"No devices match '{search_query.strip()}'.")
+    profile.lap('search', rows=len(matches))
 
 # --- Location Filter Group ---
 st.markdown("<div style='font-size:2.0rem; font-weight:bold; margin-bottom: 0.5em;'>Location Filter</div>", unsafe_allow_html=True)
-# Define location mapping
-location_mapping = {
-    'Plant': ['1F'],
-    'HO': ['HO'],
-}
+slice_index = get_slice_index(data_version, today, df)
 # Get main locations for radio
-main_locations = list(location_mapping.keys())
+main_locations = list(LOCATION_MAPPING.keys())
 # Create main location filter as radio (not dropdown)
 selected_main_location = st.radio(
     "Select Main Location",
@@ -457,43 +867,74 @@ selected_main_location = st.radio(
     horizontal=True
 )
 
-# Filter data for the selected main location
-sub_locations = location_mapping[selected_main_location]
-filtered_df = df[df['Camera & NVR(1F or HO)'].isin(sub_locations)]
-
 # If Plant is selected, add area location filter (use 'Area' column instead of 'Camera name')
+selected_area_location = None
 if selected_main_location == 'Plant':
-    area_locations = sorted(filtered_df['Area'].unique())
+    area_locations = slice_index.areas[selected_main_location]
     selected_area_location = st.selectbox(
         "Select Area",
         options=area_locations,
         index=0
     )
-    filtered_df = filtered_df[filtered_df['Area'] == selected_area_location]
+
+# Filter data for the selected location/area: a positional take from the per-version index
+filtered_df = slice_index.take(df, selected_main_location, selected_area_location)
+slice_kpis = slice_index.kpis[(selected_main_location, selected_area_location)]
+profile.lap('filter', rows=len(filtered_df))
+
+live_probe = st.toggle(
+    "📡 Live reachability check",
+    value=False,
+    help="Probe each device's IP (RTSP/HTTP and its listed port) and show the result in the grid and KPIs."
+)
+reachable = None
+probe_generation = None
+if live_probe:
+    reachable = device_reachability(filtered_df)
+    probe_generation = get_prober().generation
+    profile.lap('reachability', rows=len(filtered_df))
+
+# Uploaded files never change underneath the page, so only the Google Sheet and live probes are watched
+if data_source == "Google Sheet" or live_probe:
+    if hasattr(st, 'fragment'):
+        watch_for_data_changes(data_version, probe_generation)
+    else:
+        # Older Streamlit: full reruns every 5 s, sections above are still memoized per version
+        st_autorefresh(interval=AUTOREFRESH_SECONDS * 1000, limit=None, key="autorefresh2s")
+    profile.lap('autorefresh')
 
 if not filtered_df.empty:
     # --- Quick Stats Group ---
     st.markdown("### Quick Stats")
     
-    # Calculate KPIs
-    total_devices = len(filtered_df)
-    active_devices = len(filtered_df[filtered_df['Initial Status'] == 'Live'])
-    active_percentage = (active_devices / total_devices * 100) if total_devices > 0 else 0
+    # KPIs are precomputed per (location, area) slice
+    total_devices = slice_kpis['total']
+    active_devices = slice_kpis['active']
+    active_percentage = slice_kpis['active_pct']
     
     # 2. Warranty/AMC Coverage
-    covered_devices = len(filtered_df[
-        filtered_df['AMC, Warranty,Not in AMC and warranty'].str.contains('Warranty|AMC', case=False, na=False)
-    ])
-    coverage_percentage = (covered_devices / total_devices * 100) if total_devices > 0 else 0
+    covered_devices = slice_kpis['covered']
+    coverage_percentage = slice_kpis['coverage_pct']
     
    
     
     # 4. Most Popular Location
-    top_location = filtered_df['Camera & NVR(1F or HO)'].value_counts().idxmax()
-    location_count = filtered_df['Camera & NVR(1F or HO)'].value_counts().max()
+    top_location = slice_kpis['top_location']
+    location_count = slice_kpis['top_location_count']
     
     # Display KPIs in columns
-    kpi1, kpi2, kpi3 = st.columns(3)
+    if reachable is not None:
+        kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+        probed = reachable.notna()
+        reachable_devices = int((reachable[probed] == True).sum())
+        with kpi4:
+            st.metric(
+                "Reachable Now",
+                f"{reachable_devices / probed.sum() * 100:.1f}%" if probed.any() else "Checking...",
+                f"{reachable_devices} of {int(probed.sum())} probed"
+            )
+    else:
+        kpi1, kpi2, kpi3 = st.columns(3)
     
     with kpi1:
         st.metric(
@@ -517,9 +958,8 @@ if not filtered_df.empty:
         )
     # --- Department-wise Device Count Summary ---
     if 'Camera & NVR(1F or HO)' in df.columns:
-        dept_counts = df['Camera & NVR(1F or HO)'].astype(str).str.strip().str.upper().value_counts()
-        plant_office_count = dept_counts.get('1F', 0)
-        ho_count = dept_counts.get('HO', 0)
+        plant_office_count = slice_index.kpis[('Plant', None)]['total']
+        ho_count = slice_index.kpis[('HO', None)]['total']
         st.markdown(f"""
         <div style='font-size:1.5rem; margin-top: 10px;'>
             <b>🗂 Department-wise Device Count</b><br>
@@ -531,14 +971,9 @@ if not filtered_df.empty:
         st.warning("'Camera & NVR(1F or HO)' column not found for department-wise count.")
 
     # --- Device status breakdown for filtered location (accurate, sums to 100%) ---
-    total_devices_filtered = len(filtered_df)
-    stock_count_filtered = (filtered_df['Initial Status'].str.strip() == 'Discard').sum()
-    repair_count_filtered = (filtered_df['Initial Status'].str.strip() == 'Repair').sum()
-    live_count_filtered = (filtered_df['Initial Status'].str.strip() == 'Live').sum()
-
-    stock_pct_filtered = (stock_count_filtered / total_devices_filtered) * 100 if total_devices_filtered > 0 else 0
-    repair_pct_filtered = (repair_count_filtered / total_devices_filtered) * 100 if total_devices_filtered > 0 else 0
-    live_pct_filtered = (live_count_filtered / total_devices_filtered) * 100 if total_devices_filtered > 0 else 0
+    stock_pct_filtered = slice_kpis['discard_pct']
+    repair_pct_filtered = slice_kpis['repair_pct']
+    live_pct_filtered = slice_kpis['active_pct']
 
     st.markdown(
         f"<div style='font-size:1.1rem; margin-top: 8px; margin-bottom: 8px;'>"
@@ -550,133 +985,115 @@ if not filtered_df.empty:
     )
     # Add extra space before Select View Mode
     st.markdown("<br><br><br>", unsafe_allow_html=True)
+    profile.lap('kpis', rows=total_devices)
 
     # Toggle between Grid and Table View
     view_mode = st.radio("Select View Mode", ["Grid View", "Table View"], horizontal=True)
     
     st.subheader(f"Devices at {selected_main_location}")
+    export_buttons(
+        filtered_df, f"devices_{selected_main_location}_{selected_area_location or 'all'}", "view"
+    )
     
     if view_mode == "Grid View":
-        # Display devices in a 5-column grid
+        # Display devices in a 5-column grid, one page (single HTML element) at a time
         num_devices = len(filtered_df)
-        num_cols = 5
-        num_rows = math.ceil(num_devices / num_cols)
-        
-        for row in range(num_rows):
-            cols = st.columns(num_cols)
-            for col in range(num_cols):
-                idx = row * num_cols + col
-                if idx < num_devices:
-                    device = filtered_df.iloc[idx]
-                    with cols[col]:
-                        device_html = create_device_box(device)
-                        st.markdown(device_html, unsafe_allow_html=True)
-    else:  # Table View
-        st.dataframe(
-            filtered_df,
-            column_config={
-                "Camera name": "Location",
-                "Types": "Device Type",
-                "Camera or NVR IP": "IP Address",
-                "Initial Status": "Status",
-                "Manufacturing Date": "Manufactured On",
-                "AMC, Warranty,Not in AMC and warranty": "Coverage Status"
-            },
-            hide_index=True
+        page_col, size_col = st.columns(2)
+        with size_col:
+            page_size = st.selectbox("Devices per page", GRID_PAGE_SIZES, index=1)
+        num_pages = max(1, math.ceil(num_devices / page_size))
+        with page_col:
+            page = st.selectbox(
+                "Page", options=list(range(1, num_pages + 1)),
+                # A new slice or page size starts again at page 1
+                key=f"grid_page_{selected_main_location}_{selected_area_location}_{page_size}"
+            )
+        start = (page - 1) * page_size
+        end = min(start + page_size, num_devices)
+        st.caption(f"Showing devices {start + 1}–{end} of {num_devices}")
+        grid_html = render_device_grid_page(
+            data_version, selected_main_location, selected_area_location, page, page_size,
+            probe_generation, filtered_df.iloc[start:end],
+            None if reachable is None else reachable.iloc[start:end]
         )
+        st.markdown(grid_html, unsafe_allow_html=True)
+        profile.lap('grid', rows=end - start)
+    else:  # Table View
+        if data_source == "Google Sheet" and st.toggle("✏️ Edit status / firmware", key="edit_devices"):
+            # Any status used anywhere in the inventory can be picked, not only the ones in this slice
+            statuses = sorted({str(v).strip() for v in df[STATUS_COLUMN].dropna().unique()} - {''})
+            edit_devices(filtered_df, data_version, statuses)
+        else:
+            st.dataframe(
+                filtered_df[display_columns(filtered_df)],
+                column_config={
+                    "Camera name": "Location",
+                    "Types": "Device Type",
+                    "Camera or NVR IP": "IP Address",
+                    "Initial Status": "Status",
+                    "Manufacturing Date": "Manufactured On",
+                    "AMC, Warranty,Not in AMC and warranty": "Coverage Status"
+                },
+                hide_index=True
+            )
+        profile.lap('table', rows=len(filtered_df))
     
     # Add a little space before Analytics
     st.markdown("<br><br><br>", unsafe_allow_html=True)
     # --- Analytics ---
     st.subheader("\U0001F4CA Analytics")
+    analytics = build_analytics_figures(
+        data_version, today, selected_main_location, selected_area_location, filtered_df
+    )
     
     col1, col2 = st.columns(2)
     
     with col1:
-        status_counts = filtered_df['Initial Status'].value_counts()
-        if not status_counts.empty:
-            fig_status = px.pie(
-                values=status_counts.values,
-                names=status_counts.index,
-                title=f"Device Status Distribution in {selected_main_location}",
-                color_discrete_sequence=px.colors.qualitative.Pastel2  # Second color scheme
-            )
-            st.plotly_chart(fig_status, use_container_width=True)
+        if 'status' in analytics:
+            st.plotly_chart(analytics['status'], use_container_width=True)
     
     with col2:
-        types_counts = filtered_df['Types'].value_counts()
-        if not types_counts.empty:
-            fig_types = px.pie(
-                values=types_counts.values,
-                names=types_counts.index,
-                title=f"Device Types Distribution in {selected_main_location}",
-                color_discrete_sequence=px.colors.qualitative.Dark24  # Third color scheme
-            )
-            st.plotly_chart(fig_types, use_container_width=True)
+        if 'types' in analytics:
+            st.plotly_chart(analytics['types'], use_container_width=True)
     
 
     
     # Warranty Coverage Chart
     with st.expander("🛡️ Warranty Status Summary"):
-        # Clean and count warranty statuses
-        warranty_counts = filtered_df['AMC, Warranty,Not in AMC and warranty'].value_counts()
-        
-        fig_warranty = px.pie(
-            values=warranty_counts.values,
-            names=warranty_counts.index,
-            title="Warranty & AMC Coverage"
-        )
-        
         # Add summary metrics
         wcol1, wcol2, wcol3 = st.columns(3)
         with wcol1:
-            st.metric("Under AMC", len(filtered_df[filtered_df['AMC, Warranty,Not in AMC and warranty'].str.contains('AMC', case=False, na=False)]))
+            st.metric("Under AMC", analytics['under_amc'])
         with wcol2:
-            st.metric("Under Warranty", len(filtered_df[filtered_df['AMC, Warranty,Not in AMC and warranty'].str.contains('Warranty', case=False, na=False)]))
+            st.metric("Under Warranty", analytics['under_warranty'])
         with wcol3:
-            st.metric("No Coverage", len(filtered_df[filtered_df['AMC, Warranty,Not in AMC and warranty'].str.contains('Not in', case=False, na=False)]))
+            st.metric("No Coverage", analytics['no_coverage'])
         
-        st.plotly_chart(fig_warranty, use_container_width=True)
+        st.plotly_chart(analytics['warranty'], use_container_width=True)
+    profile.lap('analytics', rows=len(filtered_df))
     
 
     
     # Device Age Report Section
     with st.expander("\U0001F4C5 Device Age Report"):
         try:
-            # Convert PO Date to datetime and calculate age
-            if 'PO Date' in filtered_df.columns:
-                filtered_df['PO Date'] = pd.to_datetime(filtered_df['PO Date'], errors='coerce', dayfirst=True)
-                filtered_df['Device Age (Years)'] = (pd.Timestamp.now() - filtered_df['PO Date']).dt.total_seconds() / (365.25 * 24 * 60 * 60)
-            else:
+            # PO Date is parsed once per data version into PO Datetime / Device Age (Years)
+            if 'PO Date' not in filtered_df.columns:
                 st.warning("'PO Date' column not found. Age calculation will be skipped.")
-                filtered_df['Device Age (Years)'] = None
-            # Calculate average age by device type
-            avg_age_by_type = filtered_df.groupby('Types')['Device Age (Years)'].mean().round(1)
-            # Create bar chart for average device age
-            fig_age = go.Figure(data=[
-                go.Bar(
-                    x=list(avg_age_by_type.index),
-                    y=list(avg_age_by_type.values),
-                    text=[f"{age:.1f} years" for age in avg_age_by_type.values],
-                    textposition='auto',
-                )
-            ])
-            fig_age.update_layout(
-                title="Average Device Age by Type",
-                xaxis_title="Device Type",
-                yaxis_title="Average Age (Years)",
-                showlegend=False
-            )
-            st.plotly_chart(fig_age, use_container_width=True)
+            # Average device age by type (built with the other cached analytics figures)
+            st.plotly_chart(analytics['age'], use_container_width=True)
             # Highlight old devices (> 5 years)
-            AGE_THRESHOLD = 5  # years
-            old_devices = filtered_df[filtered_df['Device Age (Years)'] > AGE_THRESHOLD].copy()
+            AGE_THRESHOLD = alert_rules.aged_device_years  # years
+            old_devices = filtered_df[filtered_df[DEVICE_AGE_COLUMN] > AGE_THRESHOLD]
             if not old_devices.empty:
-                st.subheader(f"⚠️ Devices Older Than {AGE_THRESHOLD} Years")
+                st.subheader(f"⚠️ Devices Older Than {AGE_THRESHOLD:g} Years")
                 st.markdown(f"**Total aged devices: {len(old_devices)}**")
+                export_buttons(old_devices, f"aged_over_{AGE_THRESHOLD:g}_years", "aged")
                 # Format the age and date columns
-                old_devices['Device Age (Years)'] = old_devices['Device Age (Years)'].round(1)
-                old_devices['PO Date'] = old_devices['PO Date'].dt.strftime('%Y-%m-%d')
+                old_devices = old_devices.assign(**{
+                    DEVICE_AGE_COLUMN: old_devices[DEVICE_AGE_COLUMN].round(1),
+                    'PO Date': old_devices[PO_DATETIME].dt.strftime('%Y-%m-%d'),
+                })
                 # Display old devices
                 st.dataframe(
                     old_devices[[
@@ -698,11 +1115,7 @@ if not filtered_df.empty:
                 )
                 # Age distribution summary
                 st.subheader("Age Distribution Summary")
-                age_ranges = [
-                    (0, 2, "0-2 years"),
-                    (2, 5, "2-5 years"),
-                    (5, float('inf'), "5+ years")
-                ]
+                age_ranges = alert_rules.age_buckets  # (min years, max years, label)
                 age_distribution = []
                 for start, end, label in age_ranges:
                     count = len(filtered_df[
@@ -717,41 +1130,105 @@ if not filtered_df.empty:
                     })
                 st.table(pd.DataFrame(age_distribution))
             else:
-                st.success(f"No devices older than {AGE_THRESHOLD} years found.")
+                st.success(f"No devices older than {AGE_THRESHOLD:g} years found.")
         except Exception as e:
             st.warning("Could not generate age report. Please ensure the 'PO D~ate' column exists and contains valid dates.")
+    profile.lap('age_report', rows=len(filtered_df))
+
+    # Trends Section
+    # Read from the daily rollups only (a few hundred rows per day), never from old inventories
+    with st.expander("📈 Trends"):
+        trend_range = st.selectbox("History", options=list(TREND_RANGES), index=0, key="trend_range")
+        trend_days = TREND_RANGES[trend_range]
+        since = today - pd.Timedelta(days=trend_days) if trend_days else None
+        trend_store = get_trend_store()
+        trend_locations = LOCATION_MAPPING[selected_main_location]
+        status_history = pd.DataFrame()
+        recorded_days = trend_store.days(change_source)
+        if recorded_days >= 2:
+            if selected_area_location is None:
+                status_history = trend_store.history(change_source, 'status', by='status',
+                                                     locations=trend_locations, since=since)
+                place = selected_main_location
+            else:
+                # Area drill-down reads the full status x location x area x type rollup
+                status_history = trend_store.history(change_source, 'devices', by='status',
+                                                     locations=trend_locations,
+                                                     area=str(selected_area_location).strip(), since=since)
+                place = f"{selected_main_location} / {selected_area_location}"
+        else:
+            st.info("Trends appear once the dashboard (or `inventory_cli.py --trends`) has recorded "
+                    "at least two days of history for this data source.")
+        if status_history.empty:
+            if recorded_days >= 2:
+                st.info("No trend history for this selection in the chosen range.")
+        else:
+            st.plotly_chart(px.line(
+                status_history, labels={'value': 'Devices', 'day': 'Day', 'variable': 'Status'},
+                title=f"Devices by Status in {place}"
+            ), use_container_width=True)
+            if REPAIR in status_history.columns:
+                st.metric("Repair backlog", int(status_history[REPAIR].iloc[-1]),
+                          delta=int(status_history[REPAIR].iloc[-1] - status_history[REPAIR].iloc[0]),
+                          delta_color="inverse")
+            tcol1, tcol2 = st.columns(2)
+            with tcol1:
+                alert_history = trend_store.history(change_source, 'alert', by='bucket',
+                                                    locations=trend_locations, since=since)
+                if not alert_history.empty:
+                    st.plotly_chart(px.line(
+                        alert_history, labels={'value': 'Devices', 'day': 'Day', 'variable': 'Alert'},
+                        title=f"Alerts in {selected_main_location}"
+                    ), use_container_width=True)
+            with tcol2:
+                bucket_history = trend_store.history(change_source, 'age_bucket', by='bucket',
+                                                     locations=trend_locations, since=since)
+                if not bucket_history.empty:
+                    labels = [label for _, _, label in alert_rules.age_buckets if label in bucket_history.columns]
+                    bucket_history = bucket_history[labels + [c for c in bucket_history.columns if c not in labels]]
+                    st.plotly_chart(px.area(
+                        bucket_history, labels={'value': 'Devices', 'day': 'Day', 'variable': 'Age'},
+                        title=f"Age Buckets in {selected_main_location}"
+                    ), use_container_width=True)
+            age_sum = trend_store.history(change_source, 'age_years_sum', locations=trend_locations, since=since)
+            dated = trend_store.history(change_source, 'dated_devices', locations=trend_locations, since=since)
+            if not dated.empty:
+                mean_age = (age_sum['total'] / dated['total']).round(2)
+                fig_mean_age = go.Figure(data=[go.Scatter(x=mean_age.index, y=mean_age.values, mode='lines')])
+                fig_mean_age.update_layout(
+                    title=f"Average Device Age in {selected_main_location}",
+                    xaxis_title="Day",
+                    yaxis_title="Average Age (Years)",
+                    showlegend=False
+                )
+                st.plotly_chart(fig_mean_age, use_container_width=True)
+    profile.lap('trends')
     
     # Recent Changes Log Section
+    # Events come from diffing each new data version with the previous one, not from 'Last Updated'
     with st.expander("🔄 Recent Changes Log (Last 7 Days)"):
         try:
-            # Convert Last Updated to datetime
-            df['Last Updated'] = pd.to_datetime(df['Last Updated'])
-            
-            # Calculate the date threshold (7 days ago)
-            seven_days_ago = pd.Timestamp.now() - pd.Timedelta(days=7)
+            seven_days_ago = time.time() - 7 * 24 * 60 * 60
+            recent_events = get_change_log().events_since(seven_days_ago, source=change_source)
             
-            # Filter recent updates
-            recent_updates = df[df['Last Updated'] >= seven_days_ago].copy()
-            
-            if not recent_updates.empty:
-                # Sort by Last Updated (most recent first)
-                recent_updates = recent_updates.sort_values('Last Updated', ascending=False)
+            if not recent_events.empty:
+                recent_events = recent_events.assign(ts=[
+                    time.strftime('%Y-%m-%d %H:%M', time.localtime(ts)) for ts in recent_events['ts']
+                ])
                 
                 # New Devices Added
                 st.subheader("New Devices Added")
-                new_devices = recent_updates[['Camera name', 'Types', 'Model', 'Initial Status', 'Last Updated']]
+                new_devices = recent_events[recent_events['event'] == 'added']
                 
                 if not new_devices.empty:
-                    # Format the dataframe for display
-                    new_devices['Last Updated'] = new_devices['Last Updated'].dt.strftime('%Y-%m-%d %H:%M')
                     st.dataframe(
-                        new_devices,
+                        new_devices[['name', 'types', 'model', 'new', 'ts']],
                         column_config={
-                            "Camera name": "Location",
-                            "Types": "Device Type",
-                            "Model": "Model",
-                            "Initial Status": "Status",
-                            "Last Updated": "Added On"
+                            "name": "Location",
+                            "types": "Device Type",
+                            "model": "Model",
+                            "new": "Status",
+                            "ts": "Added On"
                         },
                         hide_index=True
                     )
@@ -760,29 +1237,72 @@ if not filtered_df.empty:
                 
                 # Status Changes
                 st.subheader("Status Changes")
-                status_changes = recent_updates[
-                    (recent_updates['Initial Status'] != "Live")
-                ][['Camera name', 'Types', 'Initial Status', 'Last Updated']]
+                status_changes = recent_events[recent_events['event'] == 'status']
                 
                 if not status_changes.empty:
-                    # Format the dataframe for display
-                    status_changes['Last Updated'] = status_changes['Last Updated'].dt.strftime('%Y-%m-%d %H:%M')
                     st.dataframe(
-                        status_changes,
+                        status_changes[['name', 'types', 'old', 'new', 'ts']],
                         column_config={
-                            "Camera name": "Location",
-                            "Types": "Device Type",
-                            "Initial Status": "Current Status",
-                            "Last Updated": "Changed On"
+                            "name": "Location",
+                            "types": "Device Type",
+                            "old": "Previous Status",
+                            "new": "Current Status",
+                            "ts": "Changed On"
                         },
                         hide_index=True
                     )
                 else:
                     st.markdown("*No status changes in the last 7 days.*")
+                
+                # Firmware changes and removed devices
+                other_changes = recent_events[recent_events['event'].isin(['firmware', 'removed'])]
+                if not other_changes.empty:
+                    st.subheader("Firmware Changes and Removed Devices")
+                    st.dataframe(
+                        other_changes[['name', 'types', 'model', 'event', 'old', 'new', 'ts']],
+                        column_config={
+                            "name": "Location",
+                            "types": "Device Type",
+                            "model": "Model",
+                            "event": "Change",
+                            "old": "Before",
+                            "new": "After",
+                            "ts": "Changed On"
+                        },
+                        hide_index=True
+                    )
             else:
-                st.markdown("*No updates found in the last 7 days.*")
+                st.markdown("*No changes recorded in the last 7 days.*")
             
         except Exception as e:
-            st.warning("Could not load recent changes. Please ensure the 'Last Updated' column exists and contains valid dates.")
+            st.warning(f"Could not load recent changes: {e}")
+    profile.lap('recent_changes', rows=len(df))
 else:
-    st.warning("No devices found for the selected location.") 
\ No newline at end of file
+    st.warning("No devices found for the selected location.") 
+profile.finish(rows=len(df))
+
+# --- Admin: section timings, only rendered while profiling is on ---
+if profiling_enabled:
+    profiler = get_profiler()
+    with st.expander("⏱️ Performance Profile (admin)"):
+        st.caption(
+            f"Last {profiler.window} samples per section from {profiler.reruns} profiled reruns "
+            f"(all sessions). Each section is timed from the end of the previous one."
+        )
+        profile_stats = pd.DataFrame.from_dict(profiler.summary(), orient='index')
+        st.dataframe(profile_stats.drop(columns='last_at'), use_container_width=True)
+        st.caption(
+            f"Shared inventory frame: {bytes_per_row(df):,.0f} bytes/row compacted vs "
+            f"{bytes_per_row(raw_df):,.0f} bytes/row as loaded ({len(df):,} rows)"
+        )
+        prometheus_text = profiler.to_prometheus()
+        json_text = profiler.to_json()
+        pcol1, pcol2, pcol3 = st.columns(3)
+        with pcol1:
+            st.download_button("Download JSON", json_text, "dashboard_profile.json", "application/json")
+        with pcol2:
+            st.download_button("Download Prometheus text", prometheus_text, "dashboard_profile.prom", "text/plain")
+        with pcol3:
+            if st.button("Reset timings"):
+                profiler.clear()
+        st.code(prometheus_text, language='text')
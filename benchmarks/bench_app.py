@@ -0,0 +1,213 @@
+"""Rerun latency and memory benchmark for app.py, driven by Streamlit's AppTest.
+
+Runs entirely offline against a synthetic inventory served by FakeClient:
+
+    python -m benchmarks.bench_app --sizes 1000 10000 100000 --sessions 1 4 --reruns 10
+
+For every size it reports two scenarios:
+
+* ``cold``  - caches and snapshots are cleared before each rerun, so every rerun
+  fetches, normalizes and renders from scratch (the hot path after a data change).
+* ``warm``  - N concurrent sessions rerun with caches in place, like wall
+  displays ticking on autorefresh.
+
+Latency percentiles come from runs without tracing; peak memory comes from a
+separate traced pass (tracemalloc sees numpy/pandas buffers) plus the process
+max RSS.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, 'app.py')
+
+
+def install_fake_backend(values, latency=0.0):
+    """ Point the app's Sheets client at an in-memory copy of ``values`` """
+    import sheet_sync
+    from benchmarks.fake_sheets import FakeClient
+
+    client = FakeClient({'benchmark': [values]}, latency=latency)
+    sheet_sync.create_client = lambda key_file: client
+    return client
+
+
+# Pollers and probers the app started; clearing the caches alone would leave their threads running
+_workers = []
+STOP_TIMEOUT = 30
+
+
+def track_background_workers():
+    """ Record every SheetPoller / ReachabilityProber the app starts, so they can be stopped """
+    from reachability import ReachabilityProber
+    from sheet_poller import SheetPoller
+
+    for cls in (SheetPoller, ReachabilityProber):
+        if hasattr(cls.start, 'tracked'):
+            continue
+        def start(self, original=cls.start):
+            _workers.append(self)
+            return original(self)
+        start.tracked = True
+        cls.start = start
+
+
+def stop_background_workers():
+    while _workers:
+        worker = _workers.pop()
+        worker.stop(timeout=STOP_TIMEOUT)
+        close = getattr(getattr(worker, 'sync', None), 'close', None)
+        if close is not None:
+            close()
+
+
+def clear_app_caches():
+    import streamlit as st
+    import snapshot_store
+
+    stop_background_workers()
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    shutil.rmtree(snapshot_store.CACHE_DIR, ignore_errors=True)
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    values = np.array(samples) * 1000
+    return {
+        'runs': len(samples),
+        'p50_ms': round(float(np.percentile(values, 50)), 1),
+        'p90_ms': round(float(np.percentile(values, 90)), 1),
+        'p99_ms': round(float(np.percentile(values, 99)), 1),
+        'max_ms': round(float(values.max()), 1),
+    }
+
+
+def _new_session(timeout):
+    from streamlit.testing.v1 import AppTest
+
+    return AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+
+def _timed_run(at, samples, errors):
+    started = time.perf_counter()
+    at.run()
+    samples.append(time.perf_counter() - started)
+    if at.exception:
+        errors.append(at.exception[0].value)
+
+
+def run_cold(reruns, timeout):
+    samples, errors = [], []
+    at = _new_session(timeout)
+    for _ in range(reruns):
+        clear_app_caches()
+        _timed_run(at, samples, errors)
+    return samples, errors
+
+
+def run_warm(sessions, reruns, timeout):
+    samples, errors = [], []
+    apps = [_new_session(timeout) for _ in range(sessions)]
+    for at in apps:
+        at.run()  # first render fills the shared caches
+
+    def tick(at):
+        for _ in range(reruns):
+            _timed_run(at, samples, errors)
+
+    threads = [threading.Thread(target=tick, args=(at,)) for at in apps]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, errors
+
+
+def traced_peak_mb(fn, *args):
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_size(n_rows, session_counts, reruns, latency, timeout, seed):
+    from benchmarks.synthetic import generate_inventory, to_sheet_values
+
+    values = to_sheet_values(generate_inventory(n_rows, seed=seed))
+    client = install_fake_backend(values, latency=latency)
+    result = {'rows': n_rows}
+
+    samples, errors = run_cold(reruns, timeout)
+    result['cold'] = dict(percentiles(samples), errors=errors[:3])
+    for sessions in session_counts:
+        clear_app_caches()
+        samples, errors = run_warm(sessions, reruns, timeout)
+        result[f'warm_{sessions}_sessions'] = dict(percentiles(samples), errors=errors[:3])
+
+    result['peak_traced_mb_cold'] = traced_peak_mb(run_cold, 1, timeout)
+    result['peak_traced_mb_warm'] = traced_peak_mb(run_warm, max(session_counts), 1, timeout)
+    result['max_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    result['api_calls'] = dict(client.calls)
+    clear_app_caches()  # the next size starts with no pollers left over
+    return result
+
+
+def print_result(result):
+    print(f"\n== {result['rows']:,} rows ==")
+    for name, stats in result.items():
+        if isinstance(stats, dict) and 'p50_ms' in stats:
+            print(f"  {name:<20} p50 {stats['p50_ms']:>9.1f} ms  p90 {stats['p90_ms']:>9.1f} ms  "
+                  f"p99 {stats['p99_ms']:>9.1f} ms  max {stats['max_ms']:>9.1f} ms  "
+                  f"({stats['runs']} runs, {len(stats['errors'])} errors)")
+    print(f"  peak traced memory   cold {result['peak_traced_mb_cold']} MB, "
+          f"warm {result['peak_traced_mb_warm']} MB; max RSS {result['max_rss_mb']} MB")
+    print(f"  API calls            {result['api_calls']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 4],
+                        help='concurrent autorefresh sessions for the warm scenario')
+    parser.add_argument('--reruns', type=int, default=10, help='timed reruns per session')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='simulated seconds per Sheets API call')
+    parser.add_argument('--timeout', type=float, default=600, help='per-rerun AppTest timeout')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args(argv)
+
+    # The app resolves styles.css relative to the working directory
+    os.chdir(REPO_ROOT)
+    os.environ['INVENTORY_CACHE_DIR'] = tempfile.mkdtemp(prefix='inventory-bench-')
+    import snapshot_store
+    snapshot_store.CACHE_DIR = os.environ['INVENTORY_CACHE_DIR']
+    track_background_workers()
+
+    results = []
+    for n_rows in args.sizes:
+        result = benchmark_size(n_rows, args.sessions, args.reruns, args.latency,
+                                args.timeout, args.seed)
+        print_result(result)
+        results.append(result)
+    shutil.rmtree(snapshot_store.CACHE_DIR, ignore_errors=True)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
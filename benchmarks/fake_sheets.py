@@ -0,0 +1,168 @@
+"""In-memory stand-in for the parts of gspread the dashboard uses.
+
+Lets the app, the sync and the benchmarks run with no network access:
+
+    client = FakeClient({SHEET_URL: [values_for_tab_0, values_for_tab_1]})
+    sheet_sync.create_client = lambda key_file: client
+
+``latency`` adds a sleep to every API call to mimic round-trips, and
+``calls`` counts API calls by name. ``fail_writes(n)`` makes the next ``n``
+writes fail with a quota error, like the real API under load.
+"""
+import json
+import threading
+import time
+from collections import Counter
+
+import requests
+from gspread.exceptions import APIError
+from gspread.utils import a1_range_to_grid_range, to_records
+
+
+def api_error(code=429, message='Quota exceeded for quota metric', retry_after=None):
+    """ An APIError as gspread raises it for an HTTP error response """
+    response = requests.Response()
+    response.status_code = code
+    if retry_after is not None:
+        response.headers['Retry-After'] = str(retry_after)
+    response._content = json.dumps({'error': {'code': code, 'message': message, 'status': 'RESOURCE_EXHAUSTED'}}).encode()
+    return APIError(response)
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, values, title, index):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.index = index
+        self.id = index
+        self._values = [list(row) for row in values]
+
+    @property
+    def row_count(self):
+        return len(self._values)
+
+    def get(self, *args, **kwargs):
+        self.spreadsheet.client._call('values.get')
+        return list(self._values) if self._values else [[]]
+
+    def get_all_values(self, *args, **kwargs):
+        return self.get()
+
+    def get_all_records(self, *args, **kwargs):
+        values = self.get()
+        return to_records(values[0], values[1:]) if values != [[]] else []
+
+    def batch_update(self, data, raw=True, value_input_option=None, **kwargs):
+        """ Write ``[{'range': 'A1 range', 'values': [[...]]}]`` in one call, like Worksheet.batch_update """
+        self.spreadsheet.client._call('values.batchUpdate')
+        self.spreadsheet.client._write_allowed()
+        with self.spreadsheet.client._lock:
+            for update in data:
+                grid = a1_range_to_grid_range(update['range'])
+                for r, row in enumerate(update['values']):
+                    cells = self._values[grid['startRowIndex'] + r]
+                    for c, value in enumerate(row):
+                        column = grid['startColumnIndex'] + c
+                        cells.extend([''] * (column + 1 - len(cells)))
+                        cells[column] = str(value)
+            self.spreadsheet.touch()
+        return {'totalUpdatedCells': sum(len(row) for update in data for row in update['values'])}
+
+    def set_rows(self, rows):
+        """ Simulate an edit in the Sheets UI: ``rows`` maps 0-based data row -> cell list """
+        with self.spreadsheet.client._lock:
+            for position, row in rows.items():
+                while len(self._values) <= position + 1:
+                    self._values.append([''] * len(self._values[0]))
+                self._values[position + 1] = list(row)
+            self.spreadsheet.touch()
+
+
+    def insert_rows(self, position, rows):
+        """ Simulate inserting ``rows`` before 0-based data row ``position`` in the Sheets UI """
+        with self.spreadsheet.client._lock:
+            self._values[position + 1:position + 1] = [list(row) for row in rows]
+            self.spreadsheet.touch()
+
+    def delete_rows(self, positions):
+        """ Simulate deleting 0-based data rows ``positions`` in the Sheets UI """
+        with self.spreadsheet.client._lock:
+            for position in sorted(positions, reverse=True):
+                del self._values[position + 1]
+            self.spreadsheet.touch()
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, url, tabs):
+        self.client = client
+        self.url = url
+        self.id = url.rstrip('/').rsplit('/', 1)[-1]
+        self.revision = 1
+        self._worksheets = [
+            FakeWorksheet(self, values, f'Sheet{i + 1}', i) for i, values in enumerate(tabs)
+        ]
+
+    def touch(self):
+        self.revision += 1
+
+    def get_lastUpdateTime(self):
+        self.client._call('drive.files.get')
+        return f'revision-{self.revision}'
+
+    def get_worksheet(self, index):
+        self.client._call('spreadsheets.get')
+        return self._worksheets[index] if index < len(self._worksheets) else None
+
+    def worksheet(self, title):
+        self.client._call('spreadsheets.get')
+        for ws in self._worksheets:
+            if ws.title == title:
+                return ws
+        raise KeyError(title)
+
+    def worksheets(self):
+        self.client._call('spreadsheets.get')
+        return list(self._worksheets)
+
+
+class FakeClient:
+    def __init__(self, sheets, latency=0.0):
+        """ ``sheets`` maps spreadsheet URL -> list of tab values (header row first) """
+        self.latency = latency
+        self.calls = Counter()
+        self._failing_writes = 0
+        self._lock = threading.Lock()
+        self._spreadsheets = {url: FakeSpreadsheet(self, url, tabs) for url, tabs in sheets.items()}
+
+    def _call(self, name):
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def fail_writes(self, count, code=429, retry_after=None):
+        """ Make the next ``count`` write calls raise an APIError with ``code`` (and a Retry-After header) """
+        self._failing_writes = count
+        self._failure_code = code
+        self._failure_retry_after = retry_after
+
+    def _write_allowed(self):
+        with self._lock:
+            if self._failing_writes <= 0:
+                return
+            self._failing_writes -= 1
+        raise api_error(self._failure_code, retry_after=self._failure_retry_after)
+
+    def open_by_url(self, url):
+        self._call('spreadsheets.get')
+        if url not in self._spreadsheets and len(self._spreadsheets) == 1:
+            # A single registered sheet stands in for whatever URL the app asks for
+            return next(iter(self._spreadsheets.values()))
+        return self._spreadsheets[url]
+
+    def open_by_key(self, key):
+        self._call('spreadsheets.get')
+        for spreadsheet in self._spreadsheets.values():
+            if spreadsheet.id == key:
+                return spreadsheet
+        raise KeyError(key)
@@ -0,0 +1,99 @@
+"""Synthetic inventory generator using the real sheet schema.
+
+Frames are built column-wise with numpy, so a million rows takes seconds.
+"""
+import numpy as np
+import pandas as pd
+
+TYPES = ['IPC', 'NVR']
+MODELS = ['Vivotek', 'Hikvision', 'DH-IPC-HDW_143T1-A-S4', 'DS-2CD2143G2-I', 'IP9165-HT']
+MAKES = ['Hikvision', 'Dahua', 'Vivotek']
+CAMERA_TYPES = ['PTZ', 'Dome', 'Bullet']
+FIRMWARE = ['OK', 'No more updates', 'Available']
+STATUSES = ['Live', 'Repair', 'Discard', 'Not Live']
+STATUS_WEIGHTS = [0.8, 0.08, 0.07, 0.05]
+LOCATIONS = ['1F', 'HO']
+LOCATION_WEIGHTS = [0.7, 0.3]
+AREAS = ['Assembly', 'Paint', 'Weld', 'Press', 'Engine', 'Frame', 'Quality', 'Stores',
+         'Canteen', 'Gate 1', 'Gate 2', 'Dispatch']
+COVERAGE = ['Warranty', 'AMC', 'Not in AMC and warranty']
+
+COLUMNS = [
+    'No.', 'Types', 'Camera name', 'Model', 'Firmware available or not', 'VAPT',
+    'Camera or NVR IP', 'NVR IP', 'Camera Type', 'Port', 'MAC', 'Inv Test', 'Serial No',
+    'Version', 'Subnet Mask', 'Gateway', 'Initial Status', 'Default Username',
+    'Default Password', 'Make', 'Manufacturing Date', 'Camera & NVR(1F or HO)',
+    'AMC, Warranty,Not in AMC and warranty', 'Area', 'PO Date', 'Last Updated',
+]
+
+
+_DECIMAL = np.array([str(i) for i in range(256)], dtype=object)
+_HEX = np.array([f'{i:02x}' for i in range(256)], dtype=object)
+
+
+def _joined(table, rng, n, parts, sep):
+    # Random bytes rendered through a lookup table, joined column-wise
+    octets = table[rng.integers(0, 256, size=(n, parts))]
+    out = pd.Series(octets[:, 0])
+    for i in range(1, parts):
+        out = out + sep + octets[:, i]
+    return out
+
+
+def _ips(rng, n):
+    return '10.' + _joined(_DECIMAL, rng, n, 3, '.')
+
+
+def _dates(rng, n, start, days, fmt):
+    # Format each calendar day once and index into it; strftime per row is the slow part
+    labels = pd.date_range(start, periods=days, freq='D').strftime(fmt).to_numpy(dtype=object)
+    return pd.Series(labels[rng.integers(0, days, size=n)])
+
+
+def _recent_timestamps(rng, n, now, days):
+    times = np.array([f'{h:02d}:{m:02d}' for h in range(24) for m in range(60)], dtype=object)
+    day_part = _dates(rng, n, now - pd.Timedelta(days=days - 1), days, '%Y-%m-%d')
+    return day_part + ' ' + times[rng.integers(0, len(times), size=n)]
+
+
+def generate_inventory(n_rows, seed=0, now=None):
+    """ Inventory frame with ``n_rows`` devices and the dashboard's column schema """
+    rng = np.random.default_rng(seed)
+    now = pd.Timestamp.now().normalize() if now is None else now
+    location = rng.choice(LOCATIONS, size=n_rows, p=LOCATION_WEIGHTS)
+    area = rng.choice(AREAS, size=n_rows)
+    serial = np.arange(1, n_rows + 1)
+    frame = pd.DataFrame({
+        'No.': serial,
+        'Types': rng.choice(TYPES, size=n_rows, p=[0.85, 0.15]),
+        'Camera name': np.where(location == 'HO', 'HO', area),
+        'Model': rng.choice(MODELS, size=n_rows),
+        'Firmware available or not': rng.choice(FIRMWARE, size=n_rows, p=[0.5, 0.3, 0.2]),
+        'VAPT': rng.choice(['OK', 'Pending'], size=n_rows, p=[0.9, 0.1]),
+        'Camera or NVR IP': _ips(rng, n_rows),
+        'NVR IP': _ips(rng, n_rows),
+        'Camera Type': rng.choice(CAMERA_TYPES, size=n_rows),
+        'Port': rng.choice([554, 8000, 25001, 37777], size=n_rows),
+        'MAC': _joined(_HEX, rng, n_rows, 6, ':'),
+        'Inv Test': rng.choice(['Yes', 'No'], size=n_rows),
+        'Serial No': pd.Series(serial + 10_000_000).astype(str).radd('SN-'),
+        'Version': rng.choice(['2.800.0000000.16.R', 'V5.7.3', 'V5.5.0'], size=n_rows),
+        'Subnet Mask': '255.255.255.0',
+        'Gateway': _ips(rng, n_rows),
+        'Initial Status': rng.choice(STATUSES, size=n_rows, p=STATUS_WEIGHTS),
+        'Default Username': 'Admin',
+        'Default Password': 'Password',
+        'Make': rng.choice(MAKES, size=n_rows),
+        'Manufacturing Date': _dates(rng, n_rows, now - pd.Timedelta(days=3650), 3400, '%Y-%m-%d'),
+        'Camera & NVR(1F or HO)': location,
+        'AMC, Warranty,Not in AMC and warranty': rng.choice(COVERAGE, size=n_rows),
+        'Area': area,
+        'PO Date': _dates(rng, n_rows, now - pd.Timedelta(days=3300), 3300, '%d/%m/%Y'),
+        'Last Updated': _recent_timestamps(rng, n_rows, now, 30),
+    })
+    return frame[COLUMNS]
+
+
+def to_sheet_values(frame):
+    """ Header plus rows of cell strings, as the Sheets API returns them """
+    return [list(frame.columns)] + frame.astype(str).values.tolist()
@@ -0,0 +1,211 @@
+"""Append-only log of device changes, built by diffing successive snapshots.
+
+Every time a new inventory version is published, ``ChangeLog.record()``
+compares it with the last recorded state of the same source, row by row
+(rows are matched on a device key such as the serial number), and appends
+one event per change:
+
+* ``added`` / ``removed`` - a device appeared in or disappeared from the sheet
+* ``status``              - Initial Status changed (old -> new)
+* ``firmware``            - the firmware column changed (old -> new)
+
+Events live in a local SQLite file indexed by time, so "last 7 days" is a
+range query instead of a scan of the inventory. The first snapshot of a
+source only records the baseline state.
+"""
+import contextlib
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import snapshot_store
+
+logger = logging.getLogger(__name__)
+
+DB_NAME = 'changes.sqlite'
+# First column present in the data identifies a device; duplicates get a #n suffix
+ROW_KEY_COLUMNS = ('Serial No', 'MAC', 'Camera or NVR IP')
+# Rows with no key value are keyed on these instead, so inserting a row doesn't shift the others
+CONTENT_KEY_COLUMNS = ('Camera name', 'Area', 'Model')
+SITE_COLUMN = 'Site'
+TRACKED = {
+    'status': 'Initial Status',
+    'firmware': 'Firmware available or not',
+}
+DETAIL_COLUMNS = {
+    'name': 'Camera name',
+    'types': 'Types',
+    'model': 'Model',
+}
+RETENTION_DAYS = 365
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    source TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    event TEXT NOT NULL,
+    old TEXT,
+    new TEXT,
+    name TEXT,
+    types TEXT,
+    model TEXT
+);
+CREATE INDEX IF NOT EXISTS events_source_ts ON events (source, ts);
+CREATE TABLE IF NOT EXISTS state (
+    source TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    status TEXT,
+    firmware TEXT,
+    name TEXT,
+    types TEXT,
+    model TEXT,
+    PRIMARY KEY (source, row_key)
+);
+"""
+STATE_FIELDS = ['status', 'firmware', 'name', 'types', 'model']
+
+
+def _text(frame, column):
+    if column not in frame.columns:
+        return pd.Series(None, index=frame.index, dtype=object)
+    text = frame[column].astype('string').str.strip()
+    return text.astype(object).where(text.notna(), None)
+
+
+def _content_keys(frame, rows):
+    """ ``row:<digest>`` keys from the CONTENT_KEY_COLUMNS of the ``rows`` mask """
+    parts = [_text(frame, c)[rows].fillna('') for c in CONTENT_KEY_COLUMNS if c in frame.columns]
+    values = zip(*parts) if parts else [()] * int(rows.sum())
+    digests = [
+        'row:' + hashlib.blake2b('\x1f'.join(value).encode('utf-8'), digest_size=8).hexdigest()
+        for value in values
+    ]
+    return pd.Series(digests, index=frame.index[rows.to_numpy()], dtype=object)
+
+
+def row_keys(frame):
+    """Device key per row: site plus the first available key column, numbered on duplicates.
+
+    Rows without a key value fall back to a digest of their name, area and model.
+    """
+    key_column = next((c for c in ROW_KEY_COLUMNS if c in frame.columns), None)
+    if key_column is None:
+        keys = pd.Series(None, index=frame.index, dtype=object)
+    else:
+        keys = _text(frame, key_column)
+    missing = keys.isna() | (keys == '')
+    if missing.any():
+        keys = keys.where(~missing, _content_keys(frame, missing))
+    if SITE_COLUMN in frame.columns:
+        keys = _text(frame, SITE_COLUMN).fillna('') + '/' + keys
+    occurrence = keys.groupby(keys).cumcount()
+    return keys.where(occurrence == 0, keys + '#' + (occurrence + 1).astype(str))
+
+
+def device_state(frame):
+    """ Tracked and descriptive fields per device key, the unit that record() diffs """
+    state = pd.DataFrame({'row_key': row_keys(frame).to_numpy()})
+    for field, column in {**TRACKED, **DETAIL_COLUMNS}.items():
+        state[field] = _text(frame, column).to_numpy()
+    return state.set_index('row_key')
+
+
+class ChangeLog:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(snapshot_store.CACHE_DIR, DB_NAME)
+        self._lock = threading.Lock()
+        self._states = {}  # source -> last recorded device_state(), so diffs skip the SQLite read
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # One short-lived connection per call, so threads never share one; WAL lets reads run during writes
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, source, frame, at=None):
+        """ Diff ``frame`` against the last recorded state of ``source``; returns the event count """
+        at = time.time() if at is None else at
+        new = device_state(frame)
+        with self._lock, self._connect() as conn:
+            old = self._states.get(source)
+            if old is None:
+                old = pd.read_sql_query(
+                    'SELECT row_key, ' + ', '.join(STATE_FIELDS) + ' FROM state WHERE source = ?',
+                    conn, params=(source,), index_col='row_key',
+                )
+            baseline = old.empty
+            events, upserts, removed = self._diff(old, new)
+            if not baseline and events:
+                conn.executemany(
+                    'INSERT INTO events (ts, source, row_key, event, old, new, name, types, model) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(at, source, *event) for event in events],
+                )
+            conn.executemany(
+                'INSERT OR REPLACE INTO state (source, row_key, ' + ', '.join(STATE_FIELDS) + ') '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(source, key, *fields) for key, fields in upserts],
+            )
+            conn.executemany('DELETE FROM state WHERE source = ? AND row_key = ?',
+                             [(source, key) for key in removed])
+            conn.execute('DELETE FROM events WHERE ts < ?', (at - RETENTION_DAYS * 86400,))
+            self._states[source] = new
+        return 0 if baseline else len(events)
+
+    @staticmethod
+    def _diff(old, new):
+        events, upserts = [], []
+        added = new.index.difference(old.index)
+        removed = old.index.difference(new.index)
+        common = new.index.intersection(old.index)
+        details = ['name', 'types', 'model']
+
+        rows = new.loc[added]
+        for key, status, *detail in zip(rows.index, rows['status'], *(rows[d] for d in details)):
+            events.append((key, 'added', None, status, *detail))
+        upserts.extend(zip(rows.index, zip(*(rows[f] for f in STATE_FIELDS))))
+        rows = old.loc[removed]
+        for key, status, *detail in zip(rows.index, rows['status'], *(rows[d] for d in details)):
+            events.append((key, 'removed', status, None, *detail))
+
+        before, after = old.loc[common, STATE_FIELDS], new.loc[common, STATE_FIELDS]
+        # None == None is False for object arrays, so compare with missing values filled
+        differs = before.fillna('\x00').to_numpy() != after.fillna('\x00').to_numpy()
+        for i in np.flatnonzero(differs.any(axis=1)):
+            key = common[i]
+            row = after.iloc[i]
+            for field in TRACKED:
+                column = STATE_FIELDS.index(field)
+                if differs[i, column]:
+                    events.append((key, field, before.iat[i, column], row[field], *row[details]))
+            upserts.append((key, tuple(row[STATE_FIELDS])))
+        return events, upserts, list(removed)
+
+    def events_since(self, since, source=None, events=None):
+        """ Events at or after ``since`` (epoch seconds, like ``ts``), newest first """
+        query = 'SELECT ts, source, row_key, event, old, new, name, types, model FROM events WHERE ts >= ?'
+        params = [since]
+        if source is not None:
+            query += ' AND source = ?'
+            params.append(source)
+        if events:
+            query += ' AND event IN (' + ', '.join('?' * len(events)) + ')'
+            params.extend(events)
+        with self._connect() as conn:
+            return pd.read_sql_query(query + ' ORDER BY ts DESC, id DESC', conn, params=params)
@@ -0,0 +1,118 @@
+"""Streaming, column-projected reader for inventory workbooks.
+
+``pd.read_excel`` materializes every cell of the sheet (styled but empty
+columns included) as openpyxl objects before building the frame. This
+reader opens the workbook in openpyxl's read-only mode, keeps only the
+wanted columns of each row as it streams past, and turns every
+``CHUNK_ROWS`` rows into a typed frame, so memory is bounded by the result
+plus one chunk and load time grows linearly with the row count:
+
+    df = read_inventory_excel(uploaded_file)                      # every named column
+    df = read_inventory_excel('plant.xlsx', columns=REPORT_COLUMNS)
+
+Values are converted like ``pd.read_excel``: integral floats become ints,
+pandas' default missing-value strings (``'n/a'``, ``'NA'``, ``''``...) are
+NaN, empty columns are float NaN, trailing blank rows are dropped and duplicate
+headers get ``.1``, ``.2`` suffixes. Columns without a header are dropped.
+"""
+import operator
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+CHUNK_ROWS = 20_000
+# pd.read_excel's default na_values
+NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+
+
+def _header_names(header):
+    """ Column names like read_excel's, with None for header-less columns """
+    names, seen = [], {}
+    for value in header:
+        if value is None or (isinstance(value, str) and not value.strip()):
+            names.append(None)
+            continue
+        name = value
+        if name in seen:
+            seen[name] += 1
+            name = f'{value}.{seen[value]}'
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _int_if_integral(value):
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+
+def _typed_chunk(rows, columns):
+    """ One chunk of projected row tuples as a frame with inferred dtypes """
+    chunk = pd.DataFrame.from_records(rows, columns=columns, coerce_float=False)
+    for col in chunk.columns:
+        values = chunk[col]
+        if values.dtype != object and not isinstance(values.dtype, pd.StringDtype):
+            continue
+        # read_excel leaves NaN, not None, in empty and NA-string cells
+        missing = values.isna() | values.isin(NA_STRINGS)
+        if missing.any():
+            values = chunk[col] = values.astype(object).where(~missing, np.nan)
+        if values.map(type).eq(float).any():
+            # read_excel turns whole-number cells into ints (5.0 -> 5), even in mixed columns
+            chunk[col] = values.map(_int_if_integral)
+    chunk = chunk.infer_objects()
+    empty = [col for col in chunk.columns if chunk[col].dtype == object and chunk[col].isna().all()]
+    if empty:
+        chunk[empty] = chunk[empty].astype('float64')
+    for col in chunk.select_dtypes('float').columns:
+        values = chunk[col]
+        if values.notna().all() and (values % 1 == 0).all():
+            chunk[col] = values.astype('int64')
+    return chunk
+
+
+def read_inventory_excel(source, columns=None, sheet=0, chunk_rows=CHUNK_ROWS):
+    """ First (or ``sheet``-th) worksheet of ``source`` as a frame of the wanted columns """
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[sheet].iter_rows(values_only=True)
+        names = _header_names(next(rows, ()))
+        wanted = None if columns is None else set(columns)
+        keep = [i for i, name in enumerate(names) if name is not None and (wanted is None or name in wanted)]
+        kept_names = [names[i] for i in keep]
+        if not keep:
+            return pd.DataFrame(columns=kept_names)
+        width = keep[-1] + 1
+        project = operator.itemgetter(*keep)
+        single = len(keep) == 1
+        blank = (None,) * len(keep)
+        chunks, buffer = [], []
+        pending_blanks = 0
+        for row in rows:
+            if len(row) < width:
+                # Read-only rows stop at their last non-empty cell
+                row = row + (None,) * (width - len(row))
+            values = (project(row),) if single else project(row)
+            if values == blank:
+                # Blank rows inside the data are kept, trailing (e.g. formatted-only) ones are not
+                pending_blanks += 1
+                continue
+            if pending_blanks:
+                buffer.extend([blank] * pending_blanks)
+                pending_blanks = 0
+            buffer.append(values)
+            if len(buffer) >= chunk_rows:
+                chunks.append(_typed_chunk(buffer, kept_names))
+                buffer = []
+        if buffer or not chunks:
+            chunks.append(_typed_chunk(buffer, kept_names))
+    finally:
+        workbook.close()
+    if len(chunks) == 1:
+        return chunks[0]
+    # A chunk of blank cells has no dtype of its own; settle such columns once the chunks meet
+    return pd.concat(chunks, ignore_index=True).infer_objects()
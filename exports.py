@@ -0,0 +1,86 @@
+"""Chunked CSV / Parquet / XLSX exports of inventory frames.
+
+Files are written to a temp file under the cache directory ``CHUNK_ROWS``
+rows at a time (CSV text, Parquet row groups, write-only XLSX rows), so only
+one encoded chunk is in memory while a large export is being built; the
+finished file is read back once for Streamlit to serve:
+
+    data = export_bytes(df, 'xlsx')
+
+The dashboard hands ``export_bytes`` to ``st.download_button`` as a deferred
+callable: nothing is built until the button is clicked, and Streamlit runs
+it on a worker thread, so an export never blocks reruns.
+"""
+import os
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import snapshot_store
+
+CHUNK_ROWS = 50_000
+XLSX_MAX_ROWS = 1_048_576  # Excel's sheet limit, header row included
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def iter_chunks(frame, chunk_rows=CHUNK_ROWS):
+    for start in range(0, len(frame), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def write_csv(frame, path, chunk_rows=CHUNK_ROWS):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(frame.iloc[:0].to_csv(index=False))  # header, also for empty frames
+        for chunk in iter_chunks(frame, chunk_rows):
+            chunk.to_csv(f, index=False, header=False)
+
+
+def write_parquet(frame, path, chunk_rows=CHUNK_ROWS):
+    data = snapshot_store.parquet_safe(frame)
+    # One schema for the whole file, so a chunk of all-missing cells cannot change a column's type
+    schema = pa.Schema.from_pandas(data, preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in iter_chunks(data, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_xlsx(frame, path, chunk_rows=CHUNK_ROWS):
+    from openpyxl import Workbook
+
+    if len(frame) >= XLSX_MAX_ROWS:
+        raise ValueError(f"{len(frame)} rows do not fit in one Excel sheet; export CSV or Parquet instead")
+    workbook = Workbook(write_only=True)  # rows are streamed to disk, not kept as cell objects
+    sheet = workbook.create_sheet('Inventory')
+    sheet.append([str(c) for c in frame.columns])
+    for chunk in iter_chunks(frame, chunk_rows):
+        # Missing cells become empty cells; done per chunk rather than per value
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(path)
+
+
+WRITERS = {
+    'csv': write_csv,
+    'parquet': write_parquet,
+    'xlsx': write_xlsx,
+}
+
+
+def export_bytes(frame, fmt, chunk_rows=CHUNK_ROWS):
+    """ ``frame`` encoded as ``fmt`` (a key of EXPORT_FORMATS), built in chunks on disk """
+    export_dir = os.path.join(snapshot_store.CACHE_DIR, 'exports')
+    os.makedirs(export_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=f'.{fmt}', dir=export_dir)
+    os.close(fd)
+    try:
+        WRITERS[fmt](frame, path, chunk_rows)
+        with open(path, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(path)
@@ -0,0 +1,168 @@
+"""Batch alert reports for many inventories, without Streamlit.
+
+Each source is one site: an Excel/CSV/Parquet file or a Google Sheet URL,
+optionally prefixed with a site name. Sources are summarized in a process
+pool and written out as one batch:
+
+    python inventory_cli.py Plant1=plant1.xlsx HO=https://docs.google.com/spreadsheets/d/... \\
+        --output fleet.json
+
+A ``.csv`` output gets one flattened row per site; anything else is JSON.
+Sources that fail are reported with their error and make the exit code 1.
+
+With ``--trends`` each site's daily rollup is also stored in the trend store
+under the site name, so a daily cron job keeps the dashboard's trend charts
+filled even on days nobody opens it (name the sheet site ``gsheet`` to feed
+the dashboard's Google Sheet view).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from excel_reader import read_inventory_excel
+from inventory_core import (
+    ALERT_RULES_PATH, REPORT_COLUMNS, ROLLUP_COLUMNS,
+    build_inventory_frame, daily_rollup, frame_report, load_alert_rules, summarize_alerts,
+)
+
+SHEET_PREFIX = 'https://docs.google.com/'
+DEFAULT_KEY_FILE = 'inventory-managment-465211-7ba8ecdf5815.json'
+
+# One authorized client per worker process, created on its first sheet source
+_client = None
+
+
+def parse_source(spec):
+    """ ``[SITE=]PATH_OR_URL`` -> (site, source); the site defaults to the file name """
+    site, sep, source = spec.partition('=')
+    if not sep or site.startswith(SHEET_PREFIX) or os.sep in site:
+        site, source = None, spec
+    if site is None:
+        if source.startswith(SHEET_PREFIX):
+            site = source.rstrip('/').rsplit('/', 1)[-1]
+        else:
+            site = os.path.splitext(os.path.basename(source))[0]
+    return site, source
+
+
+def load_source(source, key_file=DEFAULT_KEY_FILE, sheet_idx=0, columns=REPORT_COLUMNS):
+    """ Raw inventory frame for a file path or Google Sheet URL; CSV/Excel keep only ``columns`` """
+    global _client
+    if source.startswith(SHEET_PREFIX):
+        from sheet_sync import SheetDeltaSync, create_client
+        if _client is None:
+            _client = create_client(key_file)
+        return SheetDeltaSync(source, sheet_idx).refresh(_client, force=True)
+    ext = os.path.splitext(source)[1].lower()
+    if ext == '.csv':
+        return pd.read_csv(source, usecols=lambda c: c in columns)
+    if ext == '.parquet':
+        return pd.read_parquet(source)
+    return read_inventory_excel(source, columns=columns)
+
+
+def summarize_source(site, source, key_file, sheet_idx, now, rules_path=None, trends=False):
+    """ Worker: load one source and return its report (or the error) as a plain dict """
+    started = time.perf_counter()
+    result = {'site': site, 'source': source}
+    try:
+        rules = load_alert_rules(rules_path)
+        # Scoped rules (e.g. per Types) need their columns too, trend rollups their dimensions
+        extra = rules.source_columns + (ROLLUP_COLUMNS if trends else [])
+        columns = REPORT_COLUMNS + [c for c in dict.fromkeys(extra) if c not in REPORT_COLUMNS]
+        df = build_inventory_frame(load_source(source, key_file, sheet_idx, columns), now)
+        summary = summarize_alerts(df, rules.evaluate(df))
+        result.update(frame_report(df, summary))
+        if trends:
+            from trend_store import TrendStore
+            rollup = daily_rollup(df, summary, rules.age_buckets)
+            result['trend_rows'] = TrendStore().record(site, now.date().isoformat(), rollup)
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def fleet_totals(reports):
+    """ Devices, alert and coverage counts summed over the sites that loaded """
+    totals = {'sites': 0, 'devices': 0, 'alerts': {}, 'coverage': {}}
+    for report in reports:
+        if 'error' in report:
+            continue
+        totals['sites'] += 1
+        totals['devices'] += report['devices']
+        for category, counts in report['alerts'].items():
+            totals['alerts'][category] = totals['alerts'].get(category, 0) + counts['Total']
+        for name, count in report['coverage'].items():
+            totals['coverage'][name] = totals['coverage'].get(name, 0) + count
+    return totals
+
+
+def flatten(report):
+    """ One CSV row per site: nested dicts become ``outer.inner`` columns """
+    row = {}
+    for key, value in report.items():
+        if isinstance(value, dict):
+            for inner, item in flatten(value).items():
+                row[f'{key}.{inner}'] = item
+        else:
+            row[key] = value
+    return row
+
+
+def write_reports(reports, output, now):
+    if output and output.lower().endswith('.csv'):
+        pd.DataFrame([flatten(r) for r in reports]).to_csv(output, index=False)
+        return
+    payload = json.dumps({
+        'generated_at': now.isoformat(),
+        'totals': fleet_totals(reports),
+        'sites': reports,
+    }, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Alert summaries for many inventories in parallel.')
+    parser.add_argument('sources', nargs='+', help='[SITE=]path.xlsx|.csv|.parquet or Google Sheet URL')
+    parser.add_argument('--output', '-o', help='.json or .csv file (default: JSON on stdout)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--key-file', default=DEFAULT_KEY_FILE, help='service account JSON for sheet sources')
+    parser.add_argument('--sheet-idx', type=int, default=0, help='worksheet index for sheet sources')
+    parser.add_argument('--as-of', help='compute device ages at this date (YYYY-MM-DD) instead of now')
+    parser.add_argument('--rules', default=ALERT_RULES_PATH, help='alert rules JSON (default: alert_rules.json)')
+    parser.add_argument('--trends', action='store_true', help="also store each site's daily rollup for the trend charts")
+    args = parser.parse_args(argv)
+    try:
+        load_alert_rules(args.rules)  # fail before starting workers
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f'invalid rules file {args.rules}: {e}')
+
+    now = pd.Timestamp(args.as_of) if args.as_of else pd.Timestamp.now()
+    jobs = [parse_source(spec) for spec in args.sources]
+    workers = min(args.workers or os.cpu_count() or 1, len(jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(summarize_source, site, source, args.key_file, args.sheet_idx, now, args.rules, args.trends)
+            for site, source in jobs
+        ]
+        reports = [future.result() for future in futures]
+
+    write_reports(reports, args.output, now)
+    failed = [r for r in reports if 'error' in r]
+    for report in failed:
+        print(f"{report['site']}: {report['error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
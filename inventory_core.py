@@ -0,0 +1,679 @@
+"""Data preparation shared by every dashboard section.
+
+Everything here is plain pandas with no Streamlit imports, so it can be
+cached per data version by the app and reused from scripts such as the
+batch CLI (inventory_cli.py). Alert thresholds come from a rules file
+(alert_rules.json, see AlertRules).
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import warnings
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+STATUS_COLUMN = 'Initial Status'
+LOCATION_COLUMN = 'Camera & NVR(1F or HO)'
+FIRMWARE_COLUMN = 'Firmware available or not'
+PO_DATE_COLUMN = 'PO Date'
+DEVICE_AGE_COLUMN = 'Device Age (Years)'
+COVERAGE_COLUMN = 'AMC, Warranty,Not in AMC and warranty'
+AREA_COLUMN = 'Area'
+TYPES_COLUMN = 'Types'
+PO_DATETIME = 'PO Datetime'
+
+# Source columns inventory_report() reads; batch loaders project to these
+REPORT_COLUMNS = [STATUS_COLUMN, LOCATION_COLUMN, FIRMWARE_COLUMN, PO_DATE_COLUMN, COVERAGE_COLUMN]
+# Extra source columns daily_rollup() groups by
+ROLLUP_COLUMNS = [AREA_COLUMN, TYPES_COLUMN]
+
+# Canonical (stripped, upper-cased) categorical copies of the free-text columns above
+STATUS_CODE = 'Status Code'
+LOCATION_CODE = 'Location Code'
+FIRMWARE_CODE = 'Firmware Code'
+
+LIVE, REPAIR, DISCARD = 'LIVE', 'REPAIR', 'DISCARD'
+PLANT, HO = '1F', 'HO'
+FIRMWARE_UP_TO_DATE = ['NO MORE UPDATES', 'OK']
+
+YEAR_SECONDS = 365.25 * 24 * 60 * 60
+
+# Alert categories reported by summarize_alerts()
+FIRMWARE_PENDING = 'firmware'
+REPAIR_ALERT = 'repair'
+DISCARD_ALERT = 'discard'
+HIGH_ALERT = 'high_alert'
+MILD_ALERT = 'mild_alert'
+ALERT_CATEGORIES = [FIRMWARE_PENDING, REPAIR_ALERT, DISCARD_ALERT, HIGH_ALERT, MILD_ALERT]
+
+ALERT_RULES_PATH = os.environ.get(
+    'INVENTORY_ALERT_RULES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'alert_rules.json')
+)
+# Used when the rules file is missing; alert_rules.json ships with the same rules.
+# High = older than 6 years or within 1 month of it, Mild = within 6 months of it.
+DEFAULT_ALERT_RULES = {
+    'aged_device_years': 5,
+    'age_buckets': [
+        {'label': '0-2 years', 'min_years': 0, 'max_years': 2},
+        {'label': '2-5 years', 'min_years': 2, 'max_years': 5},
+        {'label': '5+ years', 'min_years': 5},
+    ],
+    'alerts': {
+        FIRMWARE_PENDING: [{'firmware_not_in': ['No more updates', 'OK']}],
+        REPAIR_ALERT: [{'status_in': ['Repair']}],
+        DISCARD_ALERT: [{'status_in': ['Discard']}],
+        HIGH_ALERT: [{'min_age_months': 71}],
+        MILD_ALERT: [{'min_age_months': 66, 'max_age_months': 71}],
+    },
+}
+
+# Warranty/AMC KPIs: name -> case-insensitive pattern matched against the coverage column
+COVERAGE_PATTERNS = {
+    'under_amc': 'AMC',
+    'under_warranty': 'Warranty',
+    'no_coverage': 'Not in',
+    'covered': 'Warranty|AMC',
+}
+
+# Text columns with at most this share of distinct values are stored as categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+DERIVED_COLUMNS = [STATUS_CODE, LOCATION_CODE, FIRMWARE_CODE, PO_DATETIME]
+
+_CODE_SOURCES = {
+    STATUS_CODE: (STATUS_COLUMN, [LIVE, REPAIR, DISCARD]),
+    LOCATION_CODE: (LOCATION_COLUMN, [PLANT, HO]),
+    FIRMWARE_CODE: (FIRMWARE_COLUMN, FIRMWARE_UP_TO_DATE),
+}
+
+
+def canonical_codes(series, known=()):
+    """ Strip/upper-case a text column into a Categorical, cleaning each distinct value once """
+    codes, uniques = pd.factorize(series)
+    cleaned = [str(value).strip().upper() for value in uniques]
+    categories = list(known) + sorted(set(cleaned) - set(known))
+    lookup = {category: i for i, category in enumerate(categories)}
+    remap = np.array([lookup[value] for value in cleaned] + [-1], dtype=np.int32)
+    # factorize marks missing values with -1, which indexes the trailing -1 above
+    return pd.Categorical.from_codes(remap[codes], categories=categories)
+
+
+def normalize_inventory(df):
+    """ Return a copy of ``df`` with categorical code columns for status, location and firmware """
+    codes = {
+        code_col: canonical_codes(df[source], known)
+        for code_col, (source, known) in _CODE_SOURCES.items()
+        if source in df.columns
+    }
+    out = df.assign(**codes)
+    # Sections that rely on a column being present fall back to empty codes
+    for code_col in DERIVED_COLUMNS:
+        if code_col not in out.columns:
+            out[code_col] = pd.Categorical([None] * len(out))
+    return out
+
+
+_DIGITS = re.compile(r'\d')
+_YEAR_FIRST = re.compile(r'^\d{4}[-/.]')
+_FORMAT_CACHE = {}
+
+
+def detect_date_format(sample):
+    """strftime format for a date string, cached by its digit layout (e.g. 00/00/0000).
+
+    None if the sample has no format of its own or only parses against the
+    convention (e.g. 05/13/2020 as month-first), so one odd value never
+    decides the format of every date with the same layout.
+    """
+    shape = _DIGITS.sub('0', sample)
+    fmt = _FORMAT_CACHE.get(shape)
+    if fmt is None:
+        # Day-first like the sheet's dd/mm/yyyy dates, except ISO-style year-first values
+        dayfirst = not _YEAR_FIRST.match(sample)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            fmt = guess_datetime_format(sample, dayfirst=dayfirst)
+        if fmt is None or ('%d' in fmt and '%m' in fmt and (fmt.index('%d') < fmt.index('%m')) != dayfirst):
+            return None
+        _FORMAT_CACHE[shape] = fmt
+    return fmt
+
+
+def parse_dates(series):
+    """Day-first date parsing with one detected format for the whole column.
+
+    Values that do not match the detected format are grouped by their digit
+    layout and each group is parsed with its own (cached) format, so a column
+    with a few odd entries still parses without inferring per row.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    text = series.astype(str).str.strip()
+    present = series.notna().to_numpy() & (text != '').to_numpy()
+    if not present.any():
+        return pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+    sample = text.iloc[present.argmax()]
+    if detect_date_format(sample) is not None:
+        parsed = _parse_with_format(series, sample)
+    else:
+        # Don't let an odd first value parse the whole column; go straight to per-layout groups
+        parsed = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+    failed = present & parsed.isna().to_numpy()
+    if failed.any():
+        leftovers = text[failed]
+        for _, group in leftovers.groupby(leftovers.str.replace(_DIGITS, '0', regex=True)):
+            parsed[group.index] = _parse_with_format(group, group.iloc[0])
+    return parsed
+
+
+def _parse_with_format(values, sample):
+    fmt = detect_date_format(sample)
+    if fmt is None:
+        dayfirst = not _YEAR_FIRST.match(sample)
+        return pd.to_datetime(values, errors='coerce', dayfirst=dayfirst, format='mixed')
+    return pd.to_datetime(values, errors='coerce', format=fmt)
+
+
+def add_date_columns(df, now=None):
+    """ Add the parsed PO Datetime and Device Age (Years) columns used by every age-based section """
+    if PO_DATE_COLUMN in df.columns:
+        po_dates = parse_dates(df[PO_DATE_COLUMN])
+    else:
+        po_dates = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+    return df.assign(**{PO_DATETIME: po_dates, DEVICE_AGE_COLUMN: device_age_years(po_dates, now)})
+
+
+def compact_inventory(df, max_category_ratio=CATEGORY_MAX_RATIO):
+    """Low-memory copy of ``df`` for sharing read-only between sections and sessions.
+
+    Repetitive text columns (status, model, area, ...) become categoricals and
+    integer columns are downcast to the smallest dtype that holds them.
+    Columns mixing numbers and text are left as they are.
+    """
+    compact = {}
+    limit = max(1, int(len(df) * max_category_ratio))
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+            if pd.api.types.infer_dtype(series, skipna=True) == 'string' and series.nunique() <= limit:
+                compact[col] = series.astype('category')
+        elif pd.api.types.is_integer_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+            compact[col] = pd.to_numeric(series, downcast='integer')
+    return df.assign(**compact) if compact else df
+
+
+def bytes_per_row(df):
+    """ Deep in-memory size of ``df`` divided by its row count """
+    return df.memory_usage(deep=True, index=True).sum() / max(len(df), 1)
+
+
+def build_inventory_frame(df, now=None):
+    """ Normalized codes plus parsed dates: everything the sections read, built once and compacted """
+    return compact_inventory(add_date_columns(normalize_inventory(df), now))
+
+
+def display_columns(df):
+    """ Columns meant for users, i.e. without the derived code columns """
+    return [c for c in df.columns if c not in DERIVED_COLUMNS]
+
+
+def device_age_years(po_dates, now=None):
+    """ Fractional age in years for a datetime Series (NaN where the date is missing) """
+    now = pd.Timestamp.now() if now is None else now
+    return (now - po_dates).dt.total_seconds() / YEAR_SECONDS
+
+
+@dataclass(frozen=True)
+class AlertSummary:
+    """Every alert category x location count, computed in one pass over the frame.
+
+    ``counts`` is a category x location-code frame with a ``'Total'`` column,
+    and ``rows`` maps each category to the positions of its member rows so
+    detail views can be taken without re-filtering.
+    """
+    counts: pd.DataFrame
+    rows: dict
+    total: int
+    has_firmware: bool = True
+    percentages: dict = field(default_factory=dict)
+
+    def count(self, category, location=None):
+        column = 'Total' if location is None else location
+        if column not in self.counts.columns:
+            return 0
+        return int(self.counts.at[category, column])
+
+    def subset(self, df, category):
+        """ Rows of ``df`` in ``category`` """
+        return df.iloc[self.rows[category]]
+
+    def to_dict(self):
+        """ Plain, JSON-serialisable counts and percentages (no row positions) """
+        return {
+            'devices': self.total,
+            'has_firmware': self.has_firmware,
+            'alerts': {
+                category: {str(column): int(self.counts.at[category, column]) for column in self.counts.columns}
+                for category in ALERT_CATEGORIES
+            },
+            'percentages': {category: round(pct, 2) for category, pct in self.percentages.items()},
+        }
+
+
+# --- Alert rules ---
+# Condition -> (code column, raw column that must exist, negate)
+_CODE_CONDITIONS = {
+    'status_in': (STATUS_CODE, STATUS_COLUMN, False),
+    'status_not_in': (STATUS_CODE, STATUS_COLUMN, True),
+    'firmware_in': (FIRMWARE_CODE, FIRMWARE_COLUMN, False),
+    'firmware_not_in': (FIRMWARE_CODE, FIRMWARE_COLUMN, True),
+}
+# Condition -> (bound, months per unit); ages must be > min and <= max
+_AGE_CONDITIONS = {
+    'min_age_years': ('min', 12),
+    'min_age_months': ('min', 1),
+    'max_age_years': ('max', 12),
+    'max_age_months': ('max', 1),
+}
+
+
+def _canonical(values):
+    if isinstance(values, str) or not isinstance(values, (list, tuple)):
+        raise ValueError(f"expected a list of values, got {values!r}")
+    return [str(v).strip().upper() for v in values]
+
+
+_JSON_KINDS = {dict: 'an object', list: 'a list', (int, float): 'a number'}
+
+
+def _expect(value, kind, what):
+    """ ``value`` if it is a ``kind``, else a ValueError naming ``what``, so a malformed rules file is reported """
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise ValueError(f"{what} must be {_JSON_KINDS[kind]}, got {value!r}")
+    return value
+
+
+class _RuleInputs:
+    """ Column lookups shared by every rule during one evaluation, so each column is factorized once """
+
+    def __init__(self, df):
+        self.df = df
+        self.size = len(df)
+        self._factorized = {}
+        self._ages = None
+
+    def matches(self, column, values):
+        """ Rows whose stripped, upper-cased ``column`` value is in ``values`` (missing never matches) """
+        if column not in self.df.columns:
+            return np.zeros(self.size, dtype=bool)
+        if column not in self._factorized:
+            codes, uniques = pd.factorize(self.df[column])
+            self._factorized[column] = (codes, np.array([str(v).strip().upper() for v in uniques], dtype=object))
+        codes, names = self._factorized[column]
+        # Missing values (code -1) index the trailing False
+        return np.append(np.isin(names, values), False)[codes]
+
+    @property
+    def ages(self):
+        if self._ages is None:
+            self._ages = self.df[DEVICE_AGE_COLUMN].to_numpy(dtype=float, na_value=np.nan)
+        return self._ages
+
+
+def _compile_rule(category, rule):
+    """ (scope, tests) for one rule entry; scope is {column: canonical values} """
+    _expect(rule, dict, f"Each {category!r} alert rule")
+    where = _expect(rule.get('where', {}), dict, f"'where' in {category!r} alert rule")
+    where = {column: _canonical(values) for column, values in where.items()}
+    tests, sources = [], set(where)
+    for key, value in rule.items():
+        if key == 'where':
+            continue
+        if key in _CODE_CONDITIONS:
+            code_column, source, negate = _CODE_CONDITIONS[key]
+            values = _canonical(value)
+            sources.add(source)
+
+            def test(inputs, code_column=code_column, source=source, negate=negate, values=values):
+                if source not in inputs.df.columns:
+                    return np.zeros(inputs.size, dtype=bool)
+                hits = inputs.matches(code_column, values)
+                if negate:
+                    # Missing values are "not in" any list, e.g. a blank firmware cell is pending
+                    return ~hits
+                return hits
+        elif key in _AGE_CONDITIONS:
+            bound, months = _AGE_CONDITIONS[key]
+            years = float(_expect(value, (int, float), f"{key!r} in {category!r} alert rule")) * months / 12
+            sources.add(PO_DATE_COLUMN)
+
+            def test(inputs, bound=bound, years=years):
+                with np.errstate(invalid='ignore'):
+                    return inputs.ages > years if bound == 'min' else inputs.ages <= years
+        else:
+            raise ValueError(f"Unknown condition {key!r} in {category!r} alert rule")
+        tests.append(test)
+    return where, tests, sources
+
+
+class AlertRules:
+    """Alert rules compiled from a config dict (see DEFAULT_ALERT_RULES / alert_rules.json).
+
+    Each alert category has a list of rules. A rule may be scoped with
+    ``where`` (column -> values, e.g. ``{"Types": ["NVR"]}`` or
+    ``{"Site": ["HO"]}``); every row is judged by the first rule whose scope
+    it falls in, so scoped rules go before the catch-all one. All conditions
+    of a rule must hold. ``evaluate()`` computes every category in one pass
+    over shared column lookups.
+    """
+
+    def __init__(self, config):
+        _expect(config, dict, "The alert rules config")
+        self.config = config
+        self.aged_device_years = float(_expect(
+            config.get('aged_device_years', DEFAULT_ALERT_RULES['aged_device_years']), (int, float),
+            "'aged_device_years'"
+        ))
+        self.age_buckets = []
+        for bucket in _expect(config.get('age_buckets', DEFAULT_ALERT_RULES['age_buckets']), list, "'age_buckets'"):
+            _expect(bucket, dict, "Each age bucket")
+            if 'label' not in bucket:
+                raise ValueError(f"Age bucket {bucket!r} has no 'label'")
+            self.age_buckets.append((
+                float(_expect(bucket.get('min_years', 0), (int, float), "'min_years'")),
+                float(_expect(bucket.get('max_years', np.inf), (int, float), "'max_years'")),
+                str(bucket['label']),
+            ))
+        # Categories the file leaves out keep the built-in rules; an empty list disables one
+        alerts = {**DEFAULT_ALERT_RULES['alerts'], **_expect(config.get('alerts', {}), dict, "'alerts'")}
+        unknown = set(alerts) - set(ALERT_CATEGORIES)
+        if unknown:
+            raise ValueError(f"Unknown alert categories: {', '.join(sorted(unknown))}")
+        self._rules = {}
+        sources = set()
+        for category in ALERT_CATEGORIES:
+            rules = _expect(alerts.get(category, []), list, f"The {category!r} alert rules")
+            compiled = [_compile_rule(category, rule) for rule in rules]
+            self._rules[category] = [(where, tests) for where, tests, _ in compiled]
+            for _, _, rule_sources in compiled:
+                sources |= rule_sources
+        self.rule_count = sum(len(rules) for rules in self._rules.values())
+        # Raw columns the rules read, and the prepared-frame columns that decide their outcome
+        self.source_columns = sorted(sources)
+        scope_columns = sources - {STATUS_COLUMN, FIRMWARE_COLUMN, PO_DATE_COLUMN}
+        self.input_columns = sorted(scope_columns) + [STATUS_CODE, FIRMWARE_CODE, PO_DATETIME]
+        self.fingerprint = hashlib.sha1(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+    def evaluate(self, df):
+        """ Boolean frame, one column per alert category, for a build_inventory_frame() frame """
+        inputs = _RuleInputs(df)
+        flags = {}
+        for category, rules in self._rules.items():
+            result = np.zeros(len(df), dtype=bool)
+            unjudged = np.ones(len(df), dtype=bool)
+            for where, tests in rules:
+                scope = unjudged.copy()
+                for column, values in where.items():
+                    scope &= inputs.matches(column, values)
+                hit = scope.copy()
+                for test in tests:
+                    hit &= test(inputs)
+                result |= hit
+                unjudged &= ~scope
+            flags[category] = result
+        return pd.DataFrame(flags, index=df.index, columns=ALERT_CATEGORIES)
+
+
+def load_alert_rules(path=None):
+    """ AlertRules from a JSON rules file (ALERT_RULES_PATH by default), or the built-in rules if it is missing """
+    path = path or ALERT_RULES_PATH
+    if not os.path.exists(path):
+        return AlertRules(DEFAULT_ALERT_RULES)
+    with open(path, encoding='utf-8') as f:
+        return AlertRules(json.load(f))
+
+
+def rule_input_keys(df, columns):
+    """ One 64-bit hash per row of the columns that decide its alerts """
+    present = [c for c in columns if c in df.columns]
+    if not present:
+        return np.zeros(len(df), dtype=np.uint64)
+    return pd.util.hash_pandas_object(df[present], index=False).to_numpy()
+
+
+# Hashing every row's rule inputs costs about as much as evaluating ~30 rules (measured on 100k
+# rows), so smaller rule sets are cheaper to evaluate in full on every data version
+INCREMENTAL_MIN_RULES = 30
+EVALUATOR_SOURCES = 8
+
+
+class AlertEvaluator:
+    """Re-evaluates large alert rule sets only for rows whose rule inputs changed.
+
+    Flags from the last call for a source are kept by a hash of each row's
+    rule inputs (status, firmware, PO date and scope columns). When the next
+    data version of that source arrives, rows with a known hash reuse their
+    flags, wherever they moved to, and only new or edited rows go through
+    ``rules.evaluate()``. A new rule set, a new ``day`` (ages moved) or a
+    different set of rule columns in the data starts from scratch, which also
+    drops the keys of rows that have since disappeared. Rule sets smaller
+    than ``min_rules`` are always evaluated in full, which is faster.
+    """
+
+    def __init__(self, min_rules=INCREMENTAL_MIN_RULES, max_sources=EVALUATOR_SOURCES):
+        self.min_rules = min_rules
+        self.max_sources = max_sources
+        self.last_stats = {}
+        self._lock = threading.Lock()
+        # source -> (rules fingerprint, day, rule columns present, unique input keys, their flags)
+        self._states = {}
+
+    def evaluate(self, rules, df, day=None, source=None):
+        if rules.rule_count < self.min_rules:
+            with self._lock:
+                self._states.pop(source, None)
+            self.last_stats = {'rows': len(df), 'evaluated': len(df)}
+            return rules.evaluate(df)
+        # A missing column and blank cells hash alike, so which columns exist is part of the state
+        scope = (rules.fingerprint, day, tuple(c for c in rules.source_columns if c in df.columns))
+        keys = rule_input_keys(df, rules.input_columns)
+        with self._lock:
+            state = self._states.get(source)
+        if state is None or state[:3] != scope or not len(state[3]):
+            flags = rules.evaluate(df).to_numpy()
+            first = ~pd.Index(keys).duplicated()
+            state = (*scope, pd.Index(keys[first]), flags[first])
+            positions = np.arange(len(df))
+        else:
+            found = state[3].get_indexer(keys)
+            positions = np.flatnonzero(found < 0)
+            flags = state[4][np.where(found < 0, 0, found)]
+            if len(positions):
+                fresh = rules.evaluate(df.iloc[positions]).to_numpy()
+                flags[positions] = fresh
+                # Known keys keep their slots; the table is rebuilt with the next rules/day change
+                added = pd.Index(keys[positions])
+                first = ~added.duplicated()
+                state = (*scope, state[3].append(added[first]), np.concatenate([state[4], fresh[first]]))
+        with self._lock:
+            self._states.pop(source, None)
+            self._states[source] = state
+            while len(self._states) > self.max_sources:
+                # Least recently evaluated source first
+                self._states.pop(next(iter(self._states)))
+        self.last_stats = {'rows': len(df), 'evaluated': len(positions)}
+        return pd.DataFrame(flags, index=df.index, columns=ALERT_CATEGORIES)
+
+
+def summarize_alerts(df, flags=None):
+    """ Build the AlertSummary for a frame from build_inventory_frame() and its rule flags """
+    if flags is None:
+        flags = AlertRules(DEFAULT_ALERT_RULES).evaluate(df)
+    has_firmware = FIRMWARE_COLUMN in df.columns
+
+    counts = flags.groupby(df[LOCATION_CODE], observed=False).sum().T
+    counts['Total'] = flags.sum()
+    rows = {category: np.flatnonzero(flags[category].to_numpy()) for category in ALERT_CATEGORIES}
+    total = len(df)
+    percentages = {
+        category: float(counts.at[category, 'Total'] / total * 100) if total > 0 else 0.0
+        for category in ALERT_CATEGORIES
+    }
+    return AlertSummary(counts, rows, total, has_firmware, percentages)
+
+
+def coverage_counts(df):
+    """ Warranty/AMC KPI counts, matching each distinct coverage value once """
+    if COVERAGE_COLUMN not in df.columns:
+        return {name: 0 for name in COVERAGE_PATTERNS}
+    codes, uniques = pd.factorize(df[COVERAGE_COLUMN])
+    per_value = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    values = pd.Series(uniques, dtype=object)
+    return {
+        name: int(per_value[values.str.contains(pattern, case=False, na=False).to_numpy(dtype=bool)].sum())
+        for name, pattern in COVERAGE_PATTERNS.items()
+    }
+
+
+def coverage_mask(df, name='covered'):
+    """ Boolean array of rows matching one COVERAGE_PATTERNS entry """
+    if COVERAGE_COLUMN not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    codes, uniques = pd.factorize(df[COVERAGE_COLUMN])
+    hits = pd.Series(uniques, dtype=object).str.contains(COVERAGE_PATTERNS[name], case=False, na=False)
+    # Missing values (code -1) index the trailing False
+    return np.append(hits.to_numpy(dtype=bool), False)[codes]
+
+
+@dataclass(frozen=True)
+class SliceIndex:
+    """Row positions and KPIs for every (location group, area) slice of one frame.
+
+    ``area=None`` stands for the whole location group. ``areas`` maps each
+    group to its sorted area list, so filter widgets need no scan either.
+    """
+    positions: dict
+    areas: dict
+    kpis: dict
+
+    def take(self, df, group, area=None):
+        """ Rows of ``df`` in one slice, as a positional take """
+        return df.iloc[self.positions.get((group, area), np.empty(0, dtype=np.intp))]
+
+
+def _slice_kpis(flags, location_codes, location_names, positions):
+    total = len(positions)
+    sums = flags[positions].sum(axis=0) if total else np.zeros(flags.shape[1], dtype=int)
+    active, repair, discard, covered = (int(v) for v in sums)
+    pct = (lambda count: count / total * 100 if total > 0 else 0)
+    kpis = {
+        'total': total, 'active': active, 'repair': repair, 'discard': discard, 'covered': covered,
+        'active_pct': pct(active), 'repair_pct': pct(repair), 'discard_pct': pct(discard),
+        'coverage_pct': pct(covered), 'top_location': None, 'top_location_count': 0,
+    }
+    codes = location_codes[positions]
+    codes = codes[codes >= 0]
+    if len(codes):
+        per_location = np.bincount(codes, minlength=len(location_names))
+        kpis['top_location'] = location_names[int(per_location.argmax())]
+        kpis['top_location_count'] = int(per_location.max())
+    return kpis
+
+
+def build_slice_index(df, location_groups):
+    """ SliceIndex for ``location_groups`` (name -> location codes) of a build_inventory_frame() frame """
+    status = df[STATUS_CODE]
+    flags = np.column_stack([
+        (status == LIVE).to_numpy(dtype=bool),
+        (status == REPAIR).to_numpy(dtype=bool),
+        (status == DISCARD).to_numpy(dtype=bool),
+        coverage_mask(df),
+    ])
+    location = df[LOCATION_CODE].array
+    location_codes = np.asarray(location.codes)
+    location_names = list(location.categories)
+    positions, areas, kpis = {}, {}, {}
+    for group, codes in location_groups.items():
+        group_positions = np.flatnonzero(df[LOCATION_CODE].isin(codes).to_numpy())
+        slices = {None: group_positions}
+        if AREA_COLUMN in df.columns:
+            area_values = np.asarray(df[AREA_COLUMN].iloc[group_positions], dtype=object)
+            for area, members in pd.Series(group_positions).groupby(area_values).indices.items():
+                slices[area] = group_positions[members]
+        areas[group] = sorted((area for area in slices if area is not None), key=str)
+        for area, members in slices.items():
+            positions[(group, area)] = members
+            kpis[(group, area)] = _slice_kpis(flags, location_codes, location_names, members)
+    return SliceIndex(positions, areas, kpis)
+
+
+def inventory_report(raw_df, now=None, rules=None):
+    """ Alert and coverage summary of a raw inventory frame as a plain dict """
+    df = build_inventory_frame(raw_df, now)
+    rules = rules or load_alert_rules()
+    return frame_report(df, summarize_alerts(df, rules.evaluate(df)))
+
+
+def frame_report(df, summary):
+    """ inventory_report() of an already built frame and its AlertSummary """
+    report = summary.to_dict()
+    report['coverage'] = coverage_counts(df)
+    report['status'] = {str(k): int(v) for k, v in df[STATUS_CODE].value_counts().items() if v}
+    report['locations'] = {str(k): int(v) for k, v in df[LOCATION_CODE].value_counts().items() if v}
+    return report
+
+
+def _rollup_key(df, column):
+    """ Text values for a rollup dimension, '' where missing or when the column is absent """
+    if column not in df.columns:
+        return np.full(len(df), '', dtype=object)
+    codes, uniques = pd.factorize(df[column])
+    names = np.array([str(v).strip() for v in uniques] + [''], dtype=object)
+    return names[codes]
+
+
+def daily_rollup(df, summary, age_buckets):
+    """Compact aggregates of one day's inventory for the trend store, as long-format rows.
+
+    ``metric`` is one of ``devices`` (status x location x area x type
+    counts), ``status`` (the same counts per status x location only),
+    ``alert`` and ``age_bucket`` (per location, category or bucket label in
+    ``bucket``), ``age_years_sum`` and ``dated_devices`` (per location, so
+    mean ages can be derived for any set of locations).
+    """
+    dims = pd.DataFrame({
+        'status': _rollup_key(df, STATUS_CODE),
+        'location': _rollup_key(df, LOCATION_CODE),
+        'area': _rollup_key(df, AREA_COLUMN),
+        'types': _rollup_key(df, TYPES_COLUMN),
+    })
+    cube = dims.value_counts(sort=False).reset_index(name='value')
+    # The full cube serves area / type drill-downs; the small status x location slice serves the default charts
+    by_status = cube.groupby(['status', 'location'], sort=False, as_index=False)['value'].sum()
+    parts = [cube.assign(metric='devices', bucket=''), by_status.assign(metric='status', bucket='')]
+
+    location_codes, locations = pd.factorize(dims['location'])
+    def per_location(metric, bucket, counts):
+        return pd.DataFrame({'metric': metric, 'location': locations, 'bucket': bucket, 'value': counts})
+
+    for category, positions in summary.rows.items():
+        counts = np.bincount(location_codes[positions], minlength=len(locations))
+        parts.append(per_location('alert', category, counts))
+    ages = df[DEVICE_AGE_COLUMN].to_numpy(dtype=float, na_value=np.nan)
+    dated = ~np.isnan(ages)
+    for low, high, label in age_buckets:
+        in_bucket = dated & (ages >= low) & (ages < high)
+        parts.append(per_location('age_bucket', label, np.bincount(location_codes[in_bucket], minlength=len(locations))))
+    parts.append(per_location('age_years_sum', '', np.bincount(location_codes[dated], weights=ages[dated],
+                                                               minlength=len(locations))))
+    parts.append(per_location('dated_devices', '', np.bincount(location_codes[dated], minlength=len(locations))))
+    rollup = pd.concat(parts, ignore_index=True)
+    rollup[['status', 'area', 'types']] = rollup[['status', 'area', 'types']].fillna('')
+    rollup = rollup[rollup['value'] != 0]
+    return rollup[['metric', 'status', 'location', 'area', 'types', 'bucket', 'value']].reset_index(drop=True)
+
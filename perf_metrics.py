@@ -0,0 +1,131 @@
+"""Lightweight per-section timing for dashboard reruns.
+
+Each rerun gets a stopwatch and calls ``lap(section, rows)`` as it finishes
+each section, so sections are timed without wrapping them in blocks. Laps
+go into a process-wide rolling window that can be dumped as JSON or as
+Prometheus text. When profiling is disabled every call hits a shared no-op
+stopwatch, so the instrumented app pays one method call per section.
+"""
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+DEFAULT_WINDOW = 200
+TOTAL = 'total'
+
+
+class _NullRun:
+    def lap(self, section, rows=None):
+        pass
+
+    def finish(self, rows=None):
+        pass
+
+
+NULL_RUN = _NullRun()
+
+
+class RerunProfile:
+    """ Stopwatch for one rerun; each lap covers the time since the previous lap """
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+        self._started = self._last = time.perf_counter()
+        self._laps = []
+
+    def lap(self, section, rows=None):
+        now = time.perf_counter()
+        self._laps.append((section, now - self._last, rows))
+        self._last = now
+
+    def finish(self, rows=None):
+        self._laps.append((TOTAL, time.perf_counter() - self._started, rows))
+        self._profiler.record(self._laps)
+
+
+class SectionProfiler:
+    """Rolling window of section timings shared by every session.
+
+    ``window`` is the number of samples kept per section; older ones are dropped.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, enabled=False):
+        self.window = window
+        self.enabled = enabled
+        self.reruns = 0
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def start_rerun(self, enabled=None):
+        """ Stopwatch for the current rerun, or the shared no-op one when disabled """
+        if not (self.enabled if enabled is None else enabled):
+            return NULL_RUN
+        return RerunProfile(self)
+
+    def record(self, laps):
+        stamp = time.time()
+        with self._lock:
+            self.reruns += 1
+            for section, seconds, rows in laps:
+                if section not in self._samples:
+                    self._samples[section] = deque(maxlen=self.window)
+                self._samples[section].append((stamp, seconds, rows))
+
+    def clear(self):
+        with self._lock:
+            self.reruns = 0
+            self._samples = {}
+
+    def summary(self):
+        """ Per-section stats over the window, in the order sections were first seen """
+        with self._lock:
+            samples = {section: list(window) for section, window in self._samples.items()}
+        stats = {}
+        for section, window in samples.items():
+            seconds = np.array([s for _, s, _ in window])
+            rows = [r for _, _, r in window if r is not None]
+            stats[section] = {
+                'count': len(window),
+                'last_ms': round(seconds[-1] * 1000, 2),
+                'mean_ms': round(float(seconds.mean()) * 1000, 2),
+                'p50_ms': round(float(np.percentile(seconds, 50)) * 1000, 2),
+                'p95_ms': round(float(np.percentile(seconds, 95)) * 1000, 2),
+                'max_ms': round(float(seconds.max()) * 1000, 2),
+                'last_rows': rows[-1] if rows else None,
+                'last_at': window[-1][0],
+            }
+        return stats
+
+    def to_json(self):
+        return json.dumps({'reruns': self.reruns, 'window': self.window,
+                           'sections': self.summary()}, indent=2)
+
+    def to_prometheus(self, prefix='inventory_dashboard'):
+        """ Prometheus text exposition of the current window """
+        stats = self.summary()
+        lines = [
+            f'# HELP {prefix}_section_seconds Wall time per dashboard section over the rolling window',
+            f'# TYPE {prefix}_section_seconds summary',
+        ]
+        for section, s in stats.items():
+            label = f'section="{section}"'
+            for quantile, key in (('0.5', 'p50_ms'), ('0.95', 'p95_ms'), ('1', 'max_ms')):
+                lines.append(f'{prefix}_section_seconds{{{label},quantile="{quantile}"}} {s[key] / 1000:.6f}')
+            lines.append(f'{prefix}_section_seconds_sum{{{label}}} {s["mean_ms"] * s["count"] / 1000:.6f}')
+            lines.append(f'{prefix}_section_seconds_count{{{label}}} {s["count"]}')
+        lines += [
+            f'# HELP {prefix}_section_rows Rows processed by a section in its latest rerun',
+            f'# TYPE {prefix}_section_rows gauge',
+        ]
+        for section, s in stats.items():
+            if s['last_rows'] is not None:
+                lines.append(f'{prefix}_section_rows{{section="{section}"}} {s["last_rows"]}')
+        lines += [
+            f'# HELP {prefix}_reruns_total Profiled reruns since the process started',
+            f'# TYPE {prefix}_reruns_total counter',
+            f'{prefix}_reruns_total {self.reruns}',
+        ]
+        return '\n'.join(lines) + '\n'
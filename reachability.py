@@ -0,0 +1,196 @@
+"""Live reachability of cameras and NVRs, probed concurrently with asyncio.
+
+A device counts as reachable when a TCP connect to any of its ports
+(RTSP/HTTP by default, plus the row's own port) succeeds within the timeout.
+``ReachabilityProber`` keeps the results with a TTL and re-probes stale
+devices on a background thread, so page reruns only ever read the cache.
+Hosts nobody has looked up for ``IDLE_TTLS`` TTLs are forgotten, so probing
+stops once every session has turned the check off:
+
+    prober = ReachabilityProber(ports=(554, 80), ttl=120).start()
+    reachable = prober.lookup(df['Camera or NVR IP'], df['Port'])  # True/False/None per row
+"""
+import asyncio
+import contextlib
+import ipaddress
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = (554, 80)  # RTSP, HTTP
+DEFAULT_TIMEOUT = 1.0
+DEFAULT_CONCURRENCY = 256
+DEFAULT_TTL = 120
+IDLE_TTLS = 3  # a host stays probed this many TTLs after its last lookup
+
+
+async def probe_many(targets, timeout=DEFAULT_TIMEOUT, concurrency=DEFAULT_CONCURRENCY):
+    """ ``{host: ports}`` -> ``{host: reachable}``; every (host, port) connect runs concurrently """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def connect(host, port):
+        async with semaphore:
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            except (OSError, asyncio.TimeoutError, ValueError):
+                return False
+            writer.close()
+            with contextlib.suppress(OSError):
+                await writer.wait_closed()
+            return True
+
+    jobs = [(host, port) for host, ports in targets.items() for port in ports]
+    results = await asyncio.gather(*(connect(host, port) for host, port in jobs))
+    reachable = dict.fromkeys(targets, False)
+    for (host, _), ok in zip(jobs, results):
+        if ok:
+            reachable[host] = True
+    return reachable
+
+
+def probe_hosts(targets, timeout=DEFAULT_TIMEOUT, concurrency=DEFAULT_CONCURRENCY):
+    """ Blocking wrapper around probe_many() for scripts and threads without a loop """
+    return asyncio.run(probe_many(targets, timeout, concurrency))
+
+
+def valid_host(value):
+    """ Normalized IP address text, or None for blanks and non-IP cells """
+    try:
+        return str(ipaddress.ip_address(str(value).strip()))
+    except ValueError:
+        return None
+
+
+def _valid_port(value):
+    try:
+        port = int(value)
+    except (TypeError, ValueError):
+        return None
+    return port if 0 < port < 65536 else None
+
+
+class ReachabilityProber:
+    """Background prober with a per-host TTL cache.
+
+    ``lookup()`` never blocks on the network: it answers from the cache,
+    registers the hosts it was asked about, and wakes the probe thread if
+    any of them are unknown or older than ``ttl`` seconds. ``generation``
+    increases after every probe cycle, so callers can key caches on it.
+    Hosts not looked up for ``idle_ttls`` * ``ttl`` seconds are dropped.
+    """
+
+    def __init__(self, ports=DEFAULT_PORTS, ttl=DEFAULT_TTL, timeout=DEFAULT_TIMEOUT,
+                 concurrency=DEFAULT_CONCURRENCY, idle_ttls=IDLE_TTLS):
+        self.ports = tuple(ports)
+        self.ttl = ttl
+        self.idle_ttls = idle_ttls
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.generation = 0
+        self.last_cycle = {}
+        self._wanted = {}    # host -> ports to try
+        self._requested = {} # host -> last lookup (monotonic)
+        self._results = {}   # host -> (reachable, checked_at)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='reachability', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """ Ask the thread to exit; with ``timeout``, also wait up to that long for it """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            thread = self._thread
+        if timeout is not None and thread is not None:
+            thread.join(timeout)
+
+    def lookup(self, hosts, ports=None):
+        """ True/False per row for probed hosts, None for unprobed or invalid ones """
+        codes, uniques = pd.factorize(hosts)
+        extra_ports = None
+        if ports is not None:
+            extra_ports = pd.Series(np.asarray(ports), dtype=object).groupby(codes).first()
+        values = []
+        stale = False
+        now = time.monotonic()
+        with self._cond:
+            for i, raw in enumerate(uniques):
+                host = valid_host(raw)
+                if host is None:
+                    values.append(None)
+                    continue
+                port = _valid_port(extra_ports.get(i)) if extra_ports is not None else None
+                wanted = self.ports + ((port,) if port and port not in self.ports else ())
+                self._wanted[host] = tuple(sorted(set(self._wanted.get(host, ()) + wanted)))
+                self._requested[host] = now
+                result = self._results.get(host)
+                if result is None or now - result[1] >= self.ttl:
+                    stale = True
+                values.append(None if result is None else result[0])
+            if stale:
+                self._cond.notify_all()
+        mapped = np.array(values + [None], dtype=object)
+        # factorize marks missing hosts with -1, which indexes the trailing None
+        return pd.Series(mapped[codes], index=getattr(hosts, 'index', None), dtype=object)
+
+    def _forget_idle(self, now):
+        idle = [host for host, at in self._requested.items() if now - at >= self.ttl * self.idle_ttls]
+        for host in idle:
+            del self._requested[host]
+            self._wanted.pop(host, None)
+            self._results.pop(host, None)
+
+    def _stale_targets(self):
+        now = time.monotonic()
+        self._forget_idle(now)
+        return {
+            host: ports for host, ports in self._wanted.items()
+            if host not in self._results or now - self._results[host][1] >= self.ttl
+        }
+
+    def _next_expiry(self):
+        # Only hosts still being looked up are re-probed; with none left, sleep until the next lookup
+        checked = [self._results[host][1] for host in self._wanted if host in self._results]
+        if not checked:
+            return None
+        return max(0.0, min(checked) + self.ttl - time.monotonic())
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopped or self._stale_targets(), self._next_expiry())
+                if self._stopped:
+                    return
+                targets = self._stale_targets()
+            if not targets:
+                continue
+            started = time.perf_counter()
+            try:
+                reachable = probe_hosts(targets, self.timeout, self.concurrency)
+            except Exception:
+                logger.warning("Reachability probe failed", exc_info=True)
+                time.sleep(self.timeout)
+                continue
+            checked_at = time.monotonic()
+            with self._cond:
+                for host, ok in reachable.items():
+                    self._results[host] = (ok, checked_at)
+                self.generation += 1
+                self.last_cycle = {
+                    'hosts': len(targets),
+                    'reachable': sum(reachable.values()),
+                    'seconds': time.perf_counter() - started,
+                    'checked_at': time.time(),
+                }
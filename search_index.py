@@ -0,0 +1,112 @@
+"""In-memory device search over a few text columns, built once per data version.
+
+Rows are never scanned at query time. Every distinct lower-cased value of
+the searchable columns becomes a *term*; terms are kept sorted (so a prefix
+is one contiguous range found by binary search) and a trigram index maps
+each 3-character substring to the terms that contain it. A query word is
+resolved to matching terms first, then to rows through one integer code
+array per column:
+
+    index = SearchIndex(df)
+    positions = index.search('hik 10.12')   # every word must match some column
+    df.iloc[positions]
+"""
+import bisect
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+SEARCH_COLUMNS = ['Model', 'Camera or NVR IP', 'Area', 'Camera name', 'Types']
+NGRAM = 3
+
+
+class SearchIndex:
+    def __init__(self, df, columns=SEARCH_COLUMNS):
+        self.columns = [c for c in columns if c in df.columns]
+        self.size = len(df)
+        per_column = []
+        for col in self.columns:
+            codes, uniques = pd.factorize(df[col])
+            per_column.append((codes, pd.Index(uniques).astype(str).str.strip().str.lower()))
+        texts = np.concatenate([np.asarray(u, dtype=object) for _, u in per_column]) if per_column else []
+        terms, inverse = np.unique(np.asarray(texts, dtype=object), return_inverse=True)
+        self.terms = terms.tolist()
+        blank = bisect.bisect_left(self.terms, '')
+        blank = blank if blank < len(self.terms) and self.terms[blank] == '' else None
+
+        # Row -> term id per column; -1 (missing cell or blank text) indexes a trailing "no match" slot
+        self.codes = []
+        offset = 0
+        for codes, uniques in per_column:
+            term_ids = inverse[offset:offset + len(uniques)].astype(np.int32)
+            offset += len(uniques)
+            if blank is not None:
+                term_ids[term_ids == blank] = -1
+            self.codes.append(np.append(term_ids, -1)[codes])
+
+        grams = defaultdict(list)
+        for term_id, text in enumerate(self.terms):
+            for gram in {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}:
+                grams[gram].append(term_id)
+        self.grams = {gram: np.array(ids, dtype=np.int32) for gram, ids in grams.items()}
+        self._term_series = pd.Series(self.terms, dtype='string')
+
+    def _prefix_range(self, token):
+        lo = bisect.bisect_left(self.terms, token)
+        hi = bisect.bisect_left(self.terms, token + '\U0010ffff', lo)
+        return lo, hi
+
+    def _substring_terms(self, token):
+        """ Ids of terms containing ``token`` """
+        if len(token) < NGRAM:
+            # Too short for trigrams; a vectorized scan of the distinct terms is cheap
+            return np.flatnonzero(self._term_series.str.contains(token, regex=False).to_numpy())
+        postings = []
+        for i in range(len(token) - NGRAM + 1):
+            ids = self.grams.get(token[i:i + NGRAM])
+            if ids is None:
+                return np.empty(0, dtype=np.int32)
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = postings[0]
+        for ids in postings[1:]:
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        if len(token) == NGRAM:
+            return candidates
+        # Sharing all trigrams does not guarantee the substring; verify the survivors
+        found = self._term_series.iloc[candidates].str.contains(token, regex=False).to_numpy()
+        return candidates[found]
+
+    def _rows(self, hit):
+        mask = np.zeros(self.size, dtype=bool)
+        if not hit.any():
+            return mask
+        hit = np.append(hit, False)
+        for codes in self.codes:
+            mask |= hit[codes]
+        return mask
+
+    def search(self, query):
+        """Row positions matching every word of ``query``, best first.
+
+        Rows where some column starts with the first word come before rows
+        that only contain it; both groups keep frame order.
+        """
+        tokens = query.strip().lower().split()
+        if not tokens or not self.size:
+            return np.empty(0, dtype=np.intp)
+        matched = np.ones(self.size, dtype=bool)
+        prefix_rows = None
+        for token in tokens:
+            hit = np.zeros(len(self.terms), dtype=bool)
+            hit[self._substring_terms(token)] = True
+            matched &= self._rows(hit)
+            if prefix_rows is None:
+                prefix = np.zeros(len(self.terms), dtype=bool)
+                prefix[slice(*self._prefix_range(token))] = True
+                prefix_rows = self._rows(prefix)
+            if not matched.any():
+                break
+        first = matched & prefix_rows
+        return np.concatenate([np.flatnonzero(first), np.flatnonzero(matched & ~first)])
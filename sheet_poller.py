@@ -0,0 +1,151 @@
+"""One background poller per process that publishes inventory snapshots.
+
+Sessions never fetch from Google Sheets themselves. They read
+``poller.snapshot``, an immutable (version, frame, stats) record shared by
+every session, and ask for a refresh with ``request_refresh()``. Requests
+that arrive while a fetch is in flight are coalesced into a single follow-up
+fetch, so any number of Refresh clicks and wall displays cost one pull.
+
+Dashboard edits are published at once with ``apply_edits()``, ahead of the
+write to the sheet, so every session sees them on its next rerun.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class InventorySnapshot:
+    """ A published frame; treat ``frame`` as read-only (pandas copy-on-write keeps edits local) """
+    version: str
+    frame: pd.DataFrame
+    stats: dict
+    published_at: float
+
+
+class SheetPoller:
+    """Refreshes ``sync`` every ``interval`` seconds on a daemon thread.
+
+    ``sync`` is anything with ``refresh(client, force=False)``, ``version`` and
+    ``last_stats`` (SheetDeltaSync or MultiSheetSync). The first cycle is not
+    forced, so on-disk snapshots the sync was seeded with are published at
+    once; every later cycle is a forced refresh.
+
+    ``on_publish(snapshot)`` runs on the poller thread for every new version.
+    """
+
+    def __init__(self, sync, client, interval=60, on_publish=None):
+        self.sync = sync
+        self.client = client
+        self.interval = interval
+        self.on_publish = on_publish
+        self.snapshot = None
+        self.last_error = None
+        self._requested = 0   # refresh generations asked for
+        self._completed = 0   # generations covered by a finished fetch
+        self._cycles = 0
+        self._last_poll = 0.0
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._publish_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sheet-poller', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """ Ask the thread to exit; with ``timeout``, also wait up to that long for it """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            thread = self._thread
+        if timeout is not None and thread is not None:
+            thread.join(timeout)
+
+    def request_refresh(self):
+        """ Ask for a fetch; returns the generation to pass to ``wait_for()`` """
+        with self._cond:
+            self._requested += 1
+            self._cond.notify_all()
+            return self._requested
+
+    def wait_for(self, generation, timeout=None):
+        """ Block until a fetch covering ``generation`` finished; False on timeout """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._completed >= generation, timeout)
+
+    def wait_for_snapshot(self, timeout=None):
+        """ The current snapshot, waiting for the first one if needed (None if it failed) """
+        with self._cond:
+            self._cond.wait_for(lambda: self.snapshot is not None or self._cycles > 0, timeout)
+            return self.snapshot
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._cycles > 0:
+                    # Sleep until the next scheduled poll unless a refresh was requested
+                    next_poll = self._last_poll + self.interval - time.monotonic()
+                    self._cond.wait_for(lambda: self._stopped or self._requested > self._completed,
+                                        max(0.0, next_poll))
+                if self._stopped:
+                    return
+                generation = self._requested
+            self._poll(force=self._cycles > 0 or generation > 0)
+            with self._cond:
+                self._cycles += 1
+                self._completed = max(self._completed, generation)
+                self._cond.notify_all()
+            if getattr(self.sync, 'from_snapshot', False) and self._cycles == 1:
+                # Served from disk; go live right away instead of after a full interval
+                self.request_refresh()
+
+    def apply_edits(self, version, cells):
+        """Publish ``cells`` ({(row position, column): value}) before they reach the sheet.
+
+        ``version`` is the snapshot the edits were made on. Returns the
+        per-worksheet ``[(sync, cells)]`` groups to hand to a SheetWriter, or
+        None if newer data was published meanwhile (row positions may differ).
+        """
+        with self._publish_lock:
+            current = self.snapshot
+            if current is None or current.version != version:
+                return None
+            groups = self.sync.apply_edits(cells, version)
+            if groups is not None:
+                self._publish()
+            return groups
+
+    def _poll(self, force):
+        self._last_poll = time.monotonic()
+        try:
+            self.sync.refresh(self.client, force=force)
+            self.last_error = None
+        except Exception as e:
+            logger.warning("Inventory poll failed", exc_info=True)
+            self.last_error = e
+            return
+        with self._publish_lock:
+            self._publish()
+
+    def _publish(self):
+        # Frame and version are read together, after any edit applied since the poll started
+        stats = dict(self.sync.last_stats)
+        current = self.snapshot
+        new_version = current is None or current.version != self.sync.version
+        if new_version or current.stats != stats:
+            self.snapshot = InventorySnapshot(self.sync.version, self.sync.frame, stats, time.time())
+        if new_version and self.on_publish is not None:
+            try:
+                self.on_publish(self.snapshot)
+            except Exception:
+                logger.warning("Snapshot publish hook failed", exc_info=True)
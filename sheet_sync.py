@@ -0,0 +1,465 @@
+"""Incremental (delta) sync of the inventory Google Sheet into a pandas DataFrame.
+
+The Sheets API has no per-row change feed, so a sync cycle works like this:
+
+1. A cheap revision check (Drive ``modifiedTime``) skips the pull entirely
+   when the spreadsheet has not been edited since the last cycle.
+2. Otherwise the worksheet values are pulled in one request and every row is
+   hashed. Only rows whose hash differs from the previous cycle are parsed
+   and patched into the cached frame; unchanged rows are reused as-is.
+
+A sync can also be seeded from an on-disk snapshot: the snapshot is served
+immediately and the first live pull runs on a background thread.
+
+``MultiSheetSync`` runs one such sync per site tab on a bounded thread pool
+and merges their frames with a site column.
+
+Dashboard edits are patched into the cached frames at once with
+``apply_edits()`` (see sheet_writer.py for the write-back); the rows stay
+marked as unchanged until the write lands, then ``mark_stale()`` makes the
+next cycle re-read them from the sheet.
+"""
+import bisect
+import logging
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import gspread
+import pandas as pd
+from google.oauth2 import service_account
+from gspread.utils import numericise, numericise_all
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Patching is only cheaper than a rebuild while a minority of rows changed
+FULL_REBUILD_RATIO = 0.5
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    # Read-only Drive metadata lets the delta sync skip pulls when the sheet is unchanged
+    'https://www.googleapis.com/auth/drive.metadata.readonly',
+]
+# Keep-alive connections shared by every session using the client
+POOL_SIZE = 16
+# (connect, read) seconds, so a hung request can't hold a sync lock forever
+REQUEST_TIMEOUT = (10, 60)
+# Concurrent worksheet pulls for multi-site loading
+MAX_FETCH_WORKERS = 8
+SITE_COLUMN = 'Site'
+
+
+def create_client(key_file):
+    """Authorized gspread client with a pooled keep-alive HTTP session.
+
+    The underlying AuthorizedSession reuses its access token until it expires,
+    so one client should be shared process-wide rather than built per rerun.
+    """
+    credentials = service_account.Credentials.from_service_account_file(key_file, scopes=SCOPES)
+    client = gspread.authorize(credentials)
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    client.http_client.session.mount('https://', adapter)
+    client.set_timeout(REQUEST_TIMEOUT)
+    return client
+
+
+def row_hash(row):
+    """ Stable 8-byte digest of one sheet row (list of cell strings) """
+    return hashlib.blake2b("\x1f".join(row).encode("utf-8"), digest_size=8).digest()
+
+
+def build_frame(headers, rows, index=None):
+    """ Build a DataFrame from raw sheet rows, numericised like get_all_records() """
+    records = [numericise_all(row) for row in rows]
+    return pd.DataFrame(records, columns=headers, index=index)
+
+
+def _infer_mixed(frame):
+    """Re-infer object columns of a patched frame, so dtypes match a fresh build_frame().
+
+    A column stays object after concat once any patch or kept row mixed numbers
+    and text, even when the rows that mixed them are gone (e.g. int vs object).
+    """
+    inferred = {}
+    for column in frame.columns[frame.dtypes == object]:
+        series = frame[column].infer_objects()
+        if series.dtype != object:
+            inferred[column] = series
+    return frame.assign(**inferred) if inferred else frame
+
+
+class SheetDeltaSync:
+    """Keeps one worksheet mirrored as a DataFrame, refreshing it incrementally.
+
+    ``refresh()`` is safe to call on every Streamlit rerun: it returns the
+    cached frame until ``min_interval`` seconds have passed, then runs one
+    delta cycle. ``version`` changes only when the sheet contents change.
+    If a cycle fails after a frame is available, the last good frame keeps
+    being served and the error is reported in ``last_stats``.
+
+    ``on_publish(sync)`` is called after every cycle that produced new data.
+
+    A seeded sync starts its first live pull in the background on the first
+    unforced ``refresh()``; pass ``background_refresh=False`` when a poller
+    owns the sync and schedules that pull itself.
+    """
+
+    def __init__(self, sheet_url, sheet_idx=0, min_interval=60, on_publish=None, name=None,
+                 background_refresh=True):
+        self.sheet_url = sheet_url
+        self.sheet_idx = sheet_idx
+        self.name = name
+        self.min_interval = min_interval
+        self.frame = None
+        self.version = None
+        self.last_stats = {}
+        self.from_snapshot = False
+        self.on_publish = on_publish
+        self.background_refresh = background_refresh
+        self._headers = None
+        self._row_hashes = []
+        self._revision = None
+        self._revision_supported = True
+        self._spreadsheet = None
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+        self._background = None
+        self._background_lock = threading.Lock()
+
+    def seed(self, frame, headers, row_hashes, version, revision=None, saved_at=None, text_columns=()):
+        """Serve a previously saved frame until the first live pull completes.
+
+        ``text_columns`` were saved as text because they mix numbers and text;
+        their cells are numericised again, so rows patched in by later delta
+        cycles get the same types as the seeded ones.
+        """
+        restored = {
+            col: frame[col].astype(object).map(lambda v: v if pd.isna(v) else numericise(v))
+            for col in text_columns or () if col in frame.columns
+        }
+        if restored:
+            frame = frame.assign(**restored)
+        with self._lock:
+            if self.frame is not None:
+                return
+            self.frame = frame
+            self.version = version
+            self._headers = headers
+            self._row_hashes = row_hashes
+            self._revision = revision
+            self.from_snapshot = True
+            self.last_stats = {
+                "mode": "snapshot",
+                "rows_fetched": 0,
+                "rows_patched": 0,
+                "total_rows": len(frame),
+                "seconds": 0.0,
+                "synced_at": saved_at,
+            }
+
+    @property
+    def row_hashes(self):
+        return self._row_hashes
+
+    @property
+    def headers(self):
+        return self._headers
+
+    def worksheet(self, client):
+        return self._open(client).get_worksheet(self.sheet_idx)
+
+    def apply_edits(self, cells, version=None):
+        """Patch ``cells`` ({(row position, column): value}) into the cached frame.
+
+        Values are numericised like pulled cells. Returns ``[(self, cells)]``
+        for a SheetWriter, or None if ``version`` is given and no longer current.
+        Row hashes are kept, so pulls before the write lands keep the edits.
+        """
+        with self._lock:
+            if self.frame is None or (version is not None and version != self.version):
+                return None
+            frame = self.frame.copy()
+            by_column = {}
+            for (position, column), value in cells.items():
+                by_column.setdefault(column, {})[position] = numericise(value)
+            for column, values in by_column.items():
+                col = frame.columns.get_loc(column)
+                positions, new = list(values), list(values.values())
+                try:
+                    frame.iloc[positions, col] = new
+                except (TypeError, ValueError):
+                    # e.g. a number typed into a text column
+                    frame[column] = frame[column].astype(object)
+                    frame.iloc[positions, col] = new
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(f"{self.version}\x1e{sorted(cells.items(), key=repr)!r}".encode("utf-8"))
+            self.frame = frame
+            self.version = digest.hexdigest()
+        return [(self, cells)]
+
+    def mark_stale(self, positions):
+        """ Make the next cycle re-read rows ``positions`` even if the sheet revision looks unchanged """
+        with self._lock:
+            hashes = list(self._row_hashes)
+            for position in positions:
+                if position < len(hashes):
+                    hashes[position] = b''
+            self._row_hashes = hashes
+            self._revision = None
+
+    def snapshot_meta(self):
+        """ JSON-serialisable state needed to ``seed()`` a future process """
+        return {"version": self.version, "revision": self._revision, "headers": self._headers}
+
+    def refresh(self, client, force=False):
+        if self.from_snapshot and not force:
+            if self.background_refresh:
+                self.refresh_in_background(client)
+            return self.frame
+        with self._lock:
+            due = time.monotonic() - self._last_sync >= self.min_interval
+            if self.frame is not None and not force and not due:
+                return self.frame
+            self._last_sync = time.monotonic()
+            try:
+                self._sync(client)
+            except Exception as e:
+                if self.frame is None:
+                    raise
+                logger.warning("Sheet sync failed, serving last good frame", exc_info=True)
+                self.last_stats = dict(self.last_stats, mode="stale", error=str(e))
+                return self.frame
+            self.from_snapshot = False
+            return self.frame
+
+    def refresh_in_background(self, client):
+        """ Start one background refresh unless one is running or ran within min_interval """
+        with self._background_lock:
+            if self._background is not None and self._background.is_alive():
+                return
+            if self._last_sync and time.monotonic() - self._last_sync < self.min_interval:
+                return
+            self._background = threading.Thread(
+                target=self.refresh, args=(client,), kwargs={"force": True}, daemon=True
+            )
+            self._background.start()
+
+    def _open(self, client):
+        if self._spreadsheet is None:
+            self._spreadsheet = client.open_by_url(self.sheet_url)
+        return self._spreadsheet
+
+    def _current_revision(self, spreadsheet):
+        # Needs the Drive metadata scope; fall back to hashing every cycle without it
+        if not self._revision_supported:
+            return None
+        try:
+            return spreadsheet.get_lastUpdateTime()
+        except Exception:
+            self._revision_supported = False
+            return None
+
+    def _sync(self, client):
+        started = time.perf_counter()
+        spreadsheet = self._open(client)
+        revision = self._current_revision(spreadsheet)
+        if self.frame is not None and revision is not None and revision == self._revision:
+            self._record("unchanged", 0, 0, started)
+            return
+
+        values = spreadsheet.get_worksheet(self.sheet_idx).get(pad_values=True)
+        self._revision = revision
+        if not values or values == [[]]:
+            self._apply_full([], [], [], started)
+            return
+
+        headers, rows = values[0], values[1:]
+        hashes = [row_hash(row) for row in rows]
+        if self.frame is None or headers != self._headers:
+            self._apply_full(headers, rows, hashes, started)
+            return
+
+        old_hashes = self._row_hashes
+        kept = min(len(old_hashes), len(hashes))
+        changed = [i for i in range(kept) if old_hashes[i] != hashes[i]]
+        added = list(range(kept, len(hashes)))
+        if len(changed) + len(added) > len(hashes) * FULL_REBUILD_RATIO:
+            self._apply_full(headers, rows, hashes, started)
+            return
+
+        if not changed and not added and len(hashes) == len(old_hashes):
+            self._row_hashes = hashes
+            self._record("unchanged", len(rows), 0, started)
+            return
+
+        patched_pos = changed + added
+        if patched_pos:
+            patch = build_frame(headers, [rows[i] for i in patched_pos], index=patched_pos)
+            base = self.frame.iloc[:kept].drop(index=changed)
+            frame = pd.concat([base, patch]).sort_index()
+            frame.index = pd.RangeIndex(len(frame))
+            frame = _infer_mixed(frame)
+        else:
+            # Rows were only removed from the end of the sheet
+            frame = _infer_mixed(self.frame.iloc[:kept])
+        self._publish(frame, headers, hashes)
+        self._record("delta", len(rows), len(patched_pos), started)
+
+    def _apply_full(self, headers, rows, hashes, started):
+        self._publish(build_frame(headers, rows), headers, hashes)
+        self._record("full", len(rows), len(rows), started)
+
+    def _publish(self, frame, headers, hashes):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update("\x1f".join(headers).encode("utf-8"))
+        for h in hashes:
+            digest.update(h)
+        self.frame = frame
+        self.version = digest.hexdigest()
+        self._headers = headers
+        self._row_hashes = hashes
+        if self.on_publish is not None:
+            self.on_publish(self)
+
+    def _record(self, mode, rows_fetched, rows_patched, started):
+        self.last_stats = {
+            "mode": mode,
+            "rows_fetched": rows_fetched,
+            "rows_patched": rows_patched,
+            "total_rows": 0 if self.frame is None else len(self.frame),
+            "seconds": time.perf_counter() - started,
+            "synced_at": time.time(),
+        }
+
+
+class MultiSheetSync:
+    """One SheetDeltaSync per site, refreshed concurrently and merged into one frame.
+
+    Each site keeps its own delta state, refresh interval and snapshot, so a
+    slow or failing tab never holds back the others: ``refresh()`` waits at
+    most ``wait_timeout`` seconds for sites that already have data and serves
+    their last frame while the pull finishes in the background. Sites with no
+    data yet are always waited for. With more than one site the merged frame
+    gets a ``Site`` column.
+    """
+
+    def __init__(self, syncs, max_workers=MAX_FETCH_WORKERS, wait_timeout=10.0):
+        self.syncs = list(syncs)
+        self.wait_timeout = wait_timeout
+        self.frame = None
+        self.version = None
+        self.last_stats = {}
+        self._merged_key = None
+        self._merged = []    # (first row in the merged frame, sync) in merge order
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(self.syncs))), thread_name_prefix='sheet-sync'
+        )
+
+    @property
+    def from_snapshot(self):
+        return any(sync.from_snapshot for sync in self.syncs)
+
+    def close(self):
+        """ Shut down the fetch pool; queued pulls are cancelled """
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def refresh(self, client, force=False):
+        with self._lock:
+            futures = {}
+            for sync in self.syncs:
+                pending = self._pending.get(sync.name)
+                if pending is None or pending.done():
+                    pending = self._pool.submit(sync.refresh, client, force)
+                    self._pending[sync.name] = pending
+                futures[sync.name] = pending
+        first_load = [futures[sync.name] for sync in self.syncs if sync.frame is None]
+        wait(first_load)
+        wait(list(futures.values()), timeout=self.wait_timeout)
+
+        errors = {}
+        for sync in self.syncs:
+            future = futures[sync.name]
+            if future.done() and future.exception() is not None:
+                errors[sync.name] = future.exception()
+        ready = [sync for sync in self.syncs if sync.frame is not None]
+        if not ready:
+            raise next(iter(errors.values()))
+        with self._lock:
+            self._merge(ready)
+            self._record(futures, errors)
+        return self.frame
+
+    def _merge(self, ready):
+        key = tuple((sync.name, sync.version) for sync in ready)
+        if key == self._merged_key:
+            return
+        if len(self.syncs) == 1:
+            frame = ready[0].frame
+        else:
+            frame = pd.concat(
+                [sync.frame.assign(**{SITE_COLUMN: sync.name}) for sync in ready], ignore_index=True
+            )
+        digest = hashlib.blake2b(digest_size=16)
+        for name, version in key:
+            digest.update(f"{name}\x1f{version}\x1e".encode("utf-8"))
+        starts = [0]
+        for sync in ready[:-1]:
+            starts.append(starts[-1] + len(sync.frame))
+        self.frame = frame
+        self.version = digest.hexdigest()
+        self._merged_key = key
+        self._merged = list(zip(starts, ready))
+
+    def apply_edits(self, cells, version=None):
+        """Split merged-frame ``cells`` by site and patch each site's frame (see SheetDeltaSync).
+
+        Returns the per-site ``[(sync, cells)]`` groups, or None if ``version``
+        is given and the merged frame changed since.
+        """
+        with self._lock:
+            if self.frame is None or (version is not None and version != self.version):
+                return None
+            merged, key = self._merged, dict(self._merged_key)
+            starts = [start for start, _ in merged]
+            groups = {}
+            for (position, column), value in cells.items():
+                start, sync = merged[bisect.bisect_right(starts, position) - 1]
+                groups.setdefault(sync, {})[(position - start, column)] = value
+            applied = []
+            for sync, site_cells in groups.items():
+                if sync.apply_edits(site_cells, key[sync.name]) is None:
+                    # A site refreshed underneath us; undo the sites already patched
+                    for done, done_cells in applied:
+                        done.mark_stale({position for position, _ in done_cells})
+                    return None
+                applied.append((sync, site_cells))
+            self._merge([sync for sync in self.syncs if sync.frame is not None])
+        return applied
+
+    def _record(self, futures, errors):
+        sites = {}
+        for sync in self.syncs:
+            stats = dict(sync.last_stats)
+            if not futures[sync.name].done():
+                stats["mode"] = "loading" if sync.frame is None else "pending"
+            if sync.name in errors:
+                stats = dict(stats, mode="failed", error=str(errors[sync.name]))
+            sites[sync.name] = stats
+        modes = {stats.get("mode") for stats in sites.values()}
+        problems = [f"{name}: {stats['error']}" for name, stats in sites.items() if stats.get("error")]
+        self.last_stats = {
+            "mode": modes.pop() if len(modes) == 1 else "mixed",
+            "rows_fetched": sum(stats.get("rows_fetched", 0) for stats in sites.values()),
+            "rows_patched": sum(stats.get("rows_patched", 0) for stats in sites.values()),
+            "total_rows": 0 if self.frame is None else len(self.frame),
+            "seconds": max((stats.get("seconds", 0.0) for stats in sites.values()), default=0.0),
+            "synced_at": min((stats["synced_at"] for stats in sites.values() if stats.get("synced_at")),
+                             default=None),
+            "sites": sites,
+        }
+        if problems:
+            self.last_stats["error"] = "; ".join(problems)
@@ -0,0 +1,185 @@
+"""Batched write-back of dashboard edits to the inventory Google Sheet.
+
+Edits are queued per worksheet as (data row position, column) -> value and
+coalesced: a cell edited twice before the next flush is written once, and
+every queued cell of a worksheet goes out in one ``Worksheet.batch_update``
+call, so a bulk change of 200 devices is one API round-trip, not 200. A
+daemon thread flushes ``flush_delay`` seconds after the first queued edit:
+
+    writer = SheetWriter(client, on_flushed=poller.request_refresh)
+    for sync, cells in poller.apply_edits({(12, 'Initial Status'): 'Repair'}):
+        writer.submit(sync, cells)
+
+Quota (HTTP 429) and transient server errors are retried with exponential
+backoff plus jitter, honouring ``Retry-After`` when the API sends one.
+
+Cells are addressed by row position, so every edit remembers the sheet row
+hash it was made against. A row that changed in the sheet before the flush
+(edited or shifted by an inserted row) is skipped instead of overwritten.
+Written and skipped rows are marked stale on their sync, so the next pull
+re-reads them and replaces the optimistic values with what the sheet holds.
+"""
+import logging
+import random
+import threading
+import time
+
+import requests
+from gspread.exceptions import APIError
+from gspread.utils import rowcol_to_a1
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 6
+BASE_DELAY = 1.0   # seconds before the first retry, doubled for each later one
+MAX_DELAY = 32.0
+FLUSH_DELAY = 0.5  # coalescing window after the first queued edit
+
+
+def retry_after(error):
+    """ Seconds to wait before retrying ``error``, or None if it is not worth retrying """
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return 0.0
+    if not isinstance(error, APIError) or error.code not in RETRY_STATUS:
+        return None
+    try:
+        return float(error.response.headers.get('Retry-After', 0))
+    except (AttributeError, TypeError, ValueError):
+        return 0.0
+
+
+class SheetWriter:
+    """Queues cell edits per SheetDeltaSync and writes them in batches on a daemon thread.
+
+    ``on_flushed()`` runs after every flush that wrote or skipped cells (e.g.
+    to request a sheet refresh). ``last_stats`` describes the last flush.
+    """
+
+    def __init__(self, client, flush_delay=FLUSH_DELAY, max_attempts=MAX_ATTEMPTS,
+                 base_delay=BASE_DELAY, max_delay=MAX_DELAY, on_flushed=None, sleep=time.sleep):
+        self.client = client
+        self.flush_delay = flush_delay
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_flushed = on_flushed
+        self.last_stats = {}
+        self._sleep = sleep
+        self._pending = {}      # sync -> {(position, column): (value, row hash at edit time)}
+        self._worksheets = {}
+        self._cond = threading.Condition()
+        self._flushing = False
+        self._thread = None
+
+    @property
+    def pending(self):
+        """ Number of queued cells not yet handed to the API """
+        with self._cond:
+            return sum(len(cells) for cells in self._pending.values())
+
+    def submit(self, sync, cells):
+        """ Queue ``cells`` ({(position, column): value}) for ``sync``'s worksheet """
+        if not cells:
+            return
+        hashes = sync.row_hashes
+        with self._cond:
+            queued = self._pending.setdefault(sync, {})
+            for (position, column), value in cells.items():
+                previous = queued.get((position, column))
+                # Re-edits of a queued cell keep the hash of the original sheet row
+                row_hash = previous[1] if previous else (hashes[position] if position < len(hashes) else None)
+                queued[(position, column)] = (value, row_hash)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sheet-writer', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """ Block until every queued edit has been flushed; False on timeout """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._flushing, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+            # Let the rest of a bulk edit arrive before writing
+            self._sleep(self.flush_delay)
+            try:
+                self.flush()
+            except Exception:
+                logger.warning("Sheet write-back failed", exc_info=True)
+
+    def flush(self):
+        """ Write every queued edit now: one batch_update per worksheet """
+        with self._cond:
+            batches, self._pending = self._pending, {}
+            self._flushing = True
+        started = time.perf_counter()
+        stats = {'cells': 0, 'requests': 0, 'retries': 0, 'skipped': 0, 'failed': 0}
+        errors = []
+        try:
+            for sync, cells in batches.items():
+                try:
+                    self._flush_sync(sync, cells, stats)
+                except Exception as e:
+                    logger.warning("Could not write %d cells to %s", len(cells), sync.name or sync.sheet_url,
+                                   exc_info=True)
+                    stats['failed'] += len(cells)
+                    errors.append(f'{sync.name or sync.sheet_url}: {e}')
+                    # Roll the optimistic values back to whatever the sheet holds
+                    sync.mark_stale({position for position, _ in cells})
+        finally:
+            with self._cond:
+                self._flushing = False
+                self._cond.notify_all()
+        self.last_stats = dict(stats, seconds=time.perf_counter() - started, flushed_at=time.time())
+        if errors:
+            self.last_stats['error'] = '; '.join(errors)
+        if batches and self.on_flushed is not None:
+            self.on_flushed()
+        return self.last_stats
+
+    def _flush_sync(self, sync, cells, stats):
+        headers = sync.headers or []
+        hashes = sync.row_hashes
+        data, written, skipped = [], set(), set()
+        for (position, column), (value, row_hash) in cells.items():
+            current = hashes[position] if position < len(hashes) else None
+            # b'' marks a row we already wrote and have not re-read yet, so it cannot conflict
+            if column not in headers or (row_hash and current != row_hash):
+                skipped.add(position)
+                continue
+            cell = rowcol_to_a1(position + 2, headers.index(column) + 1)  # row 1 is the header
+            data.append({'range': cell, 'values': [['' if value is None else value]]})
+            written.add(position)
+        if data:
+            self._batch_update(self._worksheet(sync), data, stats)
+            stats['cells'] += len(data)
+        if skipped:
+            logger.warning("Skipped %d edited rows of %s that changed in the sheet", len(skipped),
+                           sync.name or sync.sheet_url)
+            stats['skipped'] += len(cells) - len(data)
+        sync.mark_stale(written | skipped)
+
+    def _worksheet(self, sync):
+        worksheet = self._worksheets.get(sync)
+        if worksheet is None:
+            worksheet = self._worksheets[sync] = sync.worksheet(self.client)
+        return worksheet
+
+    def _batch_update(self, worksheet, data, stats):
+        for attempt in range(self.max_attempts):
+            stats['requests'] += 1
+            try:
+                # USER_ENTERED: values are parsed as if typed into the Sheets UI
+                return worksheet.batch_update(data, raw=False)
+            except Exception as e:
+                wait = retry_after(e)
+                if wait is None or attempt == self.max_attempts - 1:
+                    raise
+                backoff = min(self.max_delay, self.base_delay * 2 ** attempt)
+                stats['retries'] += 1
+                logger.info("Sheet write throttled (%s), retrying in %.1fs", e, max(wait, backoff))
+                self._sleep(max(wait, backoff) + random.uniform(0, self.base_delay))
@@ -0,0 +1,109 @@
+"""Persistent on-disk snapshots of the last good inventory frame.
+
+Snapshots are Parquet files, so dtypes survive a restart and a cold start
+only costs a local read. Writes go to a temp file and are renamed into
+place, so a crash mid-write never leaves a half-written snapshot behind.
+"""
+import glob
+import json
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Next to the app rather than the working directory, so every launch finds the same cache.
+# PyInstaller unpacks modules into a temp dir that is removed on exit, so use the executable's.
+_APP_DIR = os.path.dirname(sys.executable if getattr(sys, "frozen", False) else os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("INVENTORY_CACHE_DIR", os.path.join(_APP_DIR, ".inventory_cache"))
+META_KEY = b"inventory_snapshot"
+HASH_COLUMN = "__row_hash"
+
+
+def snapshot_path(name):
+    return os.path.join(CACHE_DIR, f"{name}.parquet")
+
+
+def text_columns(frame):
+    """ Object columns mixing numbers and text (e.g. numericised sheet cells), which Parquet cannot store """
+    columns = []
+    for col in frame.columns:
+        if frame[col].dtype == object:
+            kind = pd.api.types.infer_dtype(frame[col], skipna=True)
+            if kind.startswith("mixed") and kind != "mixed-integer-float":
+                columns.append(col)
+    return columns
+
+
+def parquet_safe(frame):
+    """ Coerce the text_columns() of ``frame`` to text """
+    fixes = {
+        col: frame[col].map(lambda v: v if pd.isna(v) else str(v))
+        for col in text_columns(frame)
+    }
+    return frame.assign(**fixes) if fixes else frame
+
+
+def save_snapshot(name, frame, meta=None, row_hashes=None):
+    """Atomically write ``frame`` (plus optional metadata and row hashes); returns success.
+
+    The metadata read back by load_snapshot() also lists the ``text_columns``
+    that were stored as text, so loaders can restore their mixed values.
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        coerced = text_columns(frame)
+        data = parquet_safe(frame)
+        if row_hashes is not None:
+            data = data.assign(**{HASH_COLUMN: row_hashes})
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        payload = dict(meta or {}, saved_at=time.time(), text_columns=coerced)
+        metadata = dict(table.schema.metadata or {})
+        metadata[META_KEY] = json.dumps(payload).encode("utf-8")
+        table = table.replace_schema_metadata(metadata)
+        path = snapshot_path(name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        return True
+    except Exception:
+        logger.warning("Could not write inventory snapshot %r", name, exc_info=True)
+        return False
+
+
+def load_snapshot(name):
+    """ Return ``(frame, meta, row_hashes)`` for a snapshot, or ``(None, None, None)`` """
+    path = snapshot_path(name)
+    if not os.path.exists(path):
+        return None, None, None
+    try:
+        table = pq.read_table(path)
+        meta = json.loads((table.schema.metadata or {}).get(META_KEY, b"{}"))
+        row_hashes = None
+        if HASH_COLUMN in table.column_names:
+            row_hashes = table.column(HASH_COLUMN).to_pylist()
+            table = table.drop_columns([HASH_COLUMN])
+        os.utime(path)  # keeps prune_snapshots() least-recently-used
+        return table.to_pandas(), meta, row_hashes
+    except Exception:
+        logger.warning("Ignoring unreadable inventory snapshot %r", name, exc_info=True)
+        return None, None, None
+
+
+def prune_snapshots(prefix, keep):
+    """ Keep only the ``keep`` most recently written snapshots whose name starts with ``prefix`` """
+    paths = sorted(
+        glob.glob(os.path.join(CACHE_DIR, f"{prefix}*.parquet")),
+        key=os.path.getmtime,
+        reverse=True,
+    )
+    for path in paths[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
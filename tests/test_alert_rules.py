@@ -0,0 +1,116 @@
+""" Alert rule compilation and incremental re-evaluation """
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import MODELS, generate_inventory
+from inventory_core import (
+    ALERT_CATEGORIES, DEFAULT_ALERT_RULES, INCREMENTAL_MIN_RULES, AlertEvaluator, AlertRules,
+    build_inventory_frame,
+)
+
+NOW = pd.Timestamp('2025-06-30')
+DAY = '2025-06-30'
+
+
+def large_rules():
+    """ A rule set above INCREMENTAL_MIN_RULES, scoped per model, type and area """
+    alerts = {category: [] for category in ALERT_CATEGORIES}
+    for i, model in enumerate(MODELS):
+        alerts['firmware'].append({'where': {'Model': [model], 'Types': ['NVR']}, 'firmware_in': ['Available']})
+        alerts['firmware'].append({'where': {'Model': [model]}, 'firmware_not_in': ['OK', 'No more updates']})
+        alerts['repair'].append({'where': {'Model': [model], 'Area': ['Paint', 'Weld']}, 'status_in': ['Repair', 'Not Live']})
+        alerts['repair'].append({'where': {'Model': [model]}, 'status_in': ['Repair']})
+        alerts['discard'].append({'where': {'Model': [model], 'Types': ['IPC']}, 'status_in': ['Discard'],
+                                  'min_age_years': 1 + i})
+        alerts['discard'].append({'where': {'Model': [model]}, 'status_in': ['Discard']})
+        alerts['high_alert'].append({'where': {'Model': [model]}, 'min_age_months': 60 + i})
+        alerts['mild_alert'].append({'where': {'Model': [model]}, 'min_age_months': 54 + i, 'max_age_months': 60 + i})
+    alerts['high_alert'].append({'min_age_months': 71})
+    alerts['mild_alert'].append({'min_age_months': 66, 'max_age_months': 71})
+    return AlertRules({'alerts': alerts})
+
+
+def inventory(raw):
+    return build_inventory_frame(raw, now=NOW)
+
+
+@pytest.fixture
+def rules():
+    rules = large_rules()
+    assert rules.rule_count >= INCREMENTAL_MIN_RULES
+    return rules
+
+
+# --- Incremental evaluation ---
+
+def test_incremental_result_matches_full_evaluation_for_two_sources(rules):
+    evaluator = AlertEvaluator()
+    raw = {'gsheet': generate_inventory(400, seed=1, now=NOW), 'excel': generate_inventory(300, seed=2, now=NOW)}
+    for source, frame in raw.items():
+        df = inventory(frame)
+        pd.testing.assert_frame_equal(evaluator.evaluate(rules, df, DAY, source), rules.evaluate(df))
+        assert evaluator.last_stats['evaluated'] == len(df)
+
+    # One edited row per source; the other source's state must not be used for it
+    edits = {'gsheet': (7, 'Repair'), 'excel': (11, 'Discard')}
+    for source, (row, status) in edits.items():
+        frame = raw[source].copy()
+        frame.loc[row, 'Initial Status'] = status
+        frame.loc[row, 'Firmware available or not'] = 'Available'
+        df = inventory(frame)
+        flags = evaluator.evaluate(rules, df, DAY, source)
+        pd.testing.assert_frame_equal(flags, rules.evaluate(df))
+        assert evaluator.last_stats['evaluated'] == 1
+
+
+def test_rows_moved_or_removed_reuse_their_flags(rules):
+    evaluator = AlertEvaluator()
+    raw = generate_inventory(300, seed=4, now=NOW)
+    evaluator.evaluate(rules, inventory(raw), DAY, 'gsheet')
+    shuffled = raw.drop(index=[3, 50]).sample(frac=1, random_state=0).reset_index(drop=True)
+    df = inventory(shuffled)
+    pd.testing.assert_frame_equal(evaluator.evaluate(rules, df, DAY, 'gsheet'), rules.evaluate(df))
+    assert evaluator.last_stats['evaluated'] == 0
+
+
+def test_new_day_or_missing_column_evaluates_in_full(rules):
+    evaluator = AlertEvaluator()
+    raw = generate_inventory(200, seed=5, now=NOW)
+    df = inventory(raw)
+    evaluator.evaluate(rules, df, DAY, 'gsheet')
+    evaluator.evaluate(rules, df, '2025-07-01', 'gsheet')
+    assert evaluator.last_stats['evaluated'] == len(df)
+
+    without_firmware = inventory(raw.drop(columns='Firmware available or not'))
+    flags = evaluator.evaluate(rules, without_firmware, '2025-07-01', 'gsheet')
+    pd.testing.assert_frame_equal(flags, rules.evaluate(without_firmware))
+    assert evaluator.last_stats['evaluated'] == len(without_firmware)
+
+
+def test_small_rule_sets_are_always_evaluated_in_full():
+    rules = AlertRules(DEFAULT_ALERT_RULES)
+    assert rules.rule_count < INCREMENTAL_MIN_RULES
+    evaluator = AlertEvaluator()
+    df = inventory(generate_inventory(100, seed=6, now=NOW))
+    for _ in range(2):
+        pd.testing.assert_frame_equal(evaluator.evaluate(rules, df, DAY, 'gsheet'), rules.evaluate(df))
+        assert evaluator.last_stats['evaluated'] == len(df)
+
+
+# --- Validation ---
+
+@pytest.mark.parametrize('config', [
+    [],
+    {'alerts': []},
+    {'alerts': {'repair': {'status_in': ['Repair']}}},
+    {'alerts': {'repair': ['Repair']}},
+    {'alerts': {'repair': [{'where': ['Types']}]}},
+    {'alerts': {'high_alert': [{'min_age_years': 'five'}]}},
+    {'alerts': {'repair': [{'status_is': ['Repair']}]}},
+    {'alerts': {'broken': []}},
+    {'age_buckets': [{'min_years': 0}]},
+    {'aged_device_years': '5'},
+])
+def test_malformed_rules_raise_value_error(config):
+    with pytest.raises(ValueError):
+        AlertRules(config)
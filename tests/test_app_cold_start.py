@@ -0,0 +1,64 @@
+""" Cold starts of app.py from on-disk sheet snapshots, driven by AppTest against the fake sheet """
+import time
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import sheet_sync
+import snapshot_store
+from benchmarks import bench_app
+from benchmarks.fake_sheets import FakeClient
+from benchmarks.synthetic import generate_inventory, to_sheet_values
+
+ROWS = 40
+
+
+@pytest.fixture
+def values(tmp_path, monkeypatch):
+    monkeypatch.setenv('INVENTORY_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(snapshot_store, 'CACHE_DIR', str(tmp_path))
+    # install_fake_backend() replaces sheet_sync.create_client; restore it afterwards
+    monkeypatch.setattr(sheet_sync, 'create_client', sheet_sync.create_client)
+    bench_app.track_background_workers()
+    bench_app.clear_app_caches()
+    yield to_sheet_values(generate_inventory(ROWS, seed=5))
+    bench_app.clear_app_caches()
+
+
+def save_sheet_snapshot(name, values):
+    """ Pull ``values`` once, like an earlier process, and save the result as ``name`` """
+    sync = sheet_sync.SheetDeltaSync('benchmark', name='Main')
+    sync.refresh(FakeClient({'benchmark': [values]}))
+    assert snapshot_store.save_snapshot(name, sync.frame, meta=sync.snapshot_meta(), row_hashes=sync.row_hashes)
+
+
+def start_app(values, latency):
+    client = bench_app.install_fake_backend(values, latency=latency)
+    at = AppTest.from_file(bench_app.APP_PATH, default_timeout=60)
+    at.run()
+    assert not at.exception
+    return at, client
+
+
+def showing_snapshot(at):
+    return any('Showing saved snapshot' in caption.value for caption in at.caption)
+
+
+def test_single_site_starts_from_the_pre_site_snapshot(values):
+    save_sheet_snapshot('gsheet-latest', values)
+    # A slow sheet: without a snapshot the first render would wait for the live pull
+    at, _ = start_app(values, latency=0.5)
+    assert showing_snapshot(at)
+
+
+def test_cold_start_from_a_snapshot_pulls_the_sheet_once(values):
+    save_sheet_snapshot('gsheet-Main', values)
+    at, client = start_app(values, latency=0.2)
+    assert showing_snapshot(at)
+    deadline = time.monotonic() + 10
+    while client.calls['drive.files.get'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(1.0)
+    # One revision check by the poller; the sheet is unchanged, so no values are pulled
+    assert client.calls['drive.files.get'] == 1
+    assert client.calls['values.get'] == 0
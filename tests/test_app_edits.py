@@ -0,0 +1,92 @@
+""" The Table View editor in app.py, driven by Streamlit's AppTest against the fake sheet """
+import time
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import sheet_sync
+import snapshot_store
+from benchmarks import bench_app
+from benchmarks.synthetic import generate_inventory, to_sheet_values
+
+ROWS = 60
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('INVENTORY_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(snapshot_store, 'CACHE_DIR', str(tmp_path))
+    # install_fake_backend() replaces sheet_sync.create_client; restore it afterwards
+    monkeypatch.setattr(sheet_sync, 'create_client', sheet_sync.create_client)
+    values = to_sheet_values(generate_inventory(ROWS, seed=3))
+    client = bench_app.install_fake_backend(values)
+    bench_app.track_background_workers()
+    bench_app.clear_app_caches()
+    at = AppTest.from_file(bench_app.APP_PATH, default_timeout=60)
+    at.run()
+    assert not at.exception
+    yield at, client
+    bench_app.clear_app_caches()
+
+
+def open_editor(at):
+    [radio for radio in at.radio if radio.label == 'Select View Mode'][0].set_value('Table View').run()
+    [toggle for toggle in at.toggle if 'Edit' in toggle.label][0].set_value(True).run()
+    assert not at.exception
+
+
+def save(at, monkeypatch, edit):
+    """ Submit the edit form with ``edit(frame)`` applied to the editor's output """
+    real_editor = st.data_editor
+
+    def data_editor(data, **kwargs):
+        real_editor(data, **kwargs)
+        edited = data.copy()
+        edit(edited)
+        return edited
+
+    monkeypatch.setattr(st, 'data_editor', data_editor)
+    [button for button in at.button if 'Save changes' in button.label][0].click().run()
+    monkeypatch.setattr(st, 'data_editor', real_editor)
+    assert not at.exception
+
+
+def sheet_column(client, column):
+    values = client.open_by_url('benchmark').get_worksheet(0).get()
+    return [row[values[0].index(column)] for row in values[1:]]
+
+
+def test_saved_edits_are_written_back_in_one_batch(app, monkeypatch):
+    at, client = app
+    open_editor(at)
+    edited_rows = []
+
+    def edit(frame):
+        edited_rows[:] = list(frame.index[:3])
+        frame.loc[frame.index[:3], 'Initial Status'] = 'Repair'
+        frame.loc[frame.index[:3], 'Firmware available or not'] = 'Updated'
+
+    before = sheet_column(client, 'Initial Status')
+    save(at, monkeypatch, edit)
+    deadline = time.monotonic() + 10
+    while client.calls['values.batchUpdate'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert client.calls['values.batchUpdate'] == 1
+    after = sheet_column(client, 'Initial Status')
+    firmware = sheet_column(client, 'Firmware available or not')
+    for position in range(ROWS):
+        if position in edited_rows:
+            assert after[position] == 'Repair' and firmware[position] == 'Updated'
+        else:
+            assert after[position] == before[position]
+
+
+def test_saving_without_changes_writes_nothing(app, monkeypatch):
+    at, client = app
+    open_editor(at)
+    save(at, monkeypatch, lambda frame: None)
+    assert [info.value for info in at.info if 'No changes' in info.value]
+    time.sleep(0.2)
+    assert client.calls['values.batchUpdate'] == 0
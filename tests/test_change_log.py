@@ -0,0 +1,66 @@
+""" Device keys and snapshot diffs of the change log """
+import pandas as pd
+
+from change_log import ChangeLog, device_state, row_keys
+
+
+def inventory(rows):
+    return pd.DataFrame(rows, columns=['Serial No', 'Camera name', 'Area', 'Model', 'Initial Status',
+                                       'Firmware available or not', 'Types'])
+
+
+BASE = [
+    ['SN-1', 'Gate 1', 'Gate', 'V1', 'Live', 'OK', 'IPC'],
+    ['', 'Paint booth', 'Paint', 'V2', 'Live', 'OK', 'IPC'],
+    [None, 'Weld line', 'Weld', 'V2', 'Repair', 'OK', 'IPC'],
+    ['SN-4', 'Stores', 'Stores', 'V1', 'Live', 'OK', 'NVR'],
+    [None, 'Weld line', 'Weld', 'V2', 'Live', 'Available', 'IPC'],
+]
+
+
+def diff(old_rows, new_rows):
+    events, _, removed = ChangeLog._diff(device_state(inventory(old_rows)), device_state(inventory(new_rows)))
+    return [(event[1], event[2], event[3], event[4]) for event in events], removed
+
+
+def test_rows_without_serial_keep_their_key_when_rows_are_inserted():
+    keys = row_keys(inventory(BASE))
+    inserted = BASE[:1] + [[None, 'Press', 'Press', 'V3', 'Live', 'OK', 'IPC']] + BASE[1:]
+    moved = row_keys(inventory(inserted))
+    assert list(moved.drop(index=1)) == list(keys)
+    # Identical rows are told apart by their order among themselves
+    assert keys[4] == keys[2] + '#2'
+
+
+def test_inserted_row_is_the_only_change():
+    inserted = BASE[:1] + [[None, 'Press', 'Press', 'V3', 'Live', 'OK', 'IPC']] + BASE[1:]
+    events, removed = diff(BASE, inserted)
+    assert events == [('added', None, 'Live', 'Press')]
+    assert removed == []
+
+
+def test_deleted_row_is_the_only_change():
+    events, removed = diff(BASE, BASE[:1] + BASE[2:])
+    assert events == [('removed', 'Live', None, 'Paint booth')]
+    assert len(removed) == 1
+
+
+def test_status_change_of_row_without_serial():
+    changed = [list(row) for row in BASE]
+    changed[1][4] = 'Discard'
+    changed[0], changed[3] = changed[3], changed[0]
+    events, removed = diff(BASE, changed)
+    assert events == [('status', 'Live', 'Discard', 'Paint booth')]
+    assert removed == []
+
+
+def test_record_logs_events_after_the_baseline(tmp_path):
+    log = ChangeLog(str(tmp_path / 'changes.sqlite'))
+    assert log.record('gsheet', inventory(BASE), at=100.0) == 0
+    inserted = BASE[:2] + [[None, 'Press', 'Press', 'V3', 'Live', 'OK', 'IPC']] + BASE[2:]
+    assert log.record('gsheet', inventory(inserted), at=200.0) == 1
+    # A fresh instance reads the last state back from SQLite
+    reopened = ChangeLog(log.path)
+    assert reopened.record('gsheet', inventory(inserted), at=300.0) == 0
+    events = reopened.events_since(0)
+    assert events[['ts', 'event', 'name']].values.tolist() == [[200.0, 'added', 'Press']]
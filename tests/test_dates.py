@@ -0,0 +1,102 @@
+""" PO date parsing with formats detected per digit layout """
+import random
+
+import pandas as pd
+import pytest
+
+import inventory_core
+from inventory_core import detect_date_format, parse_dates
+
+# Layout -> value builder; year-first layouts are ISO-style, everything else is day-first
+LAYOUTS = {
+    'dd/mm/yyyy': lambda y, m, d: f'{d:02d}/{m:02d}/{y}',
+    'd/m/yyyy': lambda y, m, d: f'{d}/{m}/{y}',
+    'dd-mm-yyyy': lambda y, m, d: f'{d:02d}-{m:02d}-{y}',
+    'dd.mm.yyyy': lambda y, m, d: f'{d:02d}.{m:02d}.{y}',
+    'yyyy-mm-dd': lambda y, m, d: f'{y}-{m:02d}-{d:02d}',
+    'yyyy/mm/dd': lambda y, m, d: f'{y}/{m:02d}/{d:02d}',
+    'yyyy-mm-dd hh:mm:ss': lambda y, m, d: f'{y}-{m:02d}-{d:02d} 10:30:00',
+}
+GARBAGE = ['garbage', 'N/A', '', '  ', '31/02/2020', '13/13/2020', None, 'TBD 2021']
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    inventory_core._FORMAT_CACHE.clear()
+    yield
+    inventory_core._FORMAT_CACHE.clear()
+
+
+def baseline(values, layout):
+    """The pre-detection parse of a column holding only ``layout`` values.
+
+    pd.to_datetime(dayfirst=True) also applies dayfirst to year-first text
+    (2021-03-05 -> 3 May), so those layouts are parsed the ISO way.
+    """
+    if layout.startswith('yyyy'):
+        return pd.to_datetime(values, errors='coerce')
+    return pd.to_datetime(values, dayfirst=True, errors='coerce')
+
+
+def random_column(rng, size):
+    layouts, values = [], []
+    for _ in range(size):
+        layout = rng.choice(list(LAYOUTS) + ['garbage'])
+        y, m, d = rng.randint(2000, 2030), rng.randint(1, 12), rng.randint(1, 28)
+        layouts.append(layout)
+        values.append(rng.choice(GARBAGE) if layout == 'garbage' else LAYOUTS[layout](y, m, d))
+    return pd.Series(values, dtype=object), layouts
+
+
+def expected_for(series, layouts):
+    expected = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+    for layout in set(layouts) - {'garbage'}:
+        rows = [i for i, name in enumerate(layouts) if name == layout]
+        expected[rows] = baseline(series[rows], layout).astype('datetime64[ns]')
+    return expected
+
+
+def assert_same_dates(got, expected):
+    pd.testing.assert_series_equal(got.astype('datetime64[ns]'), expected, check_names=False)
+
+
+@pytest.mark.parametrize('layout', list(LAYOUTS))
+def test_single_layout_matches_baseline(layout):
+    rng = random.Random(layout)
+    values = pd.Series([LAYOUTS[layout](rng.randint(2000, 2030), rng.randint(1, 12), rng.randint(1, 28))
+                        for _ in range(50)])
+    assert_same_dates(parse_dates(values), baseline(values, layout).astype('datetime64[ns]'))
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_mixed_layouts_and_garbage_match_baseline(seed):
+    rng = random.Random(seed)
+    series, layouts = random_column(rng, 60)
+    if seed % 2:
+        # Formats cached from an earlier column must not change the result
+        parse_dates(random_column(rng, 60)[0])
+    assert_same_dates(parse_dates(series), expected_for(series, layouts))
+
+
+def test_ambiguous_dates_are_day_first():
+    parsed = parse_dates(pd.Series(['05/06/2021', '2021-06-05', '5/6/2021', '05.06.2021']))
+    assert parsed.dt.strftime('%Y-%m-%d').tolist() == ['2021-06-05'] * 4
+
+
+def test_month_first_value_does_not_set_the_layout_format():
+    # 05/13/2020 only parses month-first; the other dd/mm/yyyy values must stay day-first
+    parsed = parse_dates(pd.Series(['05/13/2020', '12/03/2021', '25/06/2021']))
+    assert parsed.dt.strftime('%Y-%m-%d').tolist() == ['2020-05-13', '2021-03-12', '2021-06-25']
+    assert detect_date_format('05/13/2020') is None
+    assert detect_date_format('12/03/2021') == '%d/%m/%Y'
+
+
+def test_garbage_first_value_does_not_decide_the_column():
+    parsed = parse_dates(pd.Series(['garbage', '2021-03-05', '05/03/2021', None]))
+    assert parsed.dt.strftime('%Y-%m-%d').fillna('NaT').tolist() == ['NaT', '2021-03-05', '2021-03-05', 'NaT']
+
+
+def test_datetime_and_empty_columns():
+    dates = pd.Series(pd.to_datetime(['2021-03-05', None]))
+    assert parse_dates(dates) is dates
+    assert parse_dates(pd.Series(['', None, '  '])).isna().all()
@@ -0,0 +1,71 @@
+""" The streaming Excel reader gives the same frame as pd.read_excel """
+import datetime
+import os
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+from openpyxl.styles import PatternFill
+
+from excel_reader import read_inventory_excel
+
+HEADER = ['No.', 'Camera name', 'Port', 'PO Date', 'Manufacturing Date', 'Price', 'Serial No', None,
+          'Notes', 'Camera name', 'Empty']
+ROWS = [
+    [1, 'Gate 1', 554, datetime.datetime(2021, 3, 12), '12/03/2021', 1200.5, 'SN-1', None, None, 'dup', None],
+    [2, 'Paint', 8000.0, datetime.datetime(2019, 1, 31), '2019-01-31', 900, 12345, None, 'moved', 'dup', None],
+    [3, 'Weld', 'n/a', None, None, 1000.0, 'SN-3', 'no header', None, None, None],
+    [None] * 11,
+    [5, None, 37777, datetime.datetime(2024, 12, 1, 8, 30), 'garbage', None, 'SN-5', None, None, 'x', None],
+    [6, 'Stores', 554, datetime.datetime(2020, 6, 30), '30/06/2020', 1500.25, 'SN-6', None, 'ok', 'y', None],
+]
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / 'inventory.xlsx'
+    wb = Workbook()
+    ws = wb.active
+    ws.append(HEADER)
+    for row in ROWS:
+        ws.append(row)
+    # Formatted-only rows and columns past the data, like a styled template
+    fill = PatternFill('solid', fgColor='FFFF00')
+    for r in range(len(ROWS) + 2, len(ROWS) + 6):
+        for c in range(1, len(HEADER) + 4):
+            ws.cell(row=r, column=c).fill = fill
+    wb.save(path)
+    return path
+
+
+def baseline(path, **kwargs):
+    expected = pd.read_excel(path, **kwargs)
+    return expected.loc[:, ~expected.columns.astype(str).str.startswith('Unnamed')]
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 4, 1000])
+def test_matches_read_excel(workbook, chunk_rows):
+    pd.testing.assert_frame_equal(read_inventory_excel(workbook, chunk_rows=chunk_rows), baseline(workbook))
+
+
+def test_projected_columns_match_read_excel(workbook):
+    columns = ['Port', 'PO Date', 'Serial No']
+    got = read_inventory_excel(workbook, columns=columns, chunk_rows=2)
+    pd.testing.assert_frame_equal(got, baseline(workbook, usecols=columns))
+
+
+def test_headers_types_and_blank_rows(workbook):
+    df = read_inventory_excel(workbook)
+    assert list(df.columns) == ['No.', 'Camera name', 'Port', 'PO Date', 'Manufacturing Date', 'Price',
+                                'Serial No', 'Notes', 'Camera name.1', 'Empty']
+    # The blank row inside the data is kept, the formatted rows after it are not
+    assert len(df) == len(ROWS) and df.iloc[3].isna().all()
+    # 'n/a' is one of read_excel's missing-value strings
+    assert df['Port'].isna().tolist() == [False, False, True, True, False, False]
+    assert df['PO Date'].dtype.kind == 'M'
+    assert df['Empty'].dtype == 'float64'
+
+
+def test_repository_workbook_matches_read_excel():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Inventorydata.xlsx')
+    pd.testing.assert_frame_equal(read_inventory_excel(path), baseline(path))
@@ -0,0 +1,79 @@
+""" Chunked exports read back to the frame they were built from """
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import exports
+import snapshot_store
+
+ROWS = 53
+CHUNK = 10
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_store, 'CACHE_DIR', str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'No.': np.arange(1, ROWS + 1),
+        'Camera name': [f'CAM-{i}' for i in range(ROWS)],
+        'Types': pd.Categorical(rng.choice(['IPC', 'NVR'], ROWS)),
+        'Port': [554 if i % 4 else 'n/a' for i in range(ROWS)],
+        'Age': rng.random(ROWS) * 10,
+        'PO Date': pd.date_range('2020-01-01', periods=ROWS, freq='7D'),
+        'Notes': ['moved, "upstairs"' if i % 5 == 0 else None for i in range(ROWS)],
+    })
+    df.loc[3, 'Age'] = np.nan
+    # A whole chunk without notes must not change the column's type in Parquet
+    df.loc[10:29, 'Notes'] = None
+    return df
+
+
+def test_csv_matches_a_single_write(frame):
+    data = exports.export_bytes(frame, 'csv', chunk_rows=CHUNK)
+    assert data == frame.to_csv(index=False).encode('utf-8')
+    pd.testing.assert_frame_equal(pd.read_csv(io.BytesIO(data)), pd.read_csv(io.StringIO(frame.to_csv(index=False))))
+
+
+def test_parquet_reads_back(frame):
+    data = exports.export_bytes(frame, 'parquet', chunk_rows=CHUNK)
+    got = pd.read_parquet(io.BytesIO(data))
+    pd.testing.assert_frame_equal(got, snapshot_store.parquet_safe(frame))
+
+
+def test_xlsx_matches_to_excel(frame):
+    data = exports.export_bytes(frame, 'xlsx', chunk_rows=CHUNK)
+    expected = io.BytesIO()
+    frame.to_excel(expected, index=False, sheet_name='Inventory')
+    got = pd.read_excel(io.BytesIO(data), sheet_name='Inventory')
+    pd.testing.assert_frame_equal(got, pd.read_excel(expected, sheet_name='Inventory'))
+    assert len(got) == ROWS
+
+
+@pytest.mark.parametrize('fmt', list(exports.EXPORT_FORMATS))
+def test_empty_frame_keeps_its_header(frame, fmt):
+    data = exports.export_bytes(frame.iloc[:0], fmt, chunk_rows=CHUNK)
+    reader = {'csv': pd.read_csv, 'parquet': pd.read_parquet, 'xlsx': pd.read_excel}[fmt]
+    got = reader(io.BytesIO(data))
+    assert list(got.columns) == list(frame.columns) and got.empty
+
+
+@pytest.mark.parametrize('fmt', list(exports.EXPORT_FORMATS))
+def test_temp_files_are_removed(frame, fmt, cache_dir):
+    exports.export_bytes(frame, fmt, chunk_rows=CHUNK)
+    assert os.listdir(cache_dir / 'exports') == []
+
+
+def test_xlsx_refuses_more_rows_than_a_sheet_holds(frame, monkeypatch, cache_dir):
+    monkeypatch.setattr(exports, 'XLSX_MAX_ROWS', ROWS)
+    with pytest.raises(ValueError):
+        exports.export_bytes(frame, 'xlsx', chunk_rows=CHUNK)
+    assert os.listdir(cache_dir / 'exports') == []
@@ -0,0 +1,151 @@
+""" TCP reachability probing against local asyncio servers """
+import asyncio
+import socket
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from reachability import ReachabilityProber, probe_many, valid_host
+
+HOST = '127.0.0.1'
+
+
+def closed_port():
+    """ A port nothing listens on: bound once by the OS, then released """
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def _serve(handle):
+    return await asyncio.start_server(handle, HOST, 0)
+
+
+async def _drop(reader, writer):
+    writer.close()
+
+
+@pytest.fixture
+def open_port():
+    """ Port of an asyncio server running on its own loop thread """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = asyncio.run_coroutine_threadsafe(_serve(_drop), loop).result(5)
+    yield server.sockets[0].getsockname()[1]
+    server.close()
+    asyncio.run_coroutine_threadsafe(server.wait_closed(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+# --- probe_many ---
+
+def test_probe_many_reports_open_and_closed_ports():
+    async def main():
+        server = await _serve(_drop)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await probe_many({
+                HOST: (closed_port(), port),          # any open port makes the host reachable
+                '127.0.0.2': (port,),                 # the server only listens on 127.0.0.1
+                '127.0.0.3': (closed_port(),),
+            }, timeout=1.0)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    reachable = asyncio.run(main())
+    assert reachable == {HOST: True, '127.0.0.2': False, '127.0.0.3': False}
+
+
+def test_probe_many_times_out_instead_of_hanging():
+    # 192.0.2.0/24 is reserved for documentation and never answers
+    started = time.monotonic()
+    reachable = asyncio.run(probe_many({'192.0.2.1': (554,)}, timeout=0.2))
+    assert reachable == {'192.0.2.1': False}
+    assert time.monotonic() - started < 2
+
+
+@pytest.mark.parametrize('value, expected', [
+    (' 10.0.0.5 ', '10.0.0.5'), ('::1', '::1'), ('', None), ('HO', None), (None, None), ('10.0.0.256', None),
+])
+def test_valid_host(value, expected):
+    assert valid_host(value) == expected
+
+
+# --- ReachabilityProber ---
+
+def test_lookup_answers_from_cache_and_reprobes_after_ttl(open_port):
+    prober = ReachabilityProber(ports=(open_port,), ttl=0.3, timeout=0.5, idle_ttls=100).start()
+    try:
+        hosts = pd.Series([HOST, '127.0.0.2', 'not an ip', None, HOST], index=list('abcde'))
+        ports = [open_port, closed_port(), None, None, open_port]
+        first = prober.lookup(hosts, ports)
+        # Nothing probed yet, so nothing is known; lookups never wait for the network
+        assert first.isna().all() and list(first.index) == list('abcde')
+        assert wait_until(lambda: prober.generation >= 1)
+
+        assert prober.lookup(hosts, ports).tolist() == [True, False, None, None, True]
+        generation = prober.generation
+        time.sleep(0.1)
+        prober.lookup(hosts, ports)
+        assert prober.generation == generation  # still fresh, no new probe
+
+        time.sleep(0.3)
+        prober.lookup(hosts, ports)
+        assert wait_until(lambda: prober.generation > generation)
+        assert prober.last_cycle['hosts'] == 2 and prober.last_cycle['reachable'] == 1
+    finally:
+        prober.stop(timeout=5)
+
+
+def test_hosts_not_looked_up_are_forgotten(open_port):
+    ttl, idle_ttls = 0.2, 2
+    prober = ReachabilityProber(ports=(open_port,), ttl=ttl, timeout=0.5, idle_ttls=idle_ttls).start()
+    try:
+        hosts = pd.Series([HOST])
+        prober.lookup(hosts)
+        assert wait_until(lambda: prober.generation >= 1)
+        # Keep a second host wanted; its lookups must not keep the first one alive
+        other = pd.Series(['127.0.0.2'])
+        deadline = time.monotonic() + ttl * idle_ttls + 0.5
+        while time.monotonic() < deadline:
+            prober.lookup(other)
+            time.sleep(0.05)
+
+        with prober._cond:
+            assert HOST not in prober._wanted and HOST not in prober._results
+            assert '127.0.0.2' in prober._wanted
+        # A forgotten host is unknown again until the next probe
+        assert prober.lookup(hosts).tolist() == [None]
+    finally:
+        prober.stop(timeout=5)
+
+
+def test_probing_stops_once_nobody_looks_up(open_port):
+    ttl, idle_ttls = 0.1, 2
+    prober = ReachabilityProber(ports=(open_port,), ttl=ttl, timeout=0.5, idle_ttls=idle_ttls).start()
+    try:
+        prober.lookup(pd.Series([HOST]))
+        assert wait_until(lambda: prober.generation >= 1)
+        time.sleep(ttl * idle_ttls + 0.3)
+        generation = prober.generation
+        time.sleep(ttl * 3)
+        assert prober.generation == generation
+        with prober._cond:
+            assert not prober._wanted and not prober._results
+    finally:
+        prober.stop(timeout=5)
@@ -0,0 +1,87 @@
+""" Trigram/prefix device search compared with a plain substring scan """
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_inventory
+from search_index import SEARCH_COLUMNS, SearchIndex
+
+
+@pytest.fixture(scope='module')
+def df():
+    frame = generate_inventory(600, seed=11)
+    # Blank and missing cells never match anything
+    frame.loc[frame.index[::37], 'Model'] = None
+    frame.loc[frame.index[::41], 'Area'] = '  '
+    frame.loc[frame.index[::53], 'Camera name'] = 'Gate 1 / HO Lobby'
+    return frame
+
+
+def naive_search(df, query):
+    """ Reference: every word is a case-insensitive substring of some column; prefix matches first """
+    texts = [df[c].astype('string').str.strip().str.lower() for c in SEARCH_COLUMNS if c in df.columns]
+    tokens = query.strip().lower().split()
+    if not tokens:
+        return np.empty(0, dtype=np.intp)
+    matched = np.ones(len(df), dtype=bool)
+    for token in tokens:
+        matched &= np.logical_or.reduce([t.str.contains(token, regex=False).fillna(False).to_numpy(dtype=bool)
+                                         for t in texts])
+    first = matched & np.logical_or.reduce([t.str.startswith(tokens[0]).fillna(False).to_numpy(dtype=bool)
+                                            for t in texts])
+    return np.concatenate([np.flatnonzero(first), np.flatnonzero(matched & ~first)])
+
+
+def random_queries(df, count, seed=0):
+    rng = random.Random(seed)
+    values = [str(v) for c in SEARCH_COLUMNS for v in df[c].dropna().unique() if str(v).strip()]
+    queries = []
+    for _ in range(count):
+        value = rng.choice(values)
+        length = rng.randint(1, min(8, len(value)))
+        start = rng.randrange(len(value) - length + 1)
+        token = value[start:start + length]
+        # Mixed case must not matter
+        token = ''.join(ch.upper() if rng.random() < 0.5 else ch.lower() for ch in token)
+        if rng.random() < 0.3:
+            token += ' ' + rng.choice(['ipc', 'NVR', 'pa', '1', 'zzz'])
+        queries.append(token)
+    return queries
+
+
+@pytest.mark.parametrize('query', [
+    'a', 'IP', 'hik', 'HIKVISION', 'Vivo', 'gate 1', 'ho lobby', '10.', '.1', '0.1', '10.20', '.241', '192.168', 'ds-2cd',
+    'nvr paint', 'zzzz', '', '   ', 'weld   ipc',
+])
+def test_known_queries_match_naive_scan(df, query):
+    index = SearchIndex(df)
+    np.testing.assert_array_equal(index.search(query), naive_search(df, query))
+
+
+def test_random_queries_match_naive_scan(df):
+    index = SearchIndex(df)
+    for query in random_queries(df, 300):
+        np.testing.assert_array_equal(index.search(query), naive_search(df, query), err_msg=query)
+
+
+def test_prefix_matches_rank_first():
+    frame = pd.DataFrame({
+        'Model': ['X-HIK', 'Hikvision', 'Dahua', 'DS-hik', 'HIK-2'],
+        'Area': ['Paint', 'Weld', 'Hikari', 'Paint', 'Weld'],
+    })
+    index = SearchIndex(frame)
+    # Prefix hits (rows 1, 2, 4) keep frame order, then the substring-only rows (0, 3)
+    assert index.search('hik').tolist() == [1, 2, 4, 0, 3]
+    assert index.search('hik weld').tolist() == [1, 4]
+    assert index.search('Paint hik').tolist() == [0, 3]
+
+
+def test_missing_columns_and_empty_frame():
+    frame = pd.DataFrame({'Area': ['Paint', None]})
+    index = SearchIndex(frame)
+    assert index.columns == ['Area']
+    assert index.search('pa').tolist() == [0]
+    assert index.search('nan').tolist() == []
+    assert SearchIndex(frame.iloc[:0]).search('pa').tolist() == []
@@ -0,0 +1,111 @@
+""" Delta sync of one worksheet against the in-memory fake sheet """
+import random
+
+import pandas as pd
+
+from benchmarks.fake_sheets import FakeClient
+from sheet_sync import SheetDeltaSync, build_frame
+
+SHEET_URL = 'https://docs.google.com/spreadsheets/d/test-sheet'
+HEADERS = ['No.', 'Camera name', 'Port', 'Initial Status', 'PO Date']
+ROWS = 200
+# A cycle after a sheet change: revision check, worksheet lookup, one download
+CHANGED_CYCLE_CALLS = {'drive.files.get': 1, 'spreadsheets.get': 1, 'values.get': 1}
+
+
+def make_row(rng, number, port=None):
+    port = port if port is not None else rng.choice(['554', '8000', '37777'])
+    return [str(number), f'CAM-{number}', port, rng.choice(['Live', 'Repair', 'Discard']),
+            rng.choice(['12/03/2021', '2020-01-31', ''])]
+
+
+def setup(rows=ROWS, seed=0):
+    rng = random.Random(seed)
+    values = [HEADERS] + [make_row(rng, i + 1) for i in range(rows)]
+    client = FakeClient({SHEET_URL: [values]})
+    sync = SheetDeltaSync(SHEET_URL)
+    sync.refresh(client, force=True)
+    return rng, client, sync, client.open_by_url(SHEET_URL).get_worksheet(0)
+
+
+def assert_matches_sheet(sync, worksheet):
+    values = worksheet.get()
+    fresh = build_frame(values[0], values[1:])
+    pd.testing.assert_series_equal(sync.frame.dtypes, fresh.dtypes)
+    assert sync.frame.equals(fresh)
+
+
+def refresh(sync, client):
+    """ Force one cycle; returns the API calls it made """
+    before = client.calls.copy()
+    sync.refresh(client, force=True)
+    return dict(client.calls - before)
+
+
+def test_unchanged_sheet_is_not_downloaded_again():
+    _, client, sync, worksheet = setup()
+    assert sync.last_stats['mode'] == 'full'
+    assert client.calls['values.get'] == 1
+    version = sync.version
+
+    assert refresh(sync, client) == {'drive.files.get': 1}
+    assert sync.last_stats['mode'] == 'unchanged'
+    assert sync.version == version
+
+
+def test_edited_inserted_and_deleted_rows_are_patched():
+    rng, client, sync, worksheet = setup()
+    versions = {sync.version}
+    worksheet.set_rows({10: make_row(rng, 11, port='n/a'), 42: make_row(rng, 43)})
+    assert refresh(sync, client) == CHANGED_CYCLE_CALLS
+    assert sync.last_stats['mode'] == 'delta' and sync.last_stats['rows_patched'] == 2
+    assert_matches_sheet(sync, worksheet)
+    versions.add(sync.version)
+
+    # Near the end, so only the rows after it shift and the cycle stays a delta
+    worksheet.insert_rows(ROWS - 3, [make_row(rng, 900), make_row(rng, 901)])
+    assert refresh(sync, client) == CHANGED_CYCLE_CALLS
+    assert sync.last_stats['mode'] == 'delta' and sync.last_stats['rows_patched'] == 5
+    assert_matches_sheet(sync, worksheet)
+    versions.add(sync.version)
+
+    worksheet.delete_rows([ROWS - 1, ROWS])
+    assert refresh(sync, client) == CHANGED_CYCLE_CALLS
+    assert sync.last_stats['mode'] == 'delta' and len(sync.frame) == ROWS
+    assert_matches_sheet(sync, worksheet)
+    versions.add(sync.version)
+
+    assert len(versions) == 4
+
+
+def test_column_is_numeric_again_once_its_text_cell_is_gone():
+    rng, client, sync, worksheet = setup()
+    assert sync.frame['Port'].dtype == 'int64'
+    worksheet.set_rows({5: make_row(rng, 6, port='n/a')})
+    sync.refresh(client, force=True)
+    assert sync.frame['Port'].dtype == object
+    assert_matches_sheet(sync, worksheet)
+
+    worksheet.set_rows({5: make_row(rng, 6, port='554')})
+    sync.refresh(client, force=True)
+    assert sync.last_stats['mode'] == 'delta'
+    assert sync.frame['Port'].dtype == 'int64'
+    assert_matches_sheet(sync, worksheet)
+
+
+def test_random_changes_match_a_fresh_build():
+    rng, client, sync, worksheet = setup(seed=7)
+    for _ in range(40):
+        rows = len(worksheet.get()) - 1
+        action = rng.choice(['edit', 'insert', 'delete', 'append'])
+        if action == 'edit':
+            positions = rng.sample(range(rows), rng.randint(1, 5))
+            worksheet.set_rows({p: make_row(rng, p + 1, port=rng.choice(['554', 'n/a', '', '80'])) for p in positions})
+        elif action == 'insert':
+            worksheet.insert_rows(rng.randrange(rows), [make_row(rng, rows + 1)])
+        elif action == 'delete':
+            worksheet.delete_rows(rng.sample(range(rows), rng.randint(1, 3)))
+        else:
+            worksheet.insert_rows(rows, [make_row(rng, rows + 1)])
+        sync.refresh(client, force=True)
+        assert_matches_sheet(sync, worksheet)
@@ -0,0 +1,239 @@
+""" SheetWriter and edit publishing against the in-memory fake worksheet """
+import threading
+
+import pytest
+
+from benchmarks.fake_sheets import FakeClient
+from sheet_poller import SheetPoller
+from sheet_sync import MultiSheetSync, SheetDeltaSync
+from sheet_writer import SheetWriter
+
+SHEET_URL = 'https://docs.google.com/spreadsheets/d/test-sheet'
+HEADERS = ['No.', 'Camera name', 'Initial Status']
+FLUSH_DELAY = 0.25
+
+
+def sheet_values(n_rows, prefix='CAM'):
+    return [HEADERS] + [[str(i + 1), f'{prefix}-{i + 1}', 'Working'] for i in range(n_rows)]
+
+
+class Clock:
+    """ Stand-in for time.sleep: records backoff delays and holds the flush until released """
+
+    def __init__(self):
+        self.delays = []
+        self.released = threading.Event()
+
+    def sleep(self, seconds):
+        if seconds == FLUSH_DELAY:
+            assert self.released.wait(10), "flush was never released"
+        else:
+            self.delays.append(seconds)
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def make_writer(client, clock, **kwargs):
+    return SheetWriter(client, flush_delay=FLUSH_DELAY, sleep=clock.sleep, **kwargs)
+
+
+def load(client, sheet_idx=0, name=None):
+    sync = SheetDeltaSync(SHEET_URL, sheet_idx, name=name)
+    sync.refresh(client, force=True)
+    return sync
+
+
+def flush(writer, clock):
+    clock.released.set()
+    assert writer.wait_idle(10)
+    return writer.last_stats
+
+
+def cell(client, row, column, sheet_idx=0):
+    """ Current sheet value of data row ``row`` (0-based) in ``column`` """
+    worksheet = client.open_by_url(SHEET_URL).get_worksheet(sheet_idx)
+    return worksheet.get()[row + 1][HEADERS.index(column)]
+
+
+# --- Batching ---
+
+def test_bulk_edit_is_one_batch_update_per_worksheet(clock):
+    client = FakeClient({SHEET_URL: [sheet_values(150, 'A'), sheet_values(150, 'B')]})
+    multi = MultiSheetSync([load(client, 0, 'Plant A'), load(client, 1, 'Plant B')])
+    multi.refresh(client, force=True)
+    writer = make_writer(client, clock)
+    # 200 devices across both sites: rows 0-99 of site A, 0-99 of site B
+    positions = list(range(50, 250))
+    groups = multi.apply_edits({(p, 'Initial Status'): 'Repair' for p in positions}, multi.version)
+    assert [len(cells) for _, cells in groups] == [100, 100]
+    for sync, cells in groups:
+        writer.submit(sync, cells)
+    assert writer.pending == 200
+
+    stats = flush(writer, clock)
+    assert client.calls['values.batchUpdate'] == 2
+    assert stats['cells'] == 200 and stats['requests'] == 2
+    assert stats['retries'] == stats['skipped'] == stats['failed'] == 0
+    assert cell(client, 50, 'Initial Status') == 'Repair'
+    assert cell(client, 49, 'Initial Status') == 'Working'
+    assert cell(client, 99, 'Initial Status', sheet_idx=1) == 'Repair'
+    assert cell(client, 100, 'Initial Status', sheet_idx=1) == 'Working'
+    multi.close()
+
+
+def test_repeated_edits_of_a_cell_are_written_once(clock):
+    client = FakeClient({SHEET_URL: [sheet_values(5)]})
+    sync = load(client)
+    writer = make_writer(client, clock)
+    writer.submit(sync, {(2, 'Initial Status'): 'Repair'})
+    writer.submit(sync, {(2, 'Initial Status'): 'Faulty'})
+
+    stats = flush(writer, clock)
+    assert stats['cells'] == 1
+    assert client.calls['values.batchUpdate'] == 1
+    assert cell(client, 2, 'Initial Status') == 'Faulty'
+
+
+# --- Retries ---
+
+def test_quota_error_is_retried_honouring_retry_after(clock, monkeypatch):
+    monkeypatch.setattr('sheet_writer.random.uniform', lambda a, b: 0.0)
+    client = FakeClient({SHEET_URL: [sheet_values(5)]})
+    sync = load(client)
+    writer = make_writer(client, clock, base_delay=1.0)
+    client.fail_writes(3, code=429, retry_after=3)
+    writer.submit(sync, {(1, 'Initial Status'): 'Repair'})
+
+    stats = flush(writer, clock)
+    # Backoff doubles (1, 2, 4) but never waits less than the server asked for
+    assert clock.delays == [3.0, 3.0, 4.0]
+    assert stats['requests'] == 4 and stats['retries'] == 3
+    assert stats['cells'] == 1 and stats['failed'] == 0
+    assert cell(client, 1, 'Initial Status') == 'Repair'
+
+
+def test_backoff_is_capped_and_gives_up_after_max_attempts(clock, monkeypatch):
+    monkeypatch.setattr('sheet_writer.random.uniform', lambda a, b: 0.0)
+    client = FakeClient({SHEET_URL: [sheet_values(5)]})
+    sync = load(client)
+    writer = make_writer(client, clock, base_delay=1.0, max_delay=4.0, max_attempts=5)
+    client.fail_writes(10, code=503)
+    writer.submit(sync, {(1, 'Initial Status'): 'Repair'})
+
+    stats = flush(writer, clock)
+    assert clock.delays == [1.0, 2.0, 4.0, 4.0]
+    assert stats['requests'] == 5 and stats['failed'] == 1
+    assert '[503]' in stats['error']
+
+
+# --- Conflicts and failures ---
+
+def test_row_changed_in_sheet_before_flush_is_skipped(clock):
+    client = FakeClient({SHEET_URL: [sheet_values(5)]})
+    sync = load(client)
+    writer = make_writer(client, clock)
+    writer.submit(sync, {(1, 'Initial Status'): 'Repair', (3, 'Initial Status'): 'Repair'})
+    # Someone edits row 3 in the Sheets UI and the next pull sees it
+    worksheet = client.open_by_url(SHEET_URL).get_worksheet(0)
+    worksheet.set_rows({3: ['4', 'CAM-4', 'Not Working']})
+    sync.refresh(client, force=True)
+
+    stats = flush(writer, clock)
+    assert stats['cells'] == 1 and stats['skipped'] == 1
+    assert cell(client, 1, 'Initial Status') == 'Repair'
+    assert cell(client, 3, 'Initial Status') == 'Not Working'
+    assert sync.row_hashes[1] == b'' and sync.row_hashes[3] == b''
+
+
+def test_rejected_write_rolls_back_through_mark_stale(clock):
+    client = FakeClient({SHEET_URL: [sheet_values(5)]})
+    sync = load(client)
+    flushed = []
+    writer = make_writer(client, clock, on_flushed=lambda: flushed.append(True))
+    groups = sync.apply_edits({(2, 'Initial Status'): 'Repair'}, sync.version)
+    assert sync.frame.loc[2, 'Initial Status'] == 'Repair'
+    client.fail_writes(1, code=403)
+    for group_sync, cells in groups:
+        writer.submit(group_sync, cells)
+
+    stats = flush(writer, clock)
+    assert stats['failed'] == 1 and stats['cells'] == 0 and stats['retries'] == 0
+    assert '[403]' in stats['error']
+    assert sync.row_hashes[2] == b''
+    assert flushed == [True]
+    # The next pull re-reads the row and drops the optimistic value
+    sync.refresh(client, force=True)
+    assert sync.frame.loc[2, 'Initial Status'] == 'Working'
+    assert cell(client, 2, 'Initial Status') == 'Working'
+
+
+# --- Publishing edits ---
+
+def test_multi_site_edits_are_split_by_site(clock):
+    client = FakeClient({SHEET_URL: [sheet_values(5, 'A'), sheet_values(5, 'B')]})
+    plant_a, plant_b = load(client, 0, 'Plant A'), load(client, 1, 'Plant B')
+    multi = MultiSheetSync([plant_a, plant_b])
+    multi.refresh(client, force=True)
+    version = multi.version
+    writer = make_writer(client, clock)
+
+    groups = multi.apply_edits({(1, 'Initial Status'): 'Repair', (6, 'Initial Status'): 'Faulty'}, version)
+    assert groups == [(plant_a, {(1, 'Initial Status'): 'Repair'}), (plant_b, {(1, 'Initial Status'): 'Faulty'})]
+    assert multi.version != version
+    assert list(multi.frame['Initial Status']) == ['Working', 'Repair'] + ['Working'] * 4 + ['Faulty'] + ['Working'] * 3
+    for sync, cells in groups:
+        writer.submit(sync, cells)
+
+    flush(writer, clock)
+    assert client.calls['values.batchUpdate'] == 2
+    assert cell(client, 1, 'Initial Status') == 'Repair'
+    assert cell(client, 1, 'Initial Status', sheet_idx=1) == 'Faulty'
+    multi.close()
+
+
+def test_multi_site_edit_rolls_back_when_one_site_is_stale():
+    client = FakeClient({SHEET_URL: [sheet_values(5, 'A'), sheet_values(5, 'B')]})
+    plant_a, plant_b = load(client, 0, 'Plant A'), load(client, 1, 'Plant B')
+    multi = MultiSheetSync([plant_a, plant_b])
+    multi.refresh(client, force=True)
+    version = multi.version
+    # Plant B pulls a sheet change before the merged frame is rebuilt
+    client.open_by_url(SHEET_URL).get_worksheet(1).set_rows({4: ['5', 'B-5', 'Not Working']})
+    plant_b.refresh(client, force=True)
+
+    cells = {(1, 'Initial Status'): 'Repair', (6, 'Initial Status'): 'Faulty'}
+    assert multi.apply_edits(cells, version) is None
+    # Plant A was patched first; its row is marked stale so the next pull undoes the edit
+    assert plant_a.row_hashes[1] == b''
+    assert plant_b.frame.loc[1, 'Initial Status'] == 'Working'
+    multi.refresh(client, force=True)
+    assert plant_a.frame.loc[1, 'Initial Status'] == 'Working'
+    assert list(multi.frame['Initial Status']) == ['Working'] * 9 + ['Not Working']
+    assert client.calls['values.batchUpdate'] == 0
+    multi.close()
+
+
+def test_poller_refuses_edits_made_on_a_stale_snapshot():
+    client = FakeClient({SHEET_URL: [sheet_values(5)]})
+    sync = SheetDeltaSync(SHEET_URL)
+    poller = SheetPoller(sync, client, interval=3600).start()
+    try:
+        old = poller.wait_for_snapshot(10)
+        worksheet = client.open_by_url(SHEET_URL).get_worksheet(0)
+        worksheet.set_rows({0: ['1', 'CAM-1', 'Repair']})
+        assert poller.wait_for(poller.request_refresh(), 10)
+        assert poller.snapshot.version != old.version
+
+        assert poller.apply_edits(old.version, {(4, 'Initial Status'): 'Faulty'}) is None
+        assert poller.snapshot.frame.loc[4, 'Initial Status'] == 'Working'
+
+        current = poller.snapshot
+        groups = poller.apply_edits(current.version, {(4, 'Initial Status'): 'Faulty'})
+        assert groups == [(sync, {(4, 'Initial Status'): 'Faulty'})]
+        assert poller.snapshot.version != current.version
+        assert poller.snapshot.frame.loc[4, 'Initial Status'] == 'Faulty'
+    finally:
+        poller.stop(timeout=10)
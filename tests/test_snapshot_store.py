@@ -0,0 +1,72 @@
+""" On-disk snapshots: saved, loaded and seeded back into a sheet sync """
+import importlib
+import os
+
+import pandas as pd
+import pytest
+
+import snapshot_store
+from benchmarks.fake_sheets import FakeClient
+from sheet_sync import SheetDeltaSync, build_frame
+from snapshot_store import load_snapshot, save_snapshot
+
+SHEET_URL = 'https://docs.google.com/spreadsheets/d/test-sheet'
+HEADERS = ['No.', 'Camera name', 'Port', 'Initial Status']
+# 'Port' mixes numbers and text, which Parquet stores as text
+VALUES = [HEADERS] + [
+    [str(i), f'CAM-{i}', 'n/a' if i % 7 == 0 else ('' if i % 11 == 0 else '554'), 'Live'] for i in range(1, 61)
+]
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_store, 'CACHE_DIR', str(tmp_path))
+    return tmp_path
+
+
+def assert_matches_sheet(sync, worksheet):
+    values = worksheet.get()
+    fresh = build_frame(values[0], values[1:])
+    pd.testing.assert_series_equal(sync.frame.dtypes, fresh.dtypes)
+    assert sync.frame.equals(fresh)
+
+
+def test_saved_sheet_seeds_the_same_frame(cache_dir):
+    client = FakeClient({SHEET_URL: [[list(row) for row in VALUES]]})
+    worksheet = client.open_by_url(SHEET_URL).get_worksheet(0)
+    live = SheetDeltaSync(SHEET_URL)
+    live.refresh(client, force=True)
+    assert live.frame['Port'].dtype == object
+    assert save_snapshot('gsheet-Main', live.frame, meta=live.snapshot_meta(), row_hashes=live.row_hashes)
+
+    frame, meta, row_hashes = load_snapshot('gsheet-Main')
+    assert meta['text_columns'] == ['Port'] and row_hashes == live.row_hashes
+    seeded = SheetDeltaSync(SHEET_URL)
+    seeded.seed(frame, meta['headers'], row_hashes, meta['version'], revision=meta['revision'],
+                saved_at=meta['saved_at'], text_columns=meta['text_columns'])
+    assert seeded.from_snapshot and seeded.version == live.version
+    assert_matches_sheet(seeded, worksheet)
+
+    # Rows patched in by the first delta cycle get the same types as the seeded ones
+    worksheet.set_rows({3: ['4', 'CAM-4', '8000', 'Repair'], 21: ['22', 'CAM-22', 'n/a', 'Live']})
+    seeded.refresh(client, force=True)
+    assert seeded.last_stats['mode'] == 'delta' and seeded.last_stats['rows_patched'] == 2
+    assert_matches_sheet(seeded, worksheet)
+
+
+def test_missing_or_unreadable_snapshot(cache_dir):
+    assert load_snapshot('gsheet-Main') == (None, None, None)
+    (cache_dir / 'gsheet-Main.parquet').write_bytes(b'not parquet')
+    assert load_snapshot('gsheet-Main') == (None, None, None)
+
+
+def test_cache_dir_defaults_to_the_app_directory(tmp_path, monkeypatch):
+    monkeypatch.delenv('INVENTORY_CACHE_DIR', raising=False)
+    monkeypatch.chdir(tmp_path)
+    try:
+        module = importlib.reload(snapshot_store)
+        app_dir = os.path.dirname(os.path.abspath(snapshot_store.__file__))
+        assert module.CACHE_DIR == os.path.join(app_dir, '.inventory_cache')
+    finally:
+        monkeypatch.undo()
+        importlib.reload(snapshot_store)
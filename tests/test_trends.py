@@ -0,0 +1,115 @@
+""" Daily rollups and the trend store built from them """
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_inventory
+from inventory_core import (
+    AREA_COLUMN, DEVICE_AGE_COLUMN, LOCATION_CODE, STATUS_CODE, AlertRules, DEFAULT_ALERT_RULES,
+    build_inventory_frame, daily_rollup, summarize_alerts,
+)
+from trend_store import TrendStore
+
+NOW = pd.Timestamp('2025-06-30')
+RULES = AlertRules(DEFAULT_ALERT_RULES)
+
+
+def inventory(rows=400, seed=0):
+    return build_inventory_frame(generate_inventory(rows, seed=seed, now=NOW), now=NOW)
+
+
+def rollup_of(df):
+    return daily_rollup(df, summarize_alerts(df, RULES.evaluate(df)), RULES.age_buckets)
+
+
+def metric(rollup, name):
+    return rollup[rollup['metric'] == name]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TrendStore(str(tmp_path / 'trends.sqlite'))
+
+
+# --- daily_rollup ---
+
+def test_rollup_counts_match_the_frame():
+    df = inventory()
+    rollup = rollup_of(df)
+    assert (rollup['value'] != 0).all()
+    assert metric(rollup, 'devices')['value'].sum() == len(df)
+
+    by_status = metric(rollup, 'status').groupby('status')['value'].sum()
+    expected = df[STATUS_CODE].astype(str).value_counts()
+    pd.testing.assert_series_equal(by_status.sort_index(), expected[expected > 0].sort_index(),
+                                   check_names=False, check_dtype=False)
+
+    by_area = metric(rollup, 'devices').groupby(['location', 'area'])['value'].sum()
+    expected = df.groupby([df[LOCATION_CODE].astype(str), df[AREA_COLUMN].astype(str)], observed=True).size()
+    assert by_area.to_dict() == expected[expected > 0].to_dict()
+
+
+def test_rollup_alerts_and_ages_match_the_frame():
+    df = inventory()
+    flags = RULES.evaluate(df)
+    rollup = rollup_of(df)
+    alerts = metric(rollup, 'alert').groupby('bucket')['value'].sum()
+    assert {k: int(v) for k, v in alerts.items()} == {k: int(v) for k, v in flags.sum().items() if v}
+
+    ages = df[DEVICE_AGE_COLUMN].astype(float)
+    buckets = metric(rollup, 'age_bucket').groupby('bucket')['value'].sum()
+    for low, high, label in RULES.age_buckets:
+        assert buckets.get(label, 0) == ((ages >= low) & (ages < high)).sum()
+    mean = metric(rollup, 'age_years_sum')['value'].sum() / metric(rollup, 'dated_devices')['value'].sum()
+    assert mean == pytest.approx(ages.mean())
+
+
+# --- TrendStore ---
+
+def test_recording_a_day_twice_replaces_it(store):
+    first, second = rollup_of(inventory(seed=1)), rollup_of(inventory(300, seed=2))
+    assert store.record('gsheet', '2025-06-30', first) == len(first)
+    store.record('gsheet', '2025-06-30', second)
+    assert store.days('gsheet') == 1
+    totals = store.history('gsheet', 'status')
+    assert totals['total'].tolist() == [300]
+
+    store.record('gsheet', '2025-07-01', first)
+    store.record('excel', '2025-07-01', second)
+    assert store.days('gsheet') == 2 and store.days('excel') == 1 and store.days('other') == 0
+    assert store.history('gsheet', 'status')['total'].tolist() == [300, 400]
+
+
+def test_history_pivots_days_by_key(store):
+    days = ['2025-06-28', '2025-06-29', '2025-06-30']
+    frames = {day: inventory(seed=i) for i, day in enumerate(days)}
+    for day in reversed(days):
+        store.record('gsheet', day, rollup_of(frames[day]))
+
+    history = store.history('gsheet', 'status', by='status')
+    assert isinstance(history.index, pd.DatetimeIndex) and history.index.is_monotonic_increasing
+    assert list(history.index.strftime('%Y-%m-%d')) == days
+    for day in days:
+        counts = frames[day][STATUS_CODE].astype(str).value_counts()
+        row = history.loc[day]
+        assert {k: int(v) for k, v in row.items() if v} == {k: int(v) for k, v in counts.items() if v}
+    # Statuses missing on a day are 0, not NaN
+    assert not history.isna().any().any()
+
+    location = str(frames[days[0]][LOCATION_CODE].iloc[0])
+    area = str(frames[days[0]][AREA_COLUMN].iloc[0])
+    narrowed = store.history('gsheet', 'devices', locations=[location], area=area, since=days[1])
+    for day in days[1:]:
+        df = frames[day]
+        expected = ((df[LOCATION_CODE].astype(str) == location) & (df[AREA_COLUMN].astype(str) == area)).sum()
+        assert narrowed.loc[day, 'total'] == expected
+    assert len(narrowed) == 2
+
+    by_type = store.history('gsheet', 'devices', by='types')
+    assert by_type.sum(axis=1).tolist() == [len(frames[day]) for day in days]
+
+
+def test_history_of_unknown_source_and_bad_grouping(store):
+    empty = store.history('nothing', 'status', by='status')
+    assert empty.empty and isinstance(empty.index, pd.DatetimeIndex)
+    with pytest.raises(ValueError):
+        store.history('gsheet', 'status', by='value; DROP TABLE rollups')
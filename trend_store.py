@@ -0,0 +1,110 @@
+"""Local time series of daily inventory aggregates for the trend charts.
+
+Each day and source keeps only the small rollup from
+``inventory_core.daily_rollup()`` (a few hundred rows: device counts per
+status x location x area x type, alert and age-bucket counts per location),
+never the inventory itself. Recording the same day again replaces that day,
+so the store holds the last state of each day. Rows are stored clustered by
+(source, metric, day), so a history query is one contiguous range scan that
+returns a day x key frame:
+
+    store = TrendStore()
+    store.record('gsheet', '2025-01-31', daily_rollup(df, summary, rules.age_buckets))
+    repair = store.history('gsheet', 'status', by='status', locations=['1F'])
+"""
+import contextlib
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+import snapshot_store
+
+DB_NAME = 'trends.sqlite'
+GROUP_BY = ('status', 'location', 'area', 'types', 'bucket')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    day TEXT NOT NULL,
+    source TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    status TEXT NOT NULL,
+    location TEXT NOT NULL,
+    area TEXT NOT NULL,
+    types TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (source, metric, day, location, area, status, types, bucket)
+) WITHOUT ROWID;
+"""
+ROLLUP_FIELDS = ['metric', 'status', 'location', 'area', 'types', 'bucket', 'value']
+
+
+class TrendStore:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(snapshot_store.CACHE_DIR, DB_NAME)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # One short-lived connection per call, like the change log; WAL lets charts read during a write
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, source, day, rollup):
+        """ Replace the aggregates of ``source`` for ``day`` (date or ISO string); returns the row count """
+        day = str(day)
+        rows = list(rollup[ROLLUP_FIELDS].itertuples(index=False, name=None))
+        with self._lock, self._connect() as conn:
+            conn.execute('DELETE FROM rollups WHERE source = ? AND day = ?', (source, day))
+            conn.executemany(
+                'INSERT INTO rollups (day, source, ' + ', '.join(ROLLUP_FIELDS) + ') '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(day, source, *row) for row in rows],
+            )
+        return len(rows)
+
+    def days(self, source):
+        """ Number of days recorded for ``source`` """
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(DISTINCT day) FROM rollups WHERE source = ? AND metric = 'status'", (source,)
+            ).fetchone()[0]
+
+    def history(self, source, metric, by=None, locations=None, area=None, since=None):
+        """Daily sums of ``metric`` as a frame indexed by day, one column per ``by`` value.
+
+        ``locations`` (location codes) and ``area`` narrow the rows summed;
+        ``by=None`` gives a single ``'total'`` column.
+        """
+        if by is not None and by not in GROUP_BY:
+            raise ValueError(f"Cannot group trends by {by!r}")
+        key = by or "'total'"
+        query = f'SELECT day, {key} AS key, SUM(value) AS value FROM rollups WHERE source = ? AND metric = ?'
+        params = [source, metric]
+        if locations is not None:
+            query += ' AND location IN (' + ', '.join('?' * len(locations)) + ')'
+            params.extend(locations)
+        if area is not None:
+            query += ' AND area = ?'
+            params.append(area)
+        if since is not None:
+            query += ' AND day >= ?'
+            params.append(str(since))
+        with self._connect() as conn:
+            frame = pd.read_sql_query(query + ' GROUP BY day, key ORDER BY day', conn, params=params)
+        if frame.empty:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name='day'))
+        table = frame.pivot(index='day', columns='key', values='value').fillna(0)
+        table.index = pd.to_datetime(table.index)
+        table.columns.name = None
+        return table